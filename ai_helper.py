@@ -2,23 +2,37 @@
 AI-powered natural language processing and insights
 """
 import json
-from groq import Groq
-import pandas as pd
 import config
+from llm_providers import GroqProvider, RacingProvider, create_fallback, create_provider
+from metrics import registry as metrics
 
 logger = config.get_logger(__name__)
 
 class AIHelper:
     """Handles all AI-powered features"""
 
-    def __init__(self):
-        """Initialize Groq client"""
-        try:
-            self.client = Groq(api_key=config.GROQ_API_KEY)
-            logger.info("Groq AI client initialized successfully")
-        except Exception as e:
-            logger.error(f"Failed to initialize Groq client: {e}")
-            raise
+    def __init__(self, provider=None, client=None, parse_fallback=None):
+        """Prepare the AI helper
+
+        `provider` defaults to config.LLM_PROVIDER; a Groq-compatible
+        `client` may be passed instead. Clients are built on first AI use.
+        `parse_fallback` (default config.LLM_PARSE_FALLBACK) is raced
+        against the provider in parse_message once its budget runs out.
+        """
+        if provider is None:
+            provider = GroqProvider(client) if client is not None else create_provider()
+        self.provider = provider
+        if parse_fallback is None:
+            parse_fallback = create_fallback()
+        self.parse_provider = RacingProvider(provider, parse_fallback) if parse_fallback else provider
+
+    def _chat(self, operation, prompt, temperature=0, provider=None):
+        """Send a single-turn chat completion and return the stripped reply text"""
+        provider = provider or self.provider
+        with metrics.timer(f"{provider.name}.{operation}") as stats:
+            content = provider.complete(prompt, temperature=temperature).strip()
+            stats["bytes"] = len(prompt.encode("utf-8")) + len(content.encode("utf-8"))
+            return content
 
     def parse_message(self, text):
         """Parse user message and extract intent and data"""
@@ -68,13 +82,7 @@ Return ONLY the JSON object for the message above.
 """
 
         try:
-            response = self.client.chat.completions.create(
-                model=config.GROQ_MODEL,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0
-            )
-
-            content = response.choices[0].message.content.strip()
+            content = self._chat("parse_message", prompt, temperature=0, provider=self.parse_provider)
             logger.info(f"AI response: {content}")
 
             # Handle markdown code blocks
@@ -126,12 +134,7 @@ suggest practical solutions. If the data shows success, congratulate them.
 """
 
         try:
-            response = self.client.chat.completions.create(
-                model=config.GROQ_MODEL,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.3
-            )
-            return response.choices[0].message.content.strip()
+            return self._chat("get_insight", prompt, temperature=0.3)
         except Exception as e:
             logger.error(f"AI insight generation failed: {e}")
             return "Sorry, I couldn't generate insights at the moment."
@@ -163,12 +166,7 @@ Format as a numbered list.
 """
 
         try:
-            response = self.client.chat.completions.create(
-                model=config.GROQ_MODEL,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.5
-            )
-            return response.choices[0].message.content.strip()
+            return self._chat("get_business_advice", prompt, temperature=0.5)
         except Exception as e:
             logger.error(f"Business advice generation failed: {e}")
             return "Unable to generate advice at the moment."
@@ -0,0 +1,438 @@
+"""
+Headless JSON API over SheetsManager and AIHelper for POS integrations
+
+A plain ASGI application (no web framework needed; serve it with uvicorn or
+any ASGI server). Sales and expenses posted by concurrent requests are
+coalesced: whatever arrives within config.API_COALESCE_MS is written to the
+sheet as one batch, so a busy till costs one Sheets append per window rather
+than one per sale. Identical concurrent analytics requests and message
+parses share a single computation.
+
+Endpoints (shop from the X-Shop header or ?shop=, default the first shop):
+    GET  /health
+    POST /sales               one sale, or {"sales": [...]}
+    POST /stock               one restock, or {"items": [...]}
+    POST /expenses            one expense, or {"expenses": [...]}
+    POST /parse               {"message": "Sold 2 kurtis ..."}
+    GET  /analytics/profit
+    GET  /analytics/top-items?limit=5&days=30&by=units|sales|revenue
+    GET  /analytics/top-customers?limit=5&days=30
+    GET  /analytics/low-stock
+    GET  /analytics/reorder-plan
+    GET  /analytics/gst?month=YYYY-MM
+
+Usage:
+    python api_server.py                      # Google Sheets from config
+    python api_server.py --fake --rows 10000  # in-memory fake backend
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import math
+import os
+from urllib.parse import parse_qs
+
+import config
+from ai_helper import AIHelper
+from services import validate_sale_data, validate_inventory_data, validate_expense_data
+from sheets_manager import SheetsManager
+from tenants import TenantRegistry, UnknownShopError
+from topk import CUSTOMER_REVENUE, ITEM_COUNT, ITEM_REVENUE, ITEM_UNITS
+from wal import WalLockedError
+
+logger = config.get_logger(__name__)
+
+# units = quantity sold, sales = number of sale rows
+TOP_ITEM_METRICS = {"units": ITEM_UNITS, "sales": ITEM_COUNT, "revenue": ITEM_REVENUE}
+
+
+class ApiError(Exception):
+    """Turned into a JSON error response with the given HTTP status"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _frame_payload(df):
+    """DataFrame as a list of JSON records (dates as ISO strings, inf as null)"""
+    if df.empty:
+        return []
+    return json.loads(df.to_json(orient="records", date_format="iso", default_handler=str))
+
+
+# ===================== COALESCING =====================
+
+class WriteCoalescer:
+    """Collects writes for one shop and sheet and flushes them as one batch
+
+    The first write in an idle window starts a timer; everything submitted
+    before it fires (up to max_batch rows) goes out in one flush() call,
+    run in a worker thread. Each submitter gets back how many of its own
+    rows were recorded.
+    """
+
+    def __init__(self, flush, window_ms=None, max_batch=None):
+        self.flush = flush
+        self.window = (config.API_COALESCE_MS if window_ms is None else window_ms) / 1000
+        self.max_batch = max_batch or config.API_MAX_BATCH
+        self._pending = []  # (rows, future)
+        self._size = 0
+        self._timer = None
+
+    async def submit(self, rows):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((rows, future))
+        self._size += len(rows)
+        if self._size >= self.max_batch:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._start_flush)
+        return await future
+
+    def _start_flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending, self._size = self._pending, [], 0
+        if batch:
+            asyncio.get_running_loop().create_task(self._flush(batch))
+
+    async def _flush(self, batch):
+        rows = [row for submitted, _ in batch for row in submitted]
+        try:
+            recorded = await asyncio.to_thread(self.flush, rows)
+        except Exception as e:
+            logger.error(f"Coalesced write of {len(rows)} rows failed: {e}")
+            recorded = 0
+        # Rows are written in order, so a partial write covers the earliest submitters
+        for submitted, future in batch:
+            mine = min(len(submitted), max(recorded, 0))
+            recorded -= len(submitted)
+            if not future.done():
+                future.set_result(mine)
+
+
+class SingleFlight:
+    """Concurrent calls with the same key share one in-flight computation"""
+
+    def __init__(self):
+        self._inflight = {}
+
+    async def run(self, key, func, *args):
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(asyncio.to_thread(func, *args))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+
+# ===================== APPLICATION =====================
+
+class ApiServer:
+    """ASGI application serving the JSON API"""
+
+    def __init__(self, tenants, ai_helper, window_ms=None, max_batch=None):
+        self.tenants = tenants
+        self.ai_helper = ai_helper
+        self.window_ms = window_ms
+        self.max_batch = max_batch
+        self._coalescers = {}  # (shop_id, sheet) -> WriteCoalescer
+        self._single_flight = SingleFlight()
+        self._routes = {
+            ("GET", "/health"): self.health,
+            ("POST", "/sales"): self.post_sales,
+            ("POST", "/stock"): self.post_stock,
+            ("POST", "/expenses"): self.post_expenses,
+            ("POST", "/parse"): self.post_parse,
+            ("GET", "/analytics/profit"): self.get_profit,
+            ("GET", "/analytics/top-items"): self.get_top_items,
+            ("GET", "/analytics/top-customers"): self.get_top_customers,
+            ("GET", "/analytics/low-stock"): self.get_low_stock,
+            ("GET", "/analytics/reorder-plan"): self.get_reorder_plan,
+            ("GET", "/analytics/gst"): self.get_gst,
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        try:
+            handler = self._routes.get((scope["method"], scope["path"].rstrip("/") or "/"))
+            if handler is None:
+                raise ApiError(404, f"No route for {scope['method']} {scope['path']}")
+            request = _Request(scope, await _read_body(receive))
+            status, payload = 200, await handler(request)
+        except ApiError as e:
+            status, payload = e.status, {"error": str(e)}
+        except Exception as e:
+            logger.error(f"Unhandled API error on {scope['path']}: {e}")
+            status, payload = 500, {"error": "Internal server error"}
+        await _send_json(send, status, payload)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                # Let every shop's pending WAL rows reach the sheet before exiting
+                await asyncio.to_thread(self.tenants.close)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def _manager(self, request):
+        shop_id = request.shop or next(iter(self.tenants.shops))
+        try:
+            return shop_id, self.tenants.get(shop_id)
+        except UnknownShopError:
+            raise ApiError(404, f"Unknown shop: {shop_id}")
+        except WalLockedError as e:
+            raise ApiError(503, str(e))
+
+    def _coalescer(self, shop_id, sheet_name, flush):
+        key = (shop_id, sheet_name)
+        if key not in self._coalescers:
+            self._coalescers[key] = WriteCoalescer(flush, self.window_ms, self.max_batch)
+        return self._coalescers[key]
+
+    # ===================== WRITES =====================
+
+    async def health(self, request):
+        return {"status": "ok", "shops": list(self.tenants.shops)}
+
+    async def post_sales(self, request):
+        shop_id, _ = self._manager(request)
+        sales = [_sale(entry) for entry in request.entries("sales")]
+        # The manager is looked up per flush: the shop may have been evicted meanwhile
+        coalescer = self._coalescer(shop_id, config.SHEET_SALES,
+                                    lambda rows: self.tenants.get(shop_id).add_sales(rows))
+        recorded = await coalescer.submit(sales)
+        return {"recorded": recorded, "submitted": len(sales)}
+
+    async def post_expenses(self, request):
+        shop_id, _ = self._manager(request)
+        expenses = [_expense(entry) for entry in request.entries("expenses")]
+        coalescer = self._coalescer(shop_id, config.SHEET_EXPENSES,
+                                    lambda rows: self.tenants.get(shop_id).add_expenses(rows))
+        recorded = await coalescer.submit(expenses)
+        return {"recorded": recorded, "submitted": len(expenses)}
+
+    async def post_stock(self, request):
+        _, manager = self._manager(request)
+        results = []
+        for entry in request.entries("items"):
+            is_valid, message = validate_inventory_data(entry)
+            if not is_valid:
+                raise ApiError(400, message)
+            success, new_stock, old_stock = await asyncio.to_thread(
+                manager.add_or_update_inventory, entry["item"], float(entry["quantity"]),
+                _number(entry, "cost_price", 0)
+            )
+            results.append({"item": entry["item"], "updated": bool(success), "stock": new_stock, "previous": old_stock})
+        return {"items": results}
+
+    async def post_parse(self, request):
+        body = request.json
+        message = body.get("message") if isinstance(body, dict) else None
+        if not isinstance(message, str) or not message.strip():
+            raise ApiError(400, "message must be a non-empty string")
+        message = message.strip()
+        parsed = await self._single_flight.run(("parse", message), self.ai_helper.parse_message, message)
+        if not parsed:
+            raise ApiError(422, "Could not understand the message")
+        return parsed
+
+    # ===================== ANALYTICS =====================
+
+    async def _snapshot(self, request):
+        shop_id, manager = self._manager(request)
+        return await self._single_flight.run(("snapshot", shop_id), manager.snapshot)
+
+    async def get_profit(self, request):
+        snapshot = await self._snapshot(request)
+        return {"version": snapshot.version, **snapshot.profit}
+
+    async def get_top_items(self, request):
+        snapshot = await self._snapshot(request)
+        metric = TOP_ITEM_METRICS.get(request.param("by", "units"))
+        if metric is None:
+            raise ApiError(400, f"by must be one of {list(TOP_ITEM_METRICS)}")
+        return _leaders(snapshot, metric, request)
+
+    async def get_top_customers(self, request):
+        snapshot = await self._snapshot(request)
+        return _leaders(snapshot, CUSTOMER_REVENUE, request)
+
+    async def get_low_stock(self, request):
+        snapshot = await self._snapshot(request)
+        return {"version": snapshot.version, "items": _frame_payload(snapshot.low_stock)}
+
+    async def get_reorder_plan(self, request):
+        snapshot = await self._snapshot(request)
+        return {"version": snapshot.version, "items": _frame_payload(snapshot.reorder_plan)}
+
+    async def get_gst(self, request):
+        snapshot = await self._snapshot(request)
+        monthly = snapshot.gst_monthly
+        month = request.param("month")
+        if month and not monthly.empty:
+            monthly = monthly[monthly["Month"].astype(str) == month]
+        return {"version": snapshot.version, "slabs": _frame_payload(monthly)}
+
+
+def _leaders(snapshot, metric, request):
+    days = request.int_param("days")
+    limit = request.int_param("limit") or 5
+    leaders = snapshot.leaders.get((metric, days))
+    if leaders is None:
+        raise ApiError(400, f"days must be one of {list(config.TOPK_WINDOWS)} (or omitted for all time)")
+    return {"version": snapshot.version, "top": [{"name": k, "value": v} for k, v in leaders.head(limit).items()]}
+
+
+def _today():
+    return datetime.date.today().strftime(config.DATE_FORMAT)
+
+
+def _number(entry, field, default=None):
+    """Optional numeric field as a float; numeric strings are accepted"""
+    value = entry.get(field)
+    if value is None or value == "":
+        return default
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        number = math.nan
+    if isinstance(value, bool) or not math.isfinite(number) or number < 0:
+        raise ApiError(400, f"{field} must be a non-negative number")
+    return number
+
+
+def _sale(entry):
+    is_valid, message = validate_sale_data(entry)
+    if not is_valid:
+        raise ApiError(400, message)
+    return {
+        "date": entry.get("date") or _today(),
+        "item": entry["item"],
+        "quantity": float(entry["quantity"]),
+        "selling_price": float(entry["selling_price"]),
+        "cost_price": _number(entry, "cost_price"),
+        "customer": entry.get("customer", ""),
+        "gst_rate": _number(entry, "gst_rate", config.DEFAULT_GST_RATE),
+    }
+
+
+def _expense(entry):
+    is_valid, message = validate_expense_data(entry)
+    if not is_valid:
+        raise ApiError(400, message)
+    return {
+        "date": entry.get("date") or _today(),
+        "category": entry.get("category") or "Other",
+        "description": entry["description"],
+        "amount": float(entry["amount"]),
+        "payment_method": entry.get("payment_method", "Cash"),
+    }
+
+
+# ===================== HTTP PLUMBING =====================
+
+class _Request:
+    """Parsed query string, JSON body and shop of an HTTP request"""
+
+    def __init__(self, scope, body):
+        self.query = parse_qs(scope.get("query_string", b"").decode())
+        headers = dict(scope.get("headers", []))
+        self.shop = headers.get(b"x-shop", b"").decode() or self.param("shop")
+        try:
+            self.json = json.loads(body) if body else None
+        except ValueError:
+            raise ApiError(400, "Body is not valid JSON")
+
+    def param(self, name, default=None):
+        values = self.query.get(name)
+        return values[0] if values else default
+
+    def int_param(self, name):
+        value = self.param(name)
+        try:
+            return int(value) if value is not None else None
+        except ValueError:
+            raise ApiError(400, f"{name} must be an integer")
+
+    def entries(self, key):
+        """A bulk body {key: [...]} or a single object, as a list of dicts"""
+        body = self.json
+        entries = body.get(key) if isinstance(body, dict) and key in body else [body]
+        if not isinstance(entries, list) or not entries or not all(isinstance(e, dict) for e in entries):
+            raise ApiError(400, f"Expected an object or {{\"{key}\": [objects]}}")
+        return entries
+
+
+async def _read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+def _json_default(value):
+    """NumPy scalars become plain numbers; anything else its string form"""
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+async def _send_json(send, status, payload):
+    body = json.dumps(payload, default=_json_default).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+# ===================== ENTRY POINT =====================
+
+def create_app(sheets=None, ai_helper=None, window_ms=None, max_batch=None):
+    """Build the ASGI app; `sheets` swaps in another backend (e.g. FakeSpreadsheets)"""
+    root = SheetsManager(sheets=sheets, lazy=sheets is None)
+    tenants = TenantRegistry(root, wal_dir=os.path.join(config.WAL_DIR, "api"))
+    return ApiServer(tenants, ai_helper or AIHelper(), window_ms, max_batch)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serve the Vyapar Vidya JSON API")
+    parser.add_argument("--host", default=config.API_HOST)
+    parser.add_argument("--port", type=int, default=config.API_PORT)
+    parser.add_argument("--fake", action="store_true", help="Serve an in-memory fake Sheets backend")
+    parser.add_argument("--rows", type=int, default=1000, help="Synthetic Sales rows for --fake")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("api_server needs an ASGI server: pip install uvicorn")
+
+    sheets = None
+    if args.fake:
+        from benchmark_analytics import build_sheet_values
+        from fake_sheets import FakeSpreadsheets
+        data = build_sheet_values(args.rows)
+        data.setdefault(config.SHEET_CUSTOMERS, [["Name", "Phone", "Email", "Address"]])
+        sheets = FakeSpreadsheets(data)
+    uvicorn.run(create_app(sheets), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,13 +5,14 @@ Frontend Application (Streamlit)
 import streamlit as st
 import datetime
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 
 # Import backend modules
 import config
-from sheets_manager import SheetsManager
-from ai_helper import AIHelper
+from services import as_number, init_services, init_profiler, validate_sale_data, validate_inventory_data, validate_expense_data
+from tenants import UnknownShopError
+from wal import WalLockedError
+from metrics import registry as metrics
+import exporter
 
 # ===================== PAGE CONFIG =====================
 
@@ -24,22 +25,7 @@ st.set_page_config(
 
 # ===================== INITIALIZE SERVICES =====================
 
-@st.cache_resource
-def init_services():
-    """Initialize backend services (cached)"""
-    # Validate configuration
-    warnings = config.validate_config()
-    for warning in warnings:
-        st.sidebar.warning(f"⚠️ {warning}")
-
-    try:
-        sheets_manager = SheetsManager()
-        ai_helper = AIHelper()
-        return sheets_manager, ai_helper, None
-    except Exception as e:
-        return None, None, str(e)
-
-sheets_manager, ai_helper, error = init_services()
+tenants, ai_helper, error = init_services("app")
 
 if error:
     st.error(f"❌ Failed to initialize services: {error}")
@@ -50,685 +36,971 @@ if error:
 st.sidebar.title("💼 Vyapar Vidya")
 st.sidebar.caption("Smart Finance Assistant")
 
-page = st.sidebar.radio(
-    "Navigate",
-    ["🏠 Home", "📊 Dashboard", "💰 Sales", "📦 Inventory", "💸 Expenses", "👥 Customers", "📈 Reports", "💡 Insights"]
-)
-
-st.sidebar.divider()
-st.sidebar.caption(f"Today: {datetime.date.today().strftime('%d %b %Y')}")
-
-# ===================== VALIDATION HELPERS =====================
-
-def validate_sale_data(data):
-    """Validate sale data"""
-    if not data.get("item"):
-        return False, "Item name is required"
-    if not data.get("quantity") or data.get("quantity") <= 0:
-        return False, "Valid quantity is required"
-    if not data.get("selling_price") or data.get("selling_price") <= 0:
-        return False, "Valid selling price is required"
-    return True, "Valid"
-
-def validate_inventory_data(data):
-    """Validate inventory data"""
-    if not data.get("item"):
-        return False, "Item name is required"
-    if not data.get("quantity") or data.get("quantity") <= 0:
-        return False, "Valid quantity is required"
-    return True, "Valid"
-
-def validate_expense_data(data):
-    """Validate expense data"""
-    if not data.get("amount") or data.get("amount") <= 0:
-        return False, "Valid amount is required"
-    if not data.get("description"):
-        return False, "Description is required"
-    return True, "Valid"
-
-# ===================== PAGE: HOME =====================
-
-if page == "🏠 Home":
-    st.title("💼 Vyapar Vidya - Voice-First Finance Assistant")
-    st.markdown("### Transform your business conversations into financial insights")
-
-    # Natural language input
-    user_input = st.text_area(
-        "💬 Tell me about your business activity",
-        placeholder="Examples:\n- Sold 2 kurtis to Mrs. Sharma for ₹1500 each\n- Received delivery: 20 lipsticks, ₹150 each\n- Paid electricity bill ₹5000\n- How much profit did I make this month?",
-        height=100
+# Shop selection: ?shop=<id> in the URL, or a picker when several shops are configured
+shop_ids = list(tenants.shops)
+shop_id = st.query_params.get("shop", shop_ids[0])
+if len(shop_ids) > 1:
+    shop_id = st.sidebar.selectbox(
+        "🏪 Shop", shop_ids, index=shop_ids.index(shop_id) if shop_id in shop_ids else 0
     )
 
-    col1, col2 = st.columns([1, 4])
-    with col1:
-        submit_btn = st.button("🚀 Submit", use_container_width=True, type="primary")
-
-    if submit_btn and user_input:
-        with st.spinner("Processing..."):
-            # Parse message with AI
-            data = ai_helper.parse_message(user_input)
-
-            if not data:
-                st.error("❌ Could not understand your input. Please try again.")
-                st.stop()
-
-            intent = data.get("intent")
-            today = datetime.date.today().strftime(config.DATE_FORMAT)
-
-            # Handle different intents
-            if intent == "sale":
-                is_valid, message = validate_sale_data(data)
-                if not is_valid:
-                    st.error(f"❌ {message}")
-                    st.stop()
-
-                # Add sale
-                gst_rate = data.get("gst_rate", config.DEFAULT_GST_RATE)
-                success = sheets_manager.add_sale(
-                    today,
-                    data.get("item"),
-                    data.get("quantity"),
-                    data.get("selling_price"),
-                    data.get("cost_price", 0),
-                    data.get("customer", ""),
-                    gst_rate
-                )
-
-                if success:
-                    # Update inventory
-                    sheets_manager.update_inventory_stock(data.get("item"), data.get("quantity"))
-
-                    # Add/update customer
-                    if data.get("customer"):
-                        sheets_manager.add_or_update_customer(data.get("customer"))
-
-                    # Calculate details
-                    quantity = data.get("quantity")
-                    selling_price = data.get("selling_price")
-                    cost_price = data.get("cost_price", 0)
-                    gst_amount = (selling_price * quantity * gst_rate) / 100
-                    total_amount = (selling_price * quantity) + gst_amount
-                    profit = (selling_price - cost_price) * quantity if cost_price else 0
-
-                    st.success("✅ Sale recorded successfully!")
-                    col1, col2, col3, col4 = st.columns(4)
-                    col1.metric("Items Sold", quantity)
-                    col2.metric("Subtotal", f"{config.CURRENCY}{selling_price * quantity:.2f}")
-                    col3.metric(f"GST ({gst_rate}%)", f"{config.CURRENCY}{gst_amount:.2f}")
-                    col4.metric("Total", f"{config.CURRENCY}{total_amount:.2f}")
-                    if cost_price:
-                        st.info(f"💰 Profit: {config.CURRENCY}{profit:.2f}")
-
-            elif intent == "inventory_add":
-                is_valid, message = validate_inventory_data(data)
-                if not is_valid:
-                    st.error(f"❌ {message}")
-                    st.stop()
-
-                # Add/update inventory
-                success, new_stock, old_stock = sheets_manager.add_or_update_inventory(
-                    data.get("item"),
-                    data.get("quantity"),
-                    data.get("cost_price", 0)
-                )
+try:
+    sheets_manager = tenants.get(shop_id)
+except UnknownShopError:
+    st.error(f"❌ Unknown shop: {shop_id}")
+    st.stop()
+except WalLockedError as e:
+    st.error(f"❌ {e}")
+    st.stop()
 
-                if success:
-                    st.success("✅ Inventory updated successfully!")
-                    if old_stock > 0:
-                        st.info(f"📦 {data.get('item')}: {old_stock} → {new_stock} units")
-                    else:
-                        st.info(f"📦 New item added: {data.get('item')} ({new_stock} units)")
+page = st.sidebar.radio(
+    "Navigate",
+    ["🏠 Home", "📊 Dashboard", "💰 Sales", "📦 Inventory", "💸 Expenses", "👥 Customers", "📈 Reports", "💡 Insights", "🩺 Diagnostics"]
+)
 
-            elif intent == "expense":
-                is_valid, message = validate_expense_data(data)
-                if not is_valid:
-                    st.error(f"❌ {message}")
+# Attribute API calls made during this rerun to the selected page
+metrics.set_action(page)
+
+# Per-section render timings (no-op unless VYAPAR_PROFILE is set)
+profiler = init_profiler()
+trace = profiler.start(page)
+
+try:
+    st.sidebar.divider()
+    st.sidebar.caption(f"Today: {datetime.date.today().strftime('%d %b %Y')}")
+
+    # ===================== TABLE HELPERS =====================
+
+    def search_rows(snapshot, sheet_name, label, key):
+        """Search box over a sheet's indexed text; row positions of hits or None"""
+        query = st.text_input(label, key=f"{key}_search", placeholder="Spelling variants match too")
+        if not query.strip():
+            return None
+        with trace.section(f"search_{key}", "aggregate"):
+            return snapshot.search.rows(query, sheet_name)
+
+    def show_result_page(index, filters, sort_columns, key, rows=None):
+        """Render one sorted page of an indexed table; returns the ResultPage
+
+        Only the rows on the current page are sent to the browser. `rows`
+        restricts the table to search hits.
+        """
+        col1, col2, col3 = st.columns([2, 1, 1])
+        with col1:
+            sort_by = st.selectbox("Sort by", sort_columns, key=f"{key}_sort")
+        with col2:
+            descending = st.toggle("Newest / largest first", value=True, key=f"{key}_desc")
+        with col3:
+            page_size = st.selectbox("Rows per page", [25, 50, 100, 250], key=f"{key}_page_size")
+
+        page_key = f"{key}_page"
+        with trace.section(f"query_{key}", "aggregate"):
+            result = index.query(filters, sort_by=sort_by, descending=descending,
+                                 page=st.session_state.get(page_key, 1), page_size=page_size, rows=rows)
+
+        st.dataframe(result.rows, use_container_width=True)
+        if result.pages > 1:
+            # Clamp to the last page when a filter shrinks the result
+            st.session_state[page_key] = result.page
+            st.number_input(f"Page (of {result.pages})", min_value=1, max_value=result.pages, key=page_key)
+        st.caption(f"{result.total_rows:,} matching rows")
+        return result
+
+    def name_hints(names):
+        """"Did you mean" hints for (name, field, sheet name, label) tuples
+
+        Names equal to an existing one apart from case, spacing or plurals
+        are matched by the manager; only near matches are listed here.
+        """
+        hints = []
+        for name, field, sheet_name, label in names:
+            suggestions = sheets_manager.name_suggestions(name, field, sheet_name) if name else []
+            if suggestions:
+                hints.append(f"{label} '{name}' is new. Similar existing: {', '.join(suggestions)}")
+        return hints
+
+    def confirm_new_names(names, key):
+        """False (with a warning) the first time a form submits near-match names
+
+        Submitting the same names again records them as typed.
+        """
+        hints = name_hints(names)
+        submitted = tuple(name for name, *_ in names)
+        if not hints or st.session_state.get(f"{key}_confirmed") == submitted:
+            return True
+        st.session_state[f"{key}_confirmed"] = submitted
+        st.warning("⚠️ " + "\n\n".join(hints) + "\n\nCorrect the name, or submit again to save it as typed.")
+        return False
+
+    # Periods offered for top items and customers (days, None = all time)
+    LEADERBOARD_PERIODS = {"All time": None, "Last 30 days": 30, "Last 7 days": 7}
+
+    # ===================== PAGE: HOME =====================
+
+    if page == "🏠 Home":
+        st.title("💼 Vyapar Vidya - Voice-First Finance Assistant")
+        st.markdown("### Transform your business conversations into financial insights")
+
+        # Natural language input
+        user_input = st.text_area(
+            "💬 Tell me about your business activity",
+            placeholder="Examples:\n- Sold 2 kurtis to Mrs. Sharma for ₹1500 each\n- Received delivery: 20 lipsticks, ₹150 each\n- Paid electricity bill ₹5000\n- How much profit did I make this month?",
+            height=100
+        )
+
+        col1, col2 = st.columns([1, 4])
+        with col1:
+            submit_btn = st.button("🚀 Submit", use_container_width=True, type="primary")
+
+        if submit_btn and user_input:
+            with st.spinner("Processing..."):
+                # Parse message with AI
+                with trace.section("parse_message", "llm"):
+                    data = ai_helper.parse_message(user_input)
+
+                if not data:
+                    st.error("❌ Could not understand your input. Please try again.")
                     st.stop()
 
-                # Suggest category if not provided
-                category = data.get("category") or ai_helper.suggest_category(data.get("description", ""))
-                payment_method = data.get("payment_method", "Cash")
-
-                success = sheets_manager.add_expense(
-                    today,
-                    category,
-                    data.get("description"),
-                    data.get("amount"),
-                    payment_method
-                )
-
-                if success:
-                    st.success("✅ Expense recorded successfully!")
-                    col1, col2, col3 = st.columns(3)
-                    col1.metric("Amount", f"{config.CURRENCY}{data.get('amount'):.2f}")
-                    col2.metric("Category", category)
-                    col3.metric("Payment", payment_method)
-
-            else:  # query
-                # Get all data for insights
-                sales_df = sheets_manager.get_sales()
-                inventory_df = sheets_manager.get_inventory()
-                expenses_df = sheets_manager.get_expenses()
-                profit_data = sheets_manager.get_profit()
-
-                # Get AI insight
-                insight = ai_helper.get_insight(user_input, sales_df, inventory_df, expenses_df, profit_data)
-                st.info(f"💡 {insight}")
-
-    # Quick stats
-    st.divider()
-    st.subheader("📊 Quick Overview")
-
-    profit_data = sheets_manager.get_profit()
-    col1, col2, col3, col4 = st.columns(4)
-
-    with col1:
-        st.metric("💰 Revenue", f"{config.CURRENCY}{profit_data['revenue']:,.2f}")
-    with col2:
-        st.metric("💸 Expenses", f"{config.CURRENCY}{profit_data['expenses']:,.2f}")
-    with col3:
-        profit_color = "normal" if profit_data['profit'] >= 0 else "inverse"
-        st.metric("📈 Profit", f"{config.CURRENCY}{profit_data['profit']:,.2f}")
-    with col4:
-        margin = (profit_data['profit'] / profit_data['revenue'] * 100) if profit_data['revenue'] > 0 else 0
-        st.metric("📊 Margin", f"{margin:.1f}%")
-
-# ===================== PAGE: DASHBOARD =====================
-
-elif page == "📊 Dashboard":
-    st.title("📊 Business Dashboard")
-
-    # Financial metrics
-    profit_data = sheets_manager.get_profit()
-
-    col1, col2, col3, col4 = st.columns(4)
-    with col1:
-        st.metric("💰 Total Revenue", f"{config.CURRENCY}{profit_data['revenue']:,.2f}")
-    with col2:
-        st.metric("🏭 Cost of Goods", f"{config.CURRENCY}{profit_data['cost']:,.2f}")
-    with col3:
-        st.metric("💸 Operating Expenses", f"{config.CURRENCY}{profit_data['expenses']:,.2f}")
-    with col4:
-        profit_delta = profit_data['profit']
-        delta_color = "normal" if profit_delta >= 0 else "inverse"
-        st.metric("📈 Net Profit", f"{config.CURRENCY}{profit_data['profit']:,.2f}")
-
-    st.divider()
-
-    # Charts
-    col1, col2 = st.columns(2)
-
-    with col1:
-        # Sales trend
-        st.subheader("📈 Sales Trend")
-        sales_df = sheets_manager.get_sales()
-        if not sales_df.empty and "Date" in sales_df.columns and "Total Amount" in sales_df.columns:
-            daily_sales = sales_df.groupby("Date")["Total Amount"].sum().reset_index()
-            fig = px.line(daily_sales, x="Date", y="Total Amount", markers=True)
-            fig.update_layout(xaxis_title="Date", yaxis_title=f"Revenue ({config.CURRENCY})")
-            st.plotly_chart(fig, use_container_width=True)
-        else:
-            st.info("No sales data available yet")
-
-    with col2:
-        # Top selling items
-        st.subheader("🏆 Top Selling Items")
-        top_items = sheets_manager.get_top_selling_items(5)
-        if not top_items.empty:
-            fig = px.bar(x=top_items.values, y=top_items.index, orientation='h')
-            fig.update_layout(xaxis_title="Number of Sales", yaxis_title="Item")
-            st.plotly_chart(fig, use_container_width=True)
-        else:
-            st.info("No sales data available yet")
-
-    # Expense breakdown
-    st.subheader("💸 Expense Breakdown")
-    expenses_df = sheets_manager.get_expenses()
-    if not expenses_df.empty and "Category" in expenses_df.columns and "Amount" in expenses_df.columns:
-        expense_by_category = expenses_df.groupby("Category")["Amount"].sum().reset_index()
-        fig = px.pie(expense_by_category, values="Amount", names="Category")
-        st.plotly_chart(fig, use_container_width=True)
-    else:
-        st.info("No expense data available yet")
-
-    # Low stock alerts
-    st.divider()
-    st.subheader("⚠️ Low Stock Alerts")
-    low_stock = sheets_manager.get_low_stock_items(5)
-    if not low_stock.empty:
-        st.warning(f"⚠️ {len(low_stock)} items are running low on stock!")
-        st.dataframe(low_stock, use_container_width=True)
-    else:
-        st.success("✅ All items are well-stocked")
-
-# ===================== PAGE: SALES =====================
-
-elif page == "💰 Sales":
-    st.title("💰 Sales Management")
-
-    tab1, tab2 = st.tabs(["➕ Add Sale", "📋 View Sales"])
-
-    with tab1:
-        st.subheader("Record New Sale")
-
-        with st.form("sale_form"):
-            col1, col2 = st.columns(2)
-
-            with col1:
-                item = st.text_input("Item Name*", placeholder="e.g., Red Kurti")
-                quantity = st.number_input("Quantity*", min_value=1, value=1)
-                selling_price = st.number_input(f"Selling Price per unit ({config.CURRENCY})*", min_value=0.0, step=0.01)
-
-            with col2:
-                customer = st.text_input("Customer Name", placeholder="e.g., Mrs. Sharma")
-                cost_price = st.number_input(f"Cost Price per unit ({config.CURRENCY})", min_value=0.0, step=0.01)
-                gst_rate = st.selectbox("GST Rate", list(config.GST_RATES.keys()), index=3)
-
-            submitted = st.form_submit_button("💾 Record Sale", use_container_width=True, type="primary")
-
-            if submitted:
-                if not item or quantity <= 0 or selling_price <= 0:
-                    st.error("❌ Please fill all required fields")
-                else:
-                    today = datetime.date.today().strftime(config.DATE_FORMAT)
-                    gst_value = config.GST_RATES[gst_rate]
-
-                    success = sheets_manager.add_sale(
-                        today, item, quantity, selling_price, cost_price, customer, gst_value
-                    )
+                intent = data.get("intent")
+                today = datetime.date.today().strftime(config.DATE_FORMAT)
+
+                # Handle different intents
+                if intent == "sale":
+                    is_valid, message = validate_sale_data(data)
+                    if not is_valid:
+                        st.error(f"❌ {message}")
+                        st.stop()
+
+                    # Near-match names are recorded as given; point out the existing ones
+                    hints = name_hints([
+                        (data.get("item"), "Item", config.SHEET_INVENTORY, "Item"),
+                        (data.get("customer"), "Customer", config.SHEET_CUSTOMERS, "Customer"),
+                    ])
+
+                    # The model may return numbers as strings ("2")
+                    quantity = as_number(data.get("quantity"))
+                    selling_price = as_number(data.get("selling_price"))
+                    cost_price = as_number(data.get("cost_price"))
+                    gst_rate = as_number(data.get("gst_rate"), config.DEFAULT_GST_RATE)
+
+                    # Add sale
+                    with trace.section("add_sale", "write"):
+                        success = sheets_manager.add_sale(
+                            today,
+                            data.get("item"),
+                            quantity,
+                            selling_price,
+                            cost_price,
+                            data.get("customer", ""),
+                            gst_rate
+                        )
 
                     if success:
-                        sheets_manager.update_inventory_stock(item, quantity)
-                        if customer:
-                            sheets_manager.add_or_update_customer(customer)
-
-                        st.success("✅ Sale recorded successfully!")
-                        st.rerun()
-
-    with tab2:
-        st.subheader("Sales History")
-        sales_df = sheets_manager.get_sales()
-
-        if not sales_df.empty:
-            # Filters
-            col1, col2 = st.columns(2)
-            with col1:
-                if "Item" in sales_df.columns:
-                    items = ["All"] + sales_df["Item"].unique().tolist()
-                    selected_item = st.selectbox("Filter by Item", items)
-            with col2:
-                if "Customer" in sales_df.columns:
-                    customers = ["All"] + sales_df["Customer"].dropna().unique().tolist()
-                    selected_customer = st.selectbox("Filter by Customer", customers)
-
-            # Apply filters
-            filtered_df = sales_df.copy()
-            if selected_item != "All":
-                filtered_df = filtered_df[filtered_df["Item"] == selected_item]
-            if selected_customer != "All":
-                filtered_df = filtered_df[filtered_df["Customer"] == selected_customer]
-
-            st.dataframe(filtered_df, use_container_width=True)
-
-            # Summary
-            if not filtered_df.empty and "Total Amount" in filtered_df.columns:
-                col1, col2, col3 = st.columns(3)
-                col1.metric("Total Transactions", len(filtered_df))
-                col2.metric("Total Revenue", f"{config.CURRENCY}{filtered_df['Total Amount'].sum():,.2f}")
-                if "Quantity" in filtered_df.columns:
-                    col3.metric("Total Items Sold", f"{int(filtered_df['Quantity'].sum())}")
-        else:
-            st.info("No sales recorded yet. Start by adding your first sale!")
-
-# ===================== PAGE: INVENTORY =====================
-
-elif page == "📦 Inventory":
-    st.title("📦 Inventory Management")
-
-    tab1, tab2 = st.tabs(["➕ Add Stock", "📋 View Inventory"])
+                        with trace.section("update_stock_and_customer", "write"):
+                            # Update inventory
+                            sheets_manager.update_inventory_stock(data.get("item"), quantity)
 
-    with tab1:
-        st.subheader("Add New Stock")
+                            # Add/update customer
+                            if data.get("customer"):
+                                sheets_manager.add_or_update_customer(data.get("customer"))
 
-        with st.form("inventory_form"):
-            col1, col2 = st.columns(2)
+                        # Calculate details
+                        gst_amount = (selling_price * quantity * gst_rate) / 100
+                        total_amount = (selling_price * quantity) + gst_amount
+                        profit = (selling_price - cost_price) * quantity if cost_price else 0
 
-            with col1:
-                item = st.text_input("Item Name*", placeholder="e.g., Lipsticks")
-                quantity = st.number_input("Quantity*", min_value=1, value=1)
-
-            with col2:
-                cost_price = st.number_input(f"Cost Price per unit ({config.CURRENCY})", min_value=0.0, step=0.01)
-
-            submitted = st.form_submit_button("📦 Add to Inventory", use_container_width=True, type="primary")
-
-            if submitted:
-                if not item or quantity <= 0:
-                    st.error("❌ Please fill all required fields")
-                else:
-                    success, new_stock, old_stock = sheets_manager.add_or_update_inventory(
-                        item, quantity, cost_price
-                    )
+                        st.success("✅ Sale recorded successfully!")
+                        for hint in hints:
+                            st.info(f"ℹ️ {hint}")
+                        col1, col2, col3, col4 = st.columns(4)
+                        col1.metric("Items Sold", f"{quantity:g}")
+                        col2.metric("Subtotal", f"{config.CURRENCY}{selling_price * quantity:.2f}")
+                        col3.metric(f"GST ({gst_rate:g}%)", f"{config.CURRENCY}{gst_amount:.2f}")
+                        col4.metric("Total", f"{config.CURRENCY}{total_amount:.2f}")
+                        if cost_price:
+                            st.info(f"💰 Profit: {config.CURRENCY}{profit:.2f}")
+
+                elif intent == "inventory_add":
+                    is_valid, message = validate_inventory_data(data)
+                    if not is_valid:
+                        st.error(f"❌ {message}")
+                        st.stop()
+
+                    hints = name_hints([(data.get("item"), "Item", config.SHEET_INVENTORY, "Item")])
+
+                    # Add/update inventory
+                    with trace.section("add_or_update_inventory", "write"):
+                        success, new_stock, old_stock = sheets_manager.add_or_update_inventory(
+                            data.get("item"),
+                            as_number(data.get("quantity")),
+                            as_number(data.get("cost_price"))
+                        )
 
                     if success:
+                        st.success("✅ Inventory updated successfully!")
                         if old_stock > 0:
-                            st.success(f"✅ Stock updated! {item}: {old_stock} → {new_stock} units")
+                            st.info(f"📦 {data.get('item')}: {old_stock} → {new_stock} units")
                         else:
-                            st.success(f"✅ New item added! {item}: {new_stock} units")
-                        st.rerun()
-
-    with tab2:
-        st.subheader("Current Inventory")
-        inventory_df = sheets_manager.get_inventory()
-
-        if not inventory_df.empty:
-            # Add stock status
-            if "Stock" in inventory_df.columns:
-                inventory_df["Status"] = inventory_df["Stock"].apply(
-                    lambda x: "🔴 Low" if x < 5 else "🟡 Medium" if x < 20 else "🟢 Good"
-                )
-
-            st.dataframe(inventory_df, use_container_width=True)
-
-            # Summary
-            col1, col2, col3 = st.columns(3)
-            col1.metric("Total Items", len(inventory_df))
-            if "Stock" in inventory_df.columns:
-                col2.metric("Total Units", f"{int(inventory_df['Stock'].sum())}")
-                low_stock = len(inventory_df[inventory_df["Stock"] < 5])
-                col3.metric("Low Stock Items", low_stock, delta=None if low_stock == 0 else "⚠️")
-        else:
-            st.info("No inventory recorded yet. Start by adding your first item!")
-
-# ===================== PAGE: EXPENSES =====================
-
-elif page == "💸 Expenses":
-    st.title("💸 Expense Tracking")
-
-    tab1, tab2 = st.tabs(["➕ Add Expense", "📋 View Expenses"])
-
-    with tab1:
-        st.subheader("Record New Expense")
-
-        with st.form("expense_form"):
-            col1, col2 = st.columns(2)
-
-            with col1:
-                amount = st.number_input(f"Amount ({config.CURRENCY})*", min_value=0.0, step=0.01)
-                category = st.selectbox("Category*", [
-                    "Rent", "Utilities", "Salaries", "Transportation",
-                    "Marketing", "Office Supplies", "Maintenance", "Other"
-                ])
-
-            with col2:
-                description = st.text_input("Description*", placeholder="e.g., Monthly electricity bill")
-                payment_method = st.selectbox("Payment Method", ["Cash", "Bank Transfer", "UPI", "Card"])
-
-            submitted = st.form_submit_button("💾 Record Expense", use_container_width=True, type="primary")
-
-            if submitted:
-                if amount <= 0 or not description:
-                    st.error("❌ Please fill all required fields")
-                else:
-                    today = datetime.date.today().strftime(config.DATE_FORMAT)
-                    success = sheets_manager.add_expense(today, category, description, amount, payment_method)
+                            st.info(f"📦 New item added: {data.get('item')} ({new_stock} units)")
+                        for hint in hints:
+                            st.info(f"ℹ️ {hint}")
+
+                elif intent == "expense":
+                    is_valid, message = validate_expense_data(data)
+                    if not is_valid:
+                        st.error(f"❌ {message}")
+                        st.stop()
+
+                    # Suggest category if not provided
+                    category = data.get("category") or ai_helper.suggest_category(data.get("description", ""))
+                    payment_method = data.get("payment_method", "Cash")
+                    amount = as_number(data.get("amount"))
+
+                    with trace.section("add_expense", "write"):
+                        success = sheets_manager.add_expense(
+                            today,
+                            category,
+                            data.get("description"),
+                            amount,
+                            payment_method
+                        )
 
                     if success:
                         st.success("✅ Expense recorded successfully!")
-                        st.rerun()
-
-    with tab2:
-        st.subheader("Expense History")
-        expenses_df = sheets_manager.get_expenses()
-
-        if not expenses_df.empty:
-            # Filters
-            if "Category" in expenses_df.columns:
-                categories = ["All"] + expenses_df["Category"].unique().tolist()
-                selected_category = st.selectbox("Filter by Category", categories)
+                        col1, col2, col3 = st.columns(3)
+                        col1.metric("Amount", f"{config.CURRENCY}{amount:.2f}")
+                        col2.metric("Category", category)
+                        col3.metric("Payment", payment_method)
+
+                else:  # query
+                    # Answer from the precomputed snapshot
+                    with trace.section("snapshot", "fetch"):
+                        snapshot = sheets_manager.snapshot()
+
+                    # Get AI insight
+                    with trace.section("get_insight", "llm"):
+                        insight = ai_helper.get_insight(user_input, snapshot.sales, snapshot.inventory,
+                                                        snapshot.expenses, snapshot.profit)
+                    st.info(f"💡 {insight}")
+
+        # Quick stats
+        st.divider()
+        st.subheader("📊 Quick Overview")
+
+        with trace.section("snapshot", "fetch"):
+            profit_data = sheets_manager.snapshot().profit
+        col1, col2, col3, col4 = st.columns(4)
+
+        with col1:
+            st.metric("💰 Revenue", f"{config.CURRENCY}{profit_data['revenue']:,.2f}")
+        with col2:
+            st.metric("💸 Expenses", f"{config.CURRENCY}{profit_data['expenses']:,.2f}")
+        with col3:
+            profit_color = "normal" if profit_data['profit'] >= 0 else "inverse"
+            st.metric("📈 Profit", f"{config.CURRENCY}{profit_data['profit']:,.2f}")
+        with col4:
+            margin = (profit_data['profit'] / profit_data['revenue'] * 100) if profit_data['revenue'] > 0 else 0
+            st.metric("📊 Margin", f"{margin:.1f}%")
+
+    # ===================== PAGE: DASHBOARD =====================
+
+    elif page == "📊 Dashboard":
+        import plotly.express as px  # deferred: only chart pages pay the import cost
+
+        st.title("📊 Business Dashboard")
+
+        # Aggregates are precomputed by the background refresher
+        with trace.section("snapshot", "fetch"):
+            snapshot = sheets_manager.snapshot()
+        st.caption(f"Data as of {datetime.datetime.fromtimestamp(snapshot.built_at).strftime('%H:%M:%S')}")
+
+        # Financial metrics
+        profit_data = snapshot.profit
+
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("💰 Total Revenue", f"{config.CURRENCY}{profit_data['revenue']:,.2f}")
+        with col2:
+            st.metric("🏭 Cost of Goods", f"{config.CURRENCY}{profit_data['cost']:,.2f}")
+        with col3:
+            st.metric("💸 Operating Expenses", f"{config.CURRENCY}{profit_data['expenses']:,.2f}")
+        with col4:
+            profit_delta = profit_data['profit']
+            delta_color = "normal" if profit_delta >= 0 else "inverse"
+            st.metric("📈 Net Profit", f"{config.CURRENCY}{profit_data['profit']:,.2f}")
+
+        st.divider()
+
+        # Charts
+        col1, col2 = st.columns(2)
+
+        with col1:
+            # Sales trend
+            st.subheader("📈 Sales Trend")
+            granularity = st.radio("Group by", list(snapshot.sales_trend), horizontal=True, key="sales_trend_freq")
+            trend = snapshot.sales_trend[granularity]
+            if not trend.empty:
+                def build_trend():
+                    fig = px.line(trend, x="Date", y="Total Amount", markers=len(trend) <= 100)
+                    fig.update_layout(xaxis_title="Date", yaxis_title=f"Revenue ({config.CURRENCY})")
+                    return fig
+
+                with trace.section("sales_trend_chart", "chart"):
+                    fig = sheets_manager.charts.figure(snapshot.version, ("sales_trend", granularity), build_trend)
+                    st.plotly_chart(fig, use_container_width=True)
+            else:
+                st.info("No sales data available yet")
+
+        with col2:
+            # Top selling items
+            st.subheader("🏆 Top Selling Items")
+            period_col, measure_col = st.columns(2)
+            with period_col:
+                period = st.selectbox("Period", list(LEADERBOARD_PERIODS), key="top_items_period")
+            with measure_col:
+                measure = st.selectbox("Rank by", ["Units", "Revenue", "Margin", "Sales"], key="top_items_measure")
+            rankings = snapshot.item_rankings[LEADERBOARD_PERIODS[period]]
+            if not rankings.empty:
+                def build_top_items():
+                    top_items = rankings[measure].nlargest(5)
+                    fig = px.bar(x=top_items.values, y=top_items.index, orientation='h')
+                    axis_titles = {
+                        "Units": "Units Sold",
+                        "Revenue": f"Revenue ({config.CURRENCY})",
+                        "Margin": f"Margin ({config.CURRENCY})",
+                        "Sales": "Number of Sales",
+                    }
+                    fig.update_layout(xaxis_title=axis_titles[measure], yaxis_title="Item")
+                    return fig
+
+                with trace.section("top_items_chart", "chart"):
+                    fig = sheets_manager.charts.figure(snapshot.version, ("top_items", period, measure), build_top_items)
+                    st.plotly_chart(fig, use_container_width=True)
+                with st.expander("All items"):
+                    st.dataframe(rankings.drop(columns=["Units Rank", "Revenue Rank", "Margin Rank"]),
+                                 use_container_width=True)
+            else:
+                st.info("No sales data available yet")
+
+        # Expense breakdown
+        st.subheader("💸 Expense Breakdown")
+        expense_by_category = snapshot.expense_by_category
+        if not expense_by_category.empty:
+            with trace.section("expense_pie_chart", "chart"):
+                fig = sheets_manager.charts.figure(
+                    snapshot.version, "expense_pie",
+                    lambda: px.pie(expense_by_category, values="Amount", names="Category")
+                )
+                st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.info("No expense data available yet")
+
+        # Low stock alerts
+        st.divider()
+        st.subheader("⚠️ Low Stock Alerts")
+        low_stock = snapshot.low_stock
+        if not low_stock.empty:
+            st.warning(f"⚠️ {len(low_stock)} items are at or below their reorder point!")
+            st.dataframe(low_stock, use_container_width=True)
+        else:
+            st.success("✅ All items are well-stocked")
+
+    # ===================== PAGE: SALES =====================
+
+    elif page == "💰 Sales":
+        st.title("💰 Sales Management")
+
+        tab1, tab2 = st.tabs(["➕ Add Sale", "📋 View Sales"])
+
+        with tab1:
+            st.subheader("Record New Sale")
+
+            with st.form("sale_form"):
+                col1, col2 = st.columns(2)
+
+                with col1:
+                    item = st.text_input("Item Name*", placeholder="e.g., Red Kurti")
+                    quantity = st.number_input("Quantity*", min_value=1, value=1)
+                    selling_price = st.number_input(f"Selling Price per unit ({config.CURRENCY})*", min_value=0.0, step=0.01)
+
+                with col2:
+                    customer = st.text_input("Customer Name", placeholder="e.g., Mrs. Sharma")
+                    cost_price = st.number_input(f"Cost Price per unit ({config.CURRENCY})", min_value=0.0, step=0.01)
+                    gst_rate = st.selectbox("GST Rate", list(config.GST_RATES.keys()), index=3)
+
+                submitted = st.form_submit_button("💾 Record Sale", use_container_width=True, type="primary")
+
+                if submitted:
+                    if not item or quantity <= 0 or selling_price <= 0:
+                        st.error("❌ Please fill all required fields")
+                    elif confirm_new_names([(item, "Item", config.SHEET_INVENTORY, "Item"),
+                                            (customer, "Customer", config.SHEET_CUSTOMERS, "Customer")], "sale_form"):
+                        today = datetime.date.today().strftime(config.DATE_FORMAT)
+                        gst_value = config.GST_RATES[gst_rate]
+
+                        with trace.section("add_sale", "write"):
+                            success = sheets_manager.add_sale(
+                                today, item, quantity, selling_price, cost_price, customer, gst_value
+                            )
+
+                        if success:
+                            with trace.section("update_stock_and_customer", "write"):
+                                sheets_manager.update_inventory_stock(item, quantity)
+                                if customer:
+                                    sheets_manager.add_or_update_customer(customer)
+
+                            st.success("✅ Sale recorded successfully!")
+                            st.rerun()
+
+        with tab2:
+            st.subheader("Sales History")
+            with trace.section("snapshot", "fetch"):
+                snapshot = sheets_manager.snapshot()
+                sales_index = snapshot.sales_index
+
+            if len(sales_index):
+                hits = search_rows(snapshot, config.SHEET_SALES, "🔍 Search items or customers", "sales")
+
+                # Filters
+                col1, col2 = st.columns(2)
+                with col1:
+                    selected_item = st.selectbox("Filter by Item", ["All"] + sales_index.values("Item"))
+                with col2:
+                    selected_customer = st.selectbox("Filter by Customer", ["All"] + sales_index.values("Customer"))
+
+                filters = {
+                    "Item": None if selected_item == "All" else selected_item,
+                    "Customer": None if selected_customer == "All" else selected_customer,
+                }
+                sort_columns = [c for c in ["Date", "Total Amount", "Quantity", "Item"] if c in sales_index.df.columns]
+                result = show_result_page(sales_index, filters, sort_columns, "sales", rows=hits)
+
+                # Summary over every matching row, not just this page
+                if result.total_rows and "Total Amount" in result.totals:
+                    col1, col2, col3 = st.columns(3)
+                    col1.metric("Total Transactions", result.total_rows)
+                    col2.metric("Total Revenue", f"{config.CURRENCY}{result.totals['Total Amount']:,.2f}")
+                    if "Quantity" in result.totals:
+                        col3.metric("Total Items Sold", f"{int(result.totals['Quantity'])}")
+            else:
+                st.info("No sales recorded yet. Start by adding your first sale!")
+
+    # ===================== PAGE: INVENTORY =====================
+
+    elif page == "📦 Inventory":
+        st.title("📦 Inventory Management")
+
+        tab1, tab2, tab3 = st.tabs(["➕ Add Stock", "📋 View Inventory", "📜 Stock History"])
+
+        with tab1:
+            st.subheader("Add New Stock")
+
+            with st.form("inventory_form"):
+                col1, col2 = st.columns(2)
+
+                with col1:
+                    item = st.text_input("Item Name*", placeholder="e.g., Lipsticks")
+                    quantity = st.number_input("Quantity*", min_value=1, value=1)
+
+                with col2:
+                    cost_price = st.number_input(f"Cost Price per unit ({config.CURRENCY})", min_value=0.0, step=0.01)
+
+                submitted = st.form_submit_button("📦 Add to Inventory", use_container_width=True, type="primary")
+
+                if submitted:
+                    if not item or quantity <= 0:
+                        st.error("❌ Please fill all required fields")
+                    elif confirm_new_names([(item, "Item", config.SHEET_INVENTORY, "Item")], "inventory_form"):
+                        with trace.section("add_or_update_inventory", "write"):
+                            success, new_stock, old_stock = sheets_manager.add_or_update_inventory(
+                                item, quantity, cost_price
+                            )
+
+                        if success:
+                            if old_stock > 0:
+                                st.success(f"✅ Stock updated! {item}: {old_stock} → {new_stock} units")
+                            else:
+                                st.success(f"✅ New item added! {item}: {new_stock} units")
+                            st.rerun()
+
+        with tab2:
+            st.subheader("Current Inventory")
+            with trace.section("get_inventory", "fetch"):
+                inventory_df = sheets_manager.get_inventory()
 
-                if selected_category != "All":
-                    filtered_df = expenses_df[expenses_df["Category"] == selected_category]
-                else:
-                    filtered_df = expenses_df
+            if not inventory_df.empty:
+                # Add stock status
+                if "Stock" in inventory_df.columns:
+                    inventory_df["Status"] = inventory_df["Stock"].apply(
+                        lambda x: "🔴 Low" if x < 5 else "🟡 Medium" if x < 20 else "🟢 Good"
+                    )
 
-                st.dataframe(filtered_df, use_container_width=True)
+                st.dataframe(inventory_df, use_container_width=True)
 
                 # Summary
-                if not filtered_df.empty and "Amount" in filtered_df.columns:
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Total Items", len(inventory_df))
+                if "Stock" in inventory_df.columns:
+                    col2.metric("Total Units", f"{int(inventory_df['Stock'].sum())}")
+                    low_stock = len(inventory_df[inventory_df["Stock"] < 5])
+                    col3.metric("Low Stock Items", low_stock, delta=None if low_stock == 0 else "⚠️")
+            else:
+                st.info("No inventory recorded yet. Start by adding your first item!")
+
+        with tab3:
+            with trace.section("get_stock_ledger", "fetch"):
+                ledger = sheets_manager.get_stock_ledger()
+            items = ledger.items()
+
+            if items:
+                st.subheader("Stock on a Date")
+                col1, col2 = st.columns(2)
+                with col1:
+                    history_item = st.selectbox("Item", items)
+                with col2:
+                    history_date = st.date_input("As of", datetime.date.today(), key="stock_history_date")
+                st.metric(f"{history_item} on {history_date.strftime('%d %b %Y')}",
+                          f"{ledger.stock_on(history_item, history_date):g} units")
+
+                st.subheader("Turnover")
+                col1, col2 = st.columns(2)
+                with col1:
+                    turnover_start = st.date_input("From", datetime.date.today() - datetime.timedelta(days=30),
+                                                   key="turnover_start")
+                with col2:
+                    turnover_end = st.date_input("To", datetime.date.today(), key="turnover_end")
+                with trace.section("turnover_report", "aggregate"):
+                    turnover_df = ledger.turnover_report(turnover_start, turnover_end)
+                st.dataframe(turnover_df, use_container_width=True)
+
+                st.subheader("Adjust Stock")
+                with st.form("adjustment_form"):
                     col1, col2, col3 = st.columns(3)
-                    col1.metric("Total Expenses", len(filtered_df))
-                    col2.metric("Total Amount", f"{config.CURRENCY}{filtered_df['Amount'].sum():,.2f}")
-                    col3.metric("Average Expense", f"{config.CURRENCY}{filtered_df['Amount'].mean():,.2f}")
-        else:
-            st.info("No expenses recorded yet. Start by adding your first expense!")
+                    with col1:
+                        adjust_item = st.selectbox("Item", items, key="adjust_item")
+                    with col2:
+                        adjust_change = st.number_input("Change (+/-)", value=0, step=1)
+                    with col3:
+                        adjust_reason = st.text_input("Reason", value="adjustment")
+
+                    if st.form_submit_button("✏️ Record Adjustment", use_container_width=True):
+                        if adjust_change == 0:
+                            st.error("❌ Enter a non-zero change")
+                        else:
+                            with trace.section("record_stock_adjustment", "write"):
+                                success = sheets_manager.record_stock_adjustment(
+                                    adjust_item, adjust_change, adjust_reason or "adjustment"
+                                )
+                            if success:
+                                st.success(f"✅ Recorded {adjust_change:+g} for {adjust_item}")
+                                st.rerun()
+            else:
+                st.info("No inventory recorded yet. Start by adding your first item!")
 
-# ===================== PAGE: CUSTOMERS =====================
+    # ===================== PAGE: EXPENSES =====================
 
-elif page == "👥 Customers":
-    st.title("👥 Customer Management")
+    elif page == "💸 Expenses":
+        st.title("💸 Expense Tracking")
 
-    tab1, tab2, tab3 = st.tabs(["➕ Add Customer", "📋 View Customers", "🏆 Top Customers"])
+        tab1, tab2 = st.tabs(["➕ Add Expense", "📋 View Expenses"])
 
-    with tab1:
-        st.subheader("Add New Customer")
+        with tab1:
+            st.subheader("Record New Expense")
 
-        with st.form("customer_form"):
-            name = st.text_input("Customer Name*", placeholder="e.g., Mrs. Sharma")
-            phone = st.text_input("Phone Number", placeholder="e.g., 9876543210")
-            email = st.text_input("Email", placeholder="e.g., customer@example.com")
-            address = st.text_area("Address", placeholder="Enter customer address")
+            with st.form("expense_form"):
+                col1, col2 = st.columns(2)
 
-            submitted = st.form_submit_button("👤 Add Customer", use_container_width=True, type="primary")
+                with col1:
+                    amount = st.number_input(f"Amount ({config.CURRENCY})*", min_value=0.0, step=0.01)
+                    category = st.selectbox("Category*", [
+                        "Rent", "Utilities", "Salaries", "Transportation",
+                        "Marketing", "Office Supplies", "Maintenance", "Other"
+                    ])
 
-            if submitted:
-                if not name:
-                    st.error("❌ Customer name is required")
-                else:
-                    success = sheets_manager.add_or_update_customer(name, phone, email, address)
-                    if success:
-                        st.success("✅ Customer added successfully!")
-                        st.rerun()
+                with col2:
+                    description = st.text_input("Description*", placeholder="e.g., Monthly electricity bill")
+                    payment_method = st.selectbox("Payment Method", ["Cash", "Bank Transfer", "UPI", "Card"])
 
-    with tab2:
-        st.subheader("All Customers")
-        customers_df = sheets_manager.get_customers()
+                submitted = st.form_submit_button("💾 Record Expense", use_container_width=True, type="primary")
 
-        if not customers_df.empty:
-            st.dataframe(customers_df, use_container_width=True)
-            st.metric("Total Customers", len(customers_df))
-        else:
-            st.info("No customers recorded yet. Customers are automatically added when you record sales!")
-
-    with tab3:
-        st.subheader("🏆 Top Customers by Purchase Value")
-        top_customers = sheets_manager.get_top_customers(10)
-
-        if not top_customers.empty:
-            # Create bar chart
-            fig = px.bar(
-                x=top_customers.values,
-                y=top_customers.index,
-                orientation='h',
-                labels={'x': f'Total Purchase ({config.CURRENCY})', 'y': 'Customer'}
-            )
-            st.plotly_chart(fig, use_container_width=True)
-
-            # Show table
-            top_df = pd.DataFrame({
-                'Customer': top_customers.index,
-                'Total Purchase': [f"{config.CURRENCY}{val:,.2f}" for val in top_customers.values]
-            })
-            st.dataframe(top_df, use_container_width=True)
-        else:
-            st.info("No customer purchase data available yet")
-
-# ===================== PAGE: REPORTS =====================
-
-elif page == "📈 Reports":
-    st.title("📈 Financial Reports")
-
-    # Date range selector
-    col1, col2 = st.columns(2)
-    with col1:
-        start_date = st.date_input("From Date", datetime.date.today() - datetime.timedelta(days=30))
-    with col2:
-        end_date = st.date_input("To Date", datetime.date.today())
-
-    st.divider()
-
-    # Profit & Loss Statement
-    st.subheader("💰 Profit & Loss Statement")
-    profit_data = sheets_manager.get_profit()
-
-    pl_data = {
-        "Category": ["Revenue", "Cost of Goods Sold", "Gross Profit", "Operating Expenses", "Net Profit"],
-        "Amount": [
-            profit_data['revenue'],
-            profit_data['cost'],
-            profit_data['revenue'] - profit_data['cost'],
-            profit_data['expenses'],
-            profit_data['profit']
-        ]
-    }
-    pl_df = pd.DataFrame(pl_data)
-    pl_df["Amount"] = pl_df["Amount"].apply(lambda x: f"{config.CURRENCY}{x:,.2f}")
-
-    st.table(pl_df)
-
-    # Visualizations
-    col1, col2 = st.columns(2)
-
-    with col1:
-        st.subheader("📊 Revenue vs Expenses")
-        fig = go.Figure(data=[
-            go.Bar(name='Revenue', x=['Total'], y=[profit_data['revenue']], marker_color='green'),
-            go.Bar(name='Expenses', x=['Total'], y=[profit_data['expenses']], marker_color='red'),
-            go.Bar(name='Profit', x=['Total'], y=[profit_data['profit']], marker_color='blue')
-        ])
-        fig.update_layout(barmode='group')
-        st.plotly_chart(fig, use_container_width=True)
-
-    with col2:
-        st.subheader("🥧 Cost Breakdown")
-        breakdown_data = {
-            'Category': ['Cost of Goods', 'Operating Expenses', 'Profit'],
-            'Amount': [profit_data['cost'], profit_data['expenses'], profit_data['profit']]
+                if submitted:
+                    if amount <= 0 or not description:
+                        st.error("❌ Please fill all required fields")
+                    else:
+                        today = datetime.date.today().strftime(config.DATE_FORMAT)
+                        with trace.section("add_expense", "write"):
+                            success = sheets_manager.add_expense(today, category, description, amount, payment_method)
+
+                        if success:
+                            st.success("✅ Expense recorded successfully!")
+                            st.rerun()
+
+        with tab2:
+            st.subheader("Expense History")
+            with trace.section("snapshot", "fetch"):
+                snapshot = sheets_manager.snapshot()
+                expenses_index = snapshot.expenses_index
+
+            if len(expenses_index):
+                hits = search_rows(snapshot, config.SHEET_EXPENSES, "🔍 Search descriptions or categories", "expenses")
+
+                # Filters
+                if "Category" in expenses_index.df.columns:
+                    categories = ["All"] + expenses_index.values("Category")
+                    selected_category = st.selectbox("Filter by Category", categories)
+                    filters = {"Category": None if selected_category == "All" else selected_category}
+
+                    sort_columns = [c for c in ["Date", "Amount", "Category"] if c in expenses_index.df.columns]
+                    result = show_result_page(expenses_index, filters, sort_columns, "expenses", rows=hits)
+
+                    # Summary over every matching row, not just this page
+                    if result.total_rows and "Amount" in result.totals:
+                        col1, col2, col3 = st.columns(3)
+                        col1.metric("Total Expenses", result.total_rows)
+                        col2.metric("Total Amount", f"{config.CURRENCY}{result.totals['Amount']:,.2f}")
+                        col3.metric("Average Expense",
+                                    f"{config.CURRENCY}{result.totals['Amount'] / result.total_rows:,.2f}")
+            else:
+                st.info("No expenses recorded yet. Start by adding your first expense!")
+
+    # ===================== PAGE: CUSTOMERS =====================
+
+    elif page == "👥 Customers":
+        st.title("👥 Customer Management")
+
+        tab1, tab2, tab3 = st.tabs(["➕ Add Customer", "📋 View Customers", "🏆 Top Customers"])
+
+        with tab1:
+            st.subheader("Add New Customer")
+
+            with st.form("customer_form"):
+                name = st.text_input("Customer Name*", placeholder="e.g., Mrs. Sharma")
+                phone = st.text_input("Phone Number", placeholder="e.g., 9876543210")
+                email = st.text_input("Email", placeholder="e.g., customer@example.com")
+                address = st.text_area("Address", placeholder="Enter customer address")
+
+                submitted = st.form_submit_button("👤 Add Customer", use_container_width=True, type="primary")
+
+                if submitted:
+                    if not name:
+                        st.error("❌ Customer name is required")
+                    elif confirm_new_names([(name, "Customer", config.SHEET_CUSTOMERS, "Customer")], "customer_form"):
+                        with trace.section("add_or_update_customer", "write"):
+                            success = sheets_manager.add_or_update_customer(name, phone, email, address)
+                        if success:
+                            st.success("✅ Customer added successfully!")
+                            st.rerun()
+
+        with tab2:
+            st.subheader("All Customers")
+            with trace.section("snapshot", "fetch"):
+                snapshot = sheets_manager.snapshot()
+                customers_df = snapshot.customers
+
+            if not customers_df.empty:
+                hits = search_rows(snapshot, config.SHEET_CUSTOMERS, "🔍 Search customers", "customers")
+                if hits is not None:
+                    customers_df = customers_df.iloc[[pos for pos in hits if pos < len(customers_df)]]
+                st.dataframe(customers_df, use_container_width=True)
+                st.metric("Total Customers", len(snapshot.customers))
+            else:
+                st.info("No customers recorded yet. Customers are automatically added when you record sales!")
+
+        with tab3:
+            import plotly.express as px  # deferred: only chart pages pay the import cost
+
+            st.subheader("🏆 Top Customers by Purchase Value")
+            period = st.selectbox("Period", list(LEADERBOARD_PERIODS), key="top_customers_period")
+            with trace.section("snapshot", "fetch"):
+                snapshot = sheets_manager.snapshot()
+                top_customers = snapshot.leaders[("customer_revenue", LEADERBOARD_PERIODS[period])]
+
+            if not top_customers.empty:
+                # Create bar chart
+                with trace.section("top_customers_chart", "chart"):
+                    fig = sheets_manager.charts.figure(snapshot.version, ("top_customers", period), lambda: px.bar(
+                        x=top_customers.values,
+                        y=top_customers.index,
+                        orientation='h',
+                        labels={'x': f'Total Purchase ({config.CURRENCY})', 'y': 'Customer'}
+                    ))
+                    st.plotly_chart(fig, use_container_width=True)
+
+                # Show table
+                top_df = pd.DataFrame({
+                    'Customer': top_customers.index,
+                    'Total Purchase': [f"{config.CURRENCY}{val:,.2f}" for val in top_customers.values]
+                })
+                st.dataframe(top_df, use_container_width=True)
+            else:
+                st.info("No customer purchase data available yet")
+
+    # ===================== PAGE: REPORTS =====================
+
+    elif page == "📈 Reports":
+        import plotly.express as px  # deferred: only chart pages pay the import cost
+        import plotly.graph_objects as go
+
+        st.title("📈 Financial Reports")
+
+        # Date range selector
+        col1, col2 = st.columns(2)
+        with col1:
+            start_date = st.date_input("From Date", datetime.date.today() - datetime.timedelta(days=30))
+        with col2:
+            end_date = st.date_input("To Date", datetime.date.today())
+
+        st.divider()
+
+        # Profit & Loss Statement
+        st.subheader("💰 Profit & Loss Statement")
+        with trace.section("snapshot", "fetch"):
+            snapshot = sheets_manager.snapshot()
+            profit_data = snapshot.profit
+
+        pl_data = {
+            "Category": ["Revenue", "Cost of Goods Sold", "Gross Profit", "Operating Expenses", "Net Profit"],
+            "Amount": [
+                profit_data['revenue'],
+                profit_data['cost'],
+                profit_data['revenue'] - profit_data['cost'],
+                profit_data['expenses'],
+                profit_data['profit']
+            ]
         }
-        fig = px.pie(breakdown_data, values='Amount', names='Category')
-        st.plotly_chart(fig, use_container_width=True)
-
-    # Download reports
-    st.divider()
-    st.subheader("📥 Download Reports")
-
-    col1, col2, col3 = st.columns(3)
+        pl_df = pd.DataFrame(pl_data)
+        pl_df["Amount"] = pl_df["Amount"].apply(lambda x: f"{config.CURRENCY}{x:,.2f}")
 
-    with col1:
-        sales_df = sheets_manager.get_sales()
-        if not sales_df.empty:
-            csv = sales_df.to_csv(index=False)
-            st.download_button(
-                label="📊 Download Sales Report",
-                data=csv,
-                file_name=f"sales_report_{datetime.date.today()}.csv",
-                mime="text/csv"
-            )
+        st.table(pl_df)
 
-    with col2:
-        expenses_df = sheets_manager.get_expenses()
-        if not expenses_df.empty:
-            csv = expenses_df.to_csv(index=False)
-            st.download_button(
-                label="💸 Download Expenses Report",
-                data=csv,
-                file_name=f"expenses_report_{datetime.date.today()}.csv",
-                mime="text/csv"
-            )
+        # Visualizations
+        col1, col2 = st.columns(2)
 
-    with col3:
-        inventory_df = sheets_manager.get_inventory()
-        if not inventory_df.empty:
-            csv = inventory_df.to_csv(index=False)
-            st.download_button(
-                label="📦 Download Inventory Report",
-                data=csv,
-                file_name=f"inventory_report_{datetime.date.today()}.csv",
-                mime="text/csv"
+        with col1:
+            st.subheader("📊 Revenue vs Expenses")
+            def build_revenue_vs_expenses():
+                fig = go.Figure(data=[
+                    go.Bar(name='Revenue', x=['Total'], y=[profit_data['revenue']], marker_color='green'),
+                    go.Bar(name='Expenses', x=['Total'], y=[profit_data['expenses']], marker_color='red'),
+                    go.Bar(name='Profit', x=['Total'], y=[profit_data['profit']], marker_color='blue')
+                ])
+                fig.update_layout(barmode='group')
+                return fig
+
+            with trace.section("revenue_vs_expenses_chart", "chart"):
+                fig = sheets_manager.charts.figure(snapshot.version, "revenue_vs_expenses", build_revenue_vs_expenses)
+                st.plotly_chart(fig, use_container_width=True)
+
+        with col2:
+            st.subheader("🥧 Cost Breakdown")
+            breakdown_data = {
+                'Category': ['Cost of Goods', 'Operating Expenses', 'Profit'],
+                'Amount': [profit_data['cost'], profit_data['expenses'], profit_data['profit']]
+            }
+            with trace.section("cost_breakdown_chart", "chart"):
+                fig = sheets_manager.charts.figure(
+                    snapshot.version, "cost_breakdown",
+                    lambda: px.pie(breakdown_data, values='Amount', names='Category')
+                )
+                st.plotly_chart(fig, use_container_width=True)
+
+        # GST summary per month and rate slab, from the snapshot's rollups
+        st.divider()
+        st.subheader("🧾 GST Summary")
+        gst_monthly = snapshot.gst_monthly
+
+        if not gst_monthly.empty:
+            months = sorted(gst_monthly["Month"].unique(), reverse=True)
+            month = st.selectbox("Return period", months, format_func=lambda m: m.strftime("%B %Y"))
+            slabs = gst_monthly[gst_monthly["Month"] == month]
+
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Taxable Value", f"{config.CURRENCY}{slabs['Taxable Value'].sum():,.2f}")
+            col2.metric("CGST", f"{config.CURRENCY}{slabs['CGST'].sum():,.2f}")
+            col3.metric("SGST", f"{config.CURRENCY}{slabs['SGST'].sum():,.2f}")
+            col4.metric("Total Tax", f"{config.CURRENCY}{slabs['Tax'].sum():,.2f}")
+
+            st.dataframe(
+                slabs[["Slab", "Invoices", "Taxable Value", "CGST", "SGST", "Tax", "Invoice Value"]],
+                use_container_width=True, hide_index=True
             )
+            with st.expander("By customer"):
+                customers = snapshot.gst_customers
+                st.dataframe(
+                    customers[customers["Month"] == month][["Customer", "Slab", "Invoices", "Taxable Value", "CGST", "SGST"]],
+                    use_container_width=True, hide_index=True
+                )
+        else:
+            st.info("No sales recorded yet.")
+
+        # Download reports
+        st.divider()
+        st.subheader("📥 Download Reports")
+
+        # Files are only built when asked for, from the snapshot already in memory
+        export_format = st.radio("Format", exporter.available_formats(), horizontal=True)
+        reports = [
+            ("sales", "📊 Sales Report", snapshot.sales, True),
+            ("expenses", "💸 Expenses Report", snapshot.expenses, True),
+            ("inventory", "📦 Inventory Report", snapshot.inventory, False),
+        ]
 
-# ===================== PAGE: INSIGHTS =====================
-
-elif page == "💡 Insights":
-    st.title("💡 Business Insights & Recommendations")
-
-    # Get data
-    profit_data = sheets_manager.get_profit()
-    low_stock_items = sheets_manager.get_low_stock_items(5)
-    top_items = sheets_manager.get_top_selling_items(5)
-
-    # AI-powered business advice
-    st.subheader("🤖 AI-Powered Business Advice")
-
-    with st.spinner("Analyzing your business data..."):
-        advice = ai_helper.get_business_advice(profit_data, low_stock_items, top_items)
-        st.info(advice)
-
-    st.divider()
-
-    # Key metrics
-    col1, col2, col3 = st.columns(3)
-
-    with col1:
-        st.metric("💰 Net Profit", f"{config.CURRENCY}{profit_data['profit']:,.2f}")
-
-    with col2:
-        margin = (profit_data['profit'] / profit_data['revenue'] * 100) if profit_data['revenue'] > 0 else 0
-        st.metric("📊 Profit Margin", f"{margin:.1f}%")
-
-    with col3:
-        st.metric("⚠️ Low Stock Items", len(low_stock_items))
-
-    # Insights cards
-    st.divider()
-    st.subheader("📌 Quick Insights")
-
-    col1, col2 = st.columns(2)
+        for column, (report, label, df, dated) in zip(st.columns(3), reports):
+            with column:
+                if df.empty:
+                    continue
+                if st.button(f"Prepare {label}", key=f"export_{report}"):
+                    start, end = (start_date, end_date) if dated else (None, None)
+                    with trace.section(f"export_{report}", "export"):
+                        data, rows = exporter.export(df, export_format, start, end)
+                        with data:
+                            payload = data.read()  # Streamlit serves downloads from memory
+                    st.download_button(
+                        label=f"⬇️ Download ({rows:,} rows)",
+                        data=payload,
+                        file_name=exporter.file_name(report, export_format, start, end),
+                        mime=exporter.EXPORT_FORMATS[export_format].mime,
+                        key=f"download_{report}",
+                    )
 
-    with col1:
-        st.markdown("### 🏆 Best Performers")
-        if not top_items.empty:
-            for idx, (item, count) in enumerate(top_items.head(3).items(), 1):
-                st.markdown(f"**{idx}. {item}** - {int(count)} sales")
-        else:
-            st.info("No sales data yet")
+    # ===================== PAGE: INSIGHTS =====================
+
+    elif page == "💡 Insights":
+        st.title("💡 Business Insights & Recommendations")
+
+        # Get data
+        with trace.section("snapshot", "fetch"):
+            snapshot = sheets_manager.snapshot()
+        profit_data = snapshot.profit
+        low_stock_items = snapshot.low_stock
+        top_items = snapshot.top_items
+
+        # AI-powered business advice
+        st.subheader("🤖 AI-Powered Business Advice")
+
+        with st.spinner("Analyzing your business data..."):
+            with trace.section("get_business_advice", "llm"):
+                advice = ai_helper.get_business_advice(profit_data, low_stock_items, top_items)
+            st.info(advice)
+
+        st.divider()
+
+        # Key metrics
+        col1, col2, col3 = st.columns(3)
+
+        with col1:
+            st.metric("💰 Net Profit", f"{config.CURRENCY}{profit_data['profit']:,.2f}")
+
+        with col2:
+            margin = (profit_data['profit'] / profit_data['revenue'] * 100) if profit_data['revenue'] > 0 else 0
+            st.metric("📊 Profit Margin", f"{margin:.1f}%")
+
+        with col3:
+            st.metric("⚠️ Low Stock Items", len(low_stock_items))
+
+        # Insights cards
+        st.divider()
+        st.subheader("📌 Quick Insights")
+
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.markdown("### 🏆 Best Performers")
+            rankings = snapshot.item_rankings[None]
+            if not rankings.empty:
+                for idx, (item, row) in enumerate(rankings.head(3).iterrows(), 1):
+                    st.markdown(f"**{idx}. {item}** - {int(row['Units'])} units, "
+                                f"{config.CURRENCY}{row['Revenue']:,.0f} revenue, {row['Margin %']:.0f}% margin")
+            else:
+                st.info("No sales data yet")
+
+        with col2:
+            st.markdown("### ⚠️ Needs Attention")
+            if not low_stock_items.empty:
+                for idx, row in low_stock_items.head(3).iterrows():
+                    detail = f", ~{row['Days of Cover']:g} days of cover" if row["Days of Cover"] != float("inf") else ""
+                    if row["Reorder Qty"] > 0:
+                        detail += f" - reorder {int(row['Reorder Qty'])}"
+                    st.warning(f"📦 **{row['Item']}** - Only {int(row['Stock'])} units left{detail}")
+            else:
+                st.success("✅ All items well-stocked!")
+
+        # Ask AI
+        st.divider()
+        st.subheader("💬 Ask AI About Your Business")
+
+        question = st.text_input("Ask a question", placeholder="e.g., What can I do to increase profits?")
+
+        if st.button("🔍 Get Answer"):
+            if question:
+                with st.spinner("Thinking..."):
+                    with trace.section("get_insight", "llm"):
+                        answer = ai_helper.get_insight(question, snapshot.sales, snapshot.inventory,
+                                                       snapshot.expenses, profit_data)
+                    st.success(answer)
+
+    # ===================== PAGE: DIAGNOSTICS =====================
+
+    elif page == "🩺 Diagnostics":
+        st.title("🩺 Diagnostics")
+        st.caption("Latency and round trips for Google Sheets and Groq calls since the server started")
+
+        stats = metrics.snapshot()
+
+        if stats:
+            stats_df = pd.DataFrame(stats)
+
+            # Round trips per page action
+            st.subheader("📡 API Calls by Page")
+            by_action = stats_df.groupby("action").agg(
+                calls=("calls", "sum"),
+                errors=("errors", "sum"),
+                total_ms=("total_ms", "sum")
+            ).sort_values("total_ms", ascending=False).reset_index()
+            st.dataframe(by_action, use_container_width=True)
+
+            # Per-operation detail
+            st.subheader("⏱️ Operations")
+            st.dataframe(stats_df.round(2), use_container_width=True)
 
-    with col2:
-        st.markdown("### ⚠️ Needs Attention")
-        if not low_stock_items.empty:
-            for idx, row in low_stock_items.head(3).iterrows():
-                st.warning(f"📦 **{row['Item']}** - Only {int(row['Stock'])} units left")
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Total API Calls", int(stats_df["calls"].sum()))
+            col2.metric("Errors", int(stats_df["errors"].sum()))
+            col3.metric("Rows Transferred", f"{int(stats_df['rows'].sum()):,}")
         else:
-            st.success("✅ All items well-stocked!")
+            st.info("No API calls recorded yet. Use the other pages and come back!")
 
-    # Ask AI
-    st.divider()
-    st.subheader("💬 Ask AI About Your Business")
+        st.subheader("🏪 Quota Usage by Shop")
+        st.dataframe(
+            pd.DataFrame.from_dict(tenants.active_shops(), orient="index"),
+            use_container_width=True
+        )
 
-    question = st.text_input("Ask a question", placeholder="e.g., What can I do to increase profits?")
+        st.subheader("📄 Prometheus Metrics")
+        prometheus_text = metrics.render_prometheus()
+        st.code(prometheus_text, language="text")
 
-    if st.button("🔍 Get Answer"):
-        if question:
-            sales_df = sheets_manager.get_sales()
-            inventory_df = sheets_manager.get_inventory()
-            expenses_df = sheets_manager.get_expenses()
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button(
+                label="📥 Download Metrics",
+                data=prometheus_text,
+                file_name=f"vyapar_metrics_{datetime.date.today()}.txt",
+                mime="text/plain"
+            )
+        with col2:
+            if st.button("🔄 Reset Metrics"):
+                metrics.reset()
+                st.rerun()
 
-            with st.spinner("Thinking..."):
-                answer = ai_helper.get_insight(question, sales_df, inventory_df, expenses_df, profit_data)
-                st.success(answer)
+    # ===================== FOOTER =====================
 
-# ===================== FOOTER =====================
+    st.sidebar.divider()
+    st.sidebar.caption("Made with ❤️ for MSMEs")
+    st.sidebar.caption("Powered by AI")
+finally:
+    # st.rerun() and st.stop() raise, so write paths are traced too
+    profiler.finish(trace)
 
-st.sidebar.divider()
-st.sidebar.caption("Made with ❤️ for MSMEs")
-st.sidebar.caption("Powered by AI")
+profiler.render_sidebar(st, trace)
@@ -0,0 +1,184 @@
+"""
+Scale benchmarks for SheetsManager analytics and AIHelper summarizers
+
+Builds synthetic Sales/Expenses/Inventory sheets shaped like the
+add_sample_data.py patterns, serves them from an in-memory fake Sheets
+backend (no network) and times every analytics method plus the
+read_sheet parse path.
+
+Usage:
+    python benchmark_analytics.py                          # 1k, 100k, 1M rows
+    python benchmark_analytics.py --sizes 1000 100000 --repeat 5
+    python benchmark_analytics.py --json bench.json        # save results
+    python benchmark_analytics.py --compare bench.json     # diff against a saved run
+"""
+import argparse
+import datetime
+import json
+import logging
+import platform
+import random
+import statistics
+import time
+
+import config
+from add_sample_data import PRODUCTS, MONTHLY_EXPENSES, VARIABLE_EXPENSES, generate_synthetic_sales, gst_rate_for
+from ai_helper import AIHelper
+from fake_sheets import FakeSpreadsheets
+from sheets_manager import SheetsManager
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+
+SALES_HEADER = ["Date", "Item", "Quantity", "Cost Price", "Selling Price", "Customer", "GST Rate"]
+INVENTORY_HEADER = ["Item", "Stock", "Cost Price"]
+EXPENSES_HEADER = ["Date", "Category", "Description", "Amount", "Payment Method"]
+
+
+# ===================== SYNTHETIC DATA =====================
+
+def build_sheet_values(size, seed=42, days=730):
+    """Build raw sheet values (header + string rows, as the API returns them)
+
+    Sales has `size` rows, Expenses one row per ten sales, and Inventory
+    one variant of each product per thousand sales.
+    """
+    rng = random.Random(seed)
+    today = datetime.date.today()
+    dates = [(today - datetime.timedelta(days=d)).strftime(config.DATE_FORMAT) for d in range(days)]
+    products = {p[0]: p for p in PRODUCTS}
+
+    sales = [SALES_HEADER]
+    for item, customer, quantity, days_ago in generate_synthetic_sales(size, days, seed):
+        _, cost, selling, _ = products[item]
+        sales.append([dates[days_ago], item, str(quantity), str(cost), str(selling), customer, str(gst_rate_for(item))])
+
+    expense_patterns = MONTHLY_EXPENSES + VARIABLE_EXPENSES
+    expenses = [EXPENSES_HEADER]
+    for _ in range(max(1, size // 10)):
+        category, description, amount, payment, _ = rng.choice(expense_patterns)
+        expenses.append([dates[rng.randrange(days)], category, description, str(amount), payment])
+
+    variants = max(1, size // 1000)
+    inventory = [INVENTORY_HEADER]
+    for variant in range(variants):
+        for item, cost, _, stock in PRODUCTS:
+            name = item if variant == 0 else f"{item} #{variant}"
+            inventory.append([name, str(rng.randint(0, stock)), str(cost)])
+
+    return {
+        config.SHEET_SALES: sales,
+        config.SHEET_EXPENSES: expenses,
+        config.SHEET_INVENTORY: inventory,
+    }
+
+
+# ===================== TIMING =====================
+
+def time_call(func, repeat):
+    """Run func `repeat` times and return (median, best) in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), min(timings)
+
+
+def benchmark_size(size, repeat, seed):
+    """Time every analytics method for one dataset size"""
+    sheets = SheetsManager(sheets=FakeSpreadsheets(build_sheet_values(size, seed)))
+    ai_helper = AIHelper()
+
+    sales_df = sheets.get_sales()
+    inventory_df = sheets.get_inventory()
+    expenses_df = sheets.get_expenses()
+    profit_data = sheets.get_profit()
+
+    cases = [
+        ("read_sheet[Sales]", lambda: sheets.read_sheet(config.SHEET_SALES)),
+        ("get_sales", sheets.get_sales),
+        ("get_expenses", sheets.get_expenses),
+        ("get_inventory", sheets.get_inventory),
+        ("get_total_revenue", sheets.get_total_revenue),
+        ("get_total_expenses", sheets.get_total_expenses),
+        ("get_profit", sheets.get_profit),
+        ("get_low_stock_items", sheets.get_low_stock_items),
+        ("get_top_selling_items", sheets.get_top_selling_items),
+        ("get_top_customers", sheets.get_top_customers),
+        ("ai._summarize_sales", lambda: ai_helper._summarize_sales(sales_df)),
+        ("ai._summarize_inventory", lambda: ai_helper._summarize_inventory(inventory_df)),
+        ("ai._summarize_expenses", lambda: ai_helper._summarize_expenses(expenses_df)),
+        ("ai._summarize_financials", lambda: ai_helper._summarize_financials(profit_data)),
+    ]
+
+    results = []
+    for name, func in cases:
+        median_ms, best_ms = time_call(func, repeat)
+        results.append({"name": name, "rows": size, "median_ms": median_ms, "best_ms": best_ms})
+        print(f"  {name:<28} {size:>10,} {median_ms:>12.2f} {best_ms:>12.2f}")
+    return results
+
+
+# ===================== REPORTING =====================
+
+def compare(results, baseline_path, tolerance):
+    """Print per-case ratios against a saved baseline and return regressions"""
+    with open(baseline_path) as f:
+        baseline = {(r["name"], r["rows"]): r for r in json.load(f)["results"]}
+
+    print(f"\nComparison against {baseline_path} (tolerance {tolerance:.0%})")
+    print(f"  {'case':<28} {'rows':>10} {'base ms':>12} {'now ms':>12} {'ratio':>8}")
+    regressions = []
+    for result in results:
+        base = baseline.get((result["name"], result["rows"]))
+        if not base or base["median_ms"] <= 0:
+            continue
+        ratio = result["median_ms"] / base["median_ms"]
+        flag = " REGRESSION" if ratio > 1 + tolerance else ""
+        print(f"  {result['name']:<28} {result['rows']:>10,} {base['median_ms']:>12.2f} "
+              f"{result['median_ms']:>12.2f} {ratio:>7.2f}x{flag}")
+        if flag:
+            regressions.append(result)
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark Vyapar Vidya analytics at scale")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Sales row counts to benchmark")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case; the median is reported")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for synthetic data")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Compare against a JSON file from a previous run")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown before flagging (0.2 = 20%%)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    # Per-call INFO logs would dominate the timings
+    logging.disable(logging.INFO)
+
+    print(f"  {'case':<28} {'rows':>10} {'median ms':>12} {'best ms':>12}")
+    results = []
+    for size in args.sizes:
+        results.extend(benchmark_size(size, args.repeat, args.seed))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "repeat": args.repeat,
+                "seed": args.seed,
+                "results": results,
+            }, f, indent=2)
+        print(f"\nSaved results to {args.json}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        if regressions:
+            raise SystemExit(f"{len(regressions)} case(s) regressed beyond tolerance")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Chart series and cached Plotly figures
+
+Time series are resampled to daily, weekly or monthly totals once per
+snapshot and long histories are downsampled to a fixed point budget with
+LTTB (Largest-Triangle-Three-Buckets), which keeps peaks and dips visible.
+Built figures are cached as JSON per data version, so a rerun only
+deserializes a small figure instead of rebuilding it with plotly.express.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import config
+
+# Resampling choices offered for trend charts
+FREQUENCIES = {"Daily": "D", "Weekly": "W-MON", "Monthly": "MS"}
+
+
+def resample(df, value_column, freq="D", date_column="Date"):
+    """Sum `value_column` per period; days without rows count as zero"""
+    if df.empty or not {date_column, value_column} <= set(df.columns):
+        return pd.DataFrame(columns=[date_column, value_column])
+    dates = pd.to_datetime(df[date_column], errors="coerce")
+    values = pd.to_numeric(df[value_column], errors="coerce").fillna(0)
+    series = values.groupby(dates).sum()
+    if series.empty:
+        return pd.DataFrame(columns=[date_column, value_column])
+    # Weekly periods are labelled by their Monday, monthly by the 1st
+    series = series.resample(freq, label="left", closed="left").sum()
+    return series.rename_axis(date_column).reset_index(name=value_column)
+
+
+def lttb(x, y, threshold):
+    """Indices of `threshold` points of (x, y) chosen by Largest-Triangle-Three-Buckets
+
+    The first and last points are always kept. x must be ascending.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    selected = np.empty(threshold, dtype=np.intp)
+    selected[0], selected[-1] = 0, n - 1
+    # Interior points split into threshold - 2 buckets
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.intp)
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point) is the third vertex
+        if i + 2 < len(edges):
+            next_x = x[end:edges[i + 2]].mean()
+            next_y = y[end:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        area = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(area.argmax())
+        selected[i + 1] = previous
+    return selected
+
+
+def downsample(df, value_column, max_points=None, date_column="Date"):
+    """Reduce a time series to at most `max_points` rows with LTTB"""
+    max_points = max_points or config.CHART_MAX_POINTS
+    if len(df) <= max_points:
+        return df
+    x = pd.to_datetime(df[date_column]).to_numpy(dtype="datetime64[ns]").astype("int64")
+    return df.iloc[lttb(x, df[value_column].to_numpy(dtype=float), max_points)].reset_index(drop=True)
+
+
+def trend_series(df, value_column, max_points=None, date_column="Date"):
+    """{frequency name: resampled and downsampled frame} for a trend chart"""
+    return {
+        name: downsample(resample(df, value_column, freq, date_column), value_column, max_points, date_column)
+        for name, freq in FREQUENCIES.items()
+    }
+
+
+class ChartCache:
+    """Plotly figure JSON per (data version, chart key), least recently used evicted
+
+    Figures are stored as JSON so cached entries can't be mutated by the
+    pages that render them.
+    """
+
+    def __init__(self, max_entries=None):
+        self.max_entries = max_entries or config.CHART_CACHE_SIZE
+        self._lock = threading.Lock()
+        self._figures = OrderedDict()
+
+    def figure(self, version, key, build):
+        """Cached figure for `key` at `version`, calling build() on a miss"""
+        import plotly.io as pio  # deferred: only chart pages pay the import cost
+
+        cache_key = (version, key)
+        with self._lock:
+            spec = self._figures.get(cache_key)
+            if spec is not None:
+                self._figures.move_to_end(cache_key)
+        if spec is None:
+            spec = build().to_json()
+            with self._lock:
+                self._figures[cache_key] = spec
+                # Entries from older versions are never asked for again
+                for old in [k for k in self._figures if k[0] != version]:
+                    del self._figures[old]
+                while len(self._figures) > self.max_entries:
+                    self._figures.popitem(last=False)
+        return pio.from_json(spec, skip_invalid=True)
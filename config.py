@@ -25,10 +25,109 @@ def get_logger(name):
 GROQ_API_KEY = os.getenv("GROQ_API_KEY", "gsk_YOUR_GROQ_API_KEY_HERE")
 GROQ_MODEL = "llama-3.1-8b-instant"
 
+# LLM backend: "groq", or "stub" for a deterministic local model (offline
+# use and benchmarks) answering after LLM_STUB_LATENCY seconds, replaying
+# replies from the optional LLM_FIXTURES JSON file
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "groq")
+LLM_STUB_LATENCY = float(os.getenv("LLM_STUB_LATENCY", "0"))
+LLM_FIXTURES = os.getenv("LLM_FIXTURES", "")
+
+# Fallback for parse_message: "local" (a quantized GGUF model run on CPU via
+# llama-cpp-python), "stub" (the rule-based parser) or "" for none. If the
+# main provider hasn't answered within LLM_PARSE_BUDGET seconds (or fails),
+# the fallback is started too and the first answer wins
+LLM_PARSE_FALLBACK = os.getenv("LLM_PARSE_FALLBACK", "")
+LLM_PARSE_BUDGET = float(os.getenv("LLM_PARSE_BUDGET", "1.5"))
+LOCAL_LLM_MODEL_PATH = os.getenv("LOCAL_LLM_MODEL_PATH", "")
+LOCAL_LLM_THREADS = int(os.getenv("LOCAL_LLM_THREADS", "0"))  # 0 = all cores
+LOCAL_LLM_CONTEXT = int(os.getenv("LOCAL_LLM_CONTEXT", "2048"))
+
 # Google Sheets Configuration
 GOOGLE_SHEET_ID = os.getenv("GOOGLE_SHEET_ID", "YOUR_GOOGLE_SHEET_ID")
 CREDENTIALS_FILE = os.getenv("CREDENTIALS_FILE", "credentials.json")
 
+# Local copy of the Sheets API discovery document (avoids fetching/parsing
+# it from the client library on every cold start)
+SHEETS_DISCOVERY_FILE = os.getenv("SHEETS_DISCOVERY_FILE", ".cache/sheets_v4_discovery.json")
+
+# Pool of authorized HTTP clients shared by all Streamlit sessions
+SHEETS_HTTP_POOL_SIZE = int(os.getenv("SHEETS_HTTP_POOL_SIZE", "8"))
+SHEETS_HTTP_POOL_TIMEOUT = float(os.getenv("SHEETS_HTTP_POOL_TIMEOUT", "30"))
+SHEETS_HTTP_TIMEOUT = float(os.getenv("SHEETS_HTTP_TIMEOUT", "30"))
+
+# Seconds a sheet read is reused before hitting the API again (0 disables).
+# Writes through SheetsManager invalidate the affected sheet immediately.
+SHEETS_READ_CACHE_TTL = float(os.getenv("SHEETS_READ_CACHE_TTL", "15"))
+
+# Google Sheets API quotas (requests per minute for the service account).
+# Calls beyond these are queued; writes go before reads.
+SHEETS_READS_PER_MINUTE = int(os.getenv("SHEETS_READS_PER_MINUTE", "60"))
+SHEETS_WRITES_PER_MINUTE = int(os.getenv("SHEETS_WRITES_PER_MINUTE", "60"))
+SHEETS_MAX_RETRIES = int(os.getenv("SHEETS_MAX_RETRIES", "5"))
+SHEETS_BACKOFF_BASE = float(os.getenv("SHEETS_BACKOFF_BASE", "1"))
+SHEETS_BACKOFF_MAX = float(os.getenv("SHEETS_BACKOFF_MAX", "32"))
+
+# Under quota pressure, reads wait at most this long before serving the last
+# cached copy of the sheet instead
+SHEETS_READ_MAX_WAIT = float(os.getenv("SHEETS_READ_MAX_WAIT", "2"))
+
+# Write-ahead log: sales and expenses are fsync'd to a local file and
+# acknowledged immediately, then replayed to Google Sheets in the background.
+# Each entry point keeps its logs in its own subdirectory (.wal/app,
+# .wal/quick, .wal/api) so they can run side by side; two copies of the same
+# entry point need separate WAL_DIRs, as opening a log another process holds
+# raises WalLockedError.
+WAL_ENABLED = os.getenv("WAL_ENABLED", "1").lower() in ("1", "true", "yes")
+WAL_DIR = os.getenv("WAL_DIR", ".wal")
+WAL_REPLAY_INTERVAL = float(os.getenv("WAL_REPLAY_INTERVAL", "10"))
+WAL_FLUSH_DELAY = float(os.getenv("WAL_FLUSH_DELAY", "0.5"))
+WAL_COMPACT_EVERY = int(os.getenv("WAL_COMPACT_EVERY", "1000"))
+# Replayed rows carry their WAL entry id in this trailing column, so a send
+# interrupted by a crash or network error is never applied twice
+WAL_ID_COLUMN = "Entry ID"
+
+# Dashboard snapshot: a background thread per shop re-reads the sheets and
+# recomputes dashboard aggregates so page renders never wait on the network
+SNAPSHOT_REFRESH_ENABLED = os.getenv("SNAPSHOT_REFRESH_ENABLED", "1").lower() in ("1", "true", "yes")
+SNAPSHOT_REFRESH_INTERVAL = float(os.getenv("SNAPSHOT_REFRESH_INTERVAL", "30"))
+
+# Maximum rows sent in a single values.append request during bulk loads.
+# Google recommends keeping request payloads under ~2 MB.
+SHEETS_APPEND_BATCH_SIZE = int(os.getenv("SHEETS_APPEND_BATCH_SIZE", "5000"))
+
+# ===================== MULTI-SHOP =====================
+
+def _parse_shops(raw):
+    """Parse "shop_a=SHEET_ID_A,shop_b=SHEET_ID_B" into a dict"""
+    shops = {}
+    for entry in raw.split(","):
+        if "=" in entry:
+            name, sheet_id = entry.split("=", 1)
+            if name.strip() and sheet_id.strip():
+                shops[name.strip()] = sheet_id.strip()
+    return shops
+
+# Shops served by this process; defaults to a single shop on GOOGLE_SHEET_ID
+SHOPS = _parse_shops(os.getenv("VYAPAR_SHOPS", "")) or {"default": GOOGLE_SHEET_ID}
+
+# Idle shop connections are evicted least-recently-used first
+MAX_ACTIVE_SHOPS = int(os.getenv("MAX_ACTIVE_SHOPS", "200"))
+SHOP_IDLE_SECONDS = float(os.getenv("SHOP_IDLE_SECONDS", "1800"))
+
+# Snapshot refresh is paused for shops without a request in the last
+# SNAPSHOT_IDLE_SECONDS, and only the most recently used shops whose
+# refreshes fit in SNAPSHOT_QUOTA_SHARE of SHEETS_READS_PER_MINUTE keep it
+SNAPSHOT_IDLE_SECONDS = float(os.getenv("SNAPSHOT_IDLE_SECONDS", "300"))
+SNAPSHOT_QUOTA_SHARE = float(os.getenv("SNAPSHOT_QUOTA_SHARE", "0.5"))
+# How often idle shops are swept even when no requests arrive
+SHOP_SWEEP_INTERVAL = float(os.getenv("SHOP_SWEEP_INTERVAL", "60"))
+
+# ===================== PROFILING =====================
+
+# Set VYAPAR_PROFILE=1 to record per-section render timings on every rerun
+PROFILE_ENABLED = os.getenv("VYAPAR_PROFILE", "0").lower() in ("1", "true", "yes")
+PROFILE_TRACE_FILE = os.getenv("VYAPAR_PROFILE_FILE", "profile_traces.jsonl")
+
 # ===================== SHEET NAMES =====================
 
 SHEET_SALES = "Sales"
@@ -36,6 +135,8 @@ SHEET_INVENTORY = "Inventory"
 SHEET_EXPENSES = "Expenses"
 SHEET_CUSTOMERS = "Customers"
 SHEET_SUMMARY = "Summary"
+# Append-only log of stock changes; Inventory.Stock holds the opening balance
+SHEET_STOCK_MOVEMENTS = "Stock Movements"
 
 # ===================== BUSINESS SETTINGS =====================
 
@@ -50,6 +151,39 @@ GST_RATES = {
 
 DEFAULT_GST_RATE = 18  # Default GST rate
 
+# Reorder planning: demand is averaged over the trailing window; items are
+# flagged when stock falls to lead-time demand plus safety stock
+FORECAST_WINDOW_DAYS = int(os.getenv("FORECAST_WINDOW_DAYS", "30"))
+REORDER_LEAD_TIME_DAYS = float(os.getenv("REORDER_LEAD_TIME_DAYS", "7"))
+REORDER_SAFETY_Z = float(os.getenv("REORDER_SAFETY_Z", "1.65"))  # ~95% service level
+REORDER_TARGET_COVER_DAYS = float(os.getenv("REORDER_TARGET_COVER_DAYS", "30"))
+
+# Leaderboards: entries kept per all-time top list, and the windows (days)
+# tracked for "last N days" rankings
+TOPK_CAPACITY = int(os.getenv("TOPK_CAPACITY", "50"))
+TOPK_WINDOWS = (7, 30)
+
+# Fuzzy search: similarity (0-1) needed to suggest an existing item/customer
+# for a new name, and to list a value in search results
+SEARCH_MATCH_THRESHOLD = float(os.getenv("SEARCH_MATCH_THRESHOLD", "0.75"))
+SEARCH_MIN_SCORE = float(os.getenv("SEARCH_MIN_SCORE", "0.5"))
+
+# Report exports: rows serialized per chunk, and how large an export may grow
+# in memory before it is spooled to a temporary file
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "5000"))
+EXPORT_SPOOL_BYTES = int(os.getenv("EXPORT_SPOOL_BYTES", str(8 * 1024 * 1024)))
+
+# Charts: points sent to the browser per series, and built figures kept
+CHART_MAX_POINTS = int(os.getenv("CHART_MAX_POINTS", "500"))
+CHART_CACHE_SIZE = int(os.getenv("CHART_CACHE_SIZE", "64"))
+
+# HTTP API (api_server.py): writes arriving within the coalescing window are
+# sent to Sheets as one batch of at most API_MAX_BATCH rows
+API_HOST = os.getenv("API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("API_PORT", "8000"))
+API_COALESCE_MS = float(os.getenv("API_COALESCE_MS", "25"))
+API_MAX_BATCH = int(os.getenv("API_MAX_BATCH", "200"))
+
 # Currency symbol
 CURRENCY = "₹"
 
@@ -62,9 +196,12 @@ def validate_config():
     """Validate configuration and return warnings"""
     warnings = []
 
-    if GROQ_API_KEY == "gsk_YOUR_GROQ_API_KEY_HERE":
+    if LLM_PROVIDER == "groq" and GROQ_API_KEY == "gsk_YOUR_GROQ_API_KEY_HERE":
         warnings.append("GROQ_API_KEY not set - using placeholder")
 
+    if LLM_PARSE_FALLBACK == "local" and not os.path.exists(LOCAL_LLM_MODEL_PATH):
+        warnings.append("LOCAL_LLM_MODEL_PATH not found - local parse fallback disabled")
+
     if GOOGLE_SHEET_ID == "YOUR_GOOGLE_SHEET_ID":
         warnings.append("GOOGLE_SHEET_ID not set - using placeholder")
 
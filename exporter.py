@@ -0,0 +1,151 @@
+"""
+Chunked report export to CSV, Parquet and Excel
+
+Reports are only serialized when asked for. Rows are filtered to the
+requested date range and written a chunk at a time into a spooled temporary
+file, so a multi-year export never holds a second full copy of the data (or
+its CSV text) in memory. Parquet needs pyarrow and Excel needs openpyxl;
+formats whose library isn't installed are simply not offered.
+"""
+import datetime
+import importlib.util
+import io
+import tempfile
+from dataclasses import dataclass
+
+import pandas as pd
+
+import config
+
+logger = config.get_logger(__name__)
+
+# Excel's row limit per worksheet (including the header)
+XLSX_MAX_ROWS = 1_048_576
+
+
+@dataclass(frozen=True)
+class ExportFormat:
+    extension: str
+    mime: str
+    module: str = None  # optional dependency needed to write it
+
+
+EXPORT_FORMATS = {
+    "CSV": ExportFormat("csv", "text/csv"),
+    "Parquet": ExportFormat("parquet", "application/vnd.apache.parquet", "pyarrow"),
+    "Excel": ExportFormat("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "openpyxl"),
+}
+
+
+def available_formats():
+    """Names of the export formats whose writer library is installed"""
+    return [name for name, fmt in EXPORT_FORMATS.items()
+            if fmt.module is None or importlib.util.find_spec(fmt.module) is not None]
+
+
+def file_name(report, fmt, start=None, end=None):
+    suffix = f"{start}_to_{end}" if start and end else str(datetime.date.today())
+    return f"{report}_report_{suffix}.{EXPORT_FORMATS[fmt].extension}"
+
+
+def iter_chunks(df, start=None, end=None, chunk_rows=None):
+    """Yield slices of `df` with Date within [start, end], chunk_rows at a time
+
+    Rows without a parseable Date are dropped when a range is given; frames
+    without a Date column are exported whole.
+    """
+    chunk_rows = chunk_rows or config.EXPORT_CHUNK_ROWS
+    by_date = (start is not None or end is not None) and "Date" in df.columns
+    low = pd.Timestamp(start) if start is not None else None
+    high = pd.Timestamp(end) if end is not None else None
+    for offset in range(0, len(df), chunk_rows):
+        chunk = df.iloc[offset:offset + chunk_rows]
+        if by_date:
+            dates = pd.to_datetime(chunk["Date"], format=config.DATE_FORMAT, errors="coerce")
+            mask = dates.notna()
+            if low is not None:
+                mask &= dates >= low
+            if high is not None:
+                mask &= dates <= high
+            chunk = chunk[mask]
+        if not chunk.empty:
+            yield chunk
+
+
+def export(df, fmt, start=None, end=None, chunk_rows=None):
+    """Write `df` (optionally date-filtered) in format `fmt`
+
+    Returns (file object positioned at the start, rows written). The file is
+    spooled to disk once it outgrows config.EXPORT_SPOOL_BYTES.
+    """
+    out = tempfile.SpooledTemporaryFile(max_size=config.EXPORT_SPOOL_BYTES)
+    chunks = iter_chunks(df, start, end, chunk_rows)
+    writer = {"CSV": _write_csv, "Parquet": _write_parquet, "Excel": _write_xlsx}[fmt]
+    rows = writer(chunks, list(df.columns), out)
+    out.seek(0)
+    logger.info(f"Exported {rows} rows as {fmt}")
+    return out, rows
+
+
+def _write_csv(chunks, columns, out):
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+    pd.DataFrame(columns=columns).to_csv(text, index=False)
+    rows = 0
+    for chunk in chunks:
+        chunk.to_csv(text, header=False, index=False)
+        rows += len(chunk)
+    text.flush()
+    text.detach()  # leave `out` open for the caller
+    return rows
+
+
+def _arrow_ready(chunk):
+    """Sheet text columns may mix numbers and blanks; store them as strings"""
+    text_columns = chunk.select_dtypes(include="object").columns
+    if len(text_columns):
+        chunk = chunk.astype({column: str for column in text_columns})
+    return chunk
+
+
+def _write_parquet(chunks, columns, out):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    rows = 0
+    for chunk in chunks:
+        chunk = _arrow_ready(chunk)
+        if writer is None:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            writer = pq.ParquetWriter(out, table.schema)
+        else:
+            table = pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False)
+        writer.write_table(table)
+        rows += len(chunk)
+    if writer is None:
+        pq.write_table(pa.table({column: pa.array([], pa.string()) for column in columns}), out)
+    else:
+        writer.close()
+    return rows
+
+
+def _write_xlsx(chunks, columns, out):
+    from openpyxl import Workbook
+
+    # Write-only workbooks stream rows to disk instead of building cells in memory
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Report")
+    sheet.append(columns)
+    sheet_rows = 1
+    rows = 0
+    for chunk in chunks:
+        for values in chunk.itertuples(index=False, name=None):
+            if sheet_rows >= XLSX_MAX_ROWS:
+                sheet = workbook.create_sheet(f"Report {len(workbook.worksheets) + 1}")
+                sheet.append(columns)
+                sheet_rows = 1
+            sheet.append([None if pd.isna(v) else v for v in values])
+            sheet_rows += 1
+        rows += len(chunk)
+    workbook.save(out)
+    return rows
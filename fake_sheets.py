@@ -0,0 +1,141 @@
+"""
+In-memory stand-in for the Google Sheets API used by benchmarks and load tests
+"""
+import re
+import threading
+import time
+import config
+
+_CELL_RE = re.compile(r"^([A-Z]+)(\d+)$")
+
+
+def _column_index(letters):
+    """Convert a column letter (A, B, ..., AA) to a zero-based index"""
+    index = 0
+    for ch in letters:
+        index = index * 26 + (ord(ch) - ord("A") + 1)
+    return index - 1
+
+
+class _Request:
+    """Mimics a googleapiclient HttpRequest: work happens on execute()"""
+
+    def __init__(self, backend, method, func):
+        self._backend = backend
+        self._method = method
+        self._func = func
+
+    def execute(self, http=None, num_retries=0):
+        return self._backend._run(self._method, self._func)
+
+
+class _Values:
+    """Mimics spreadsheets().values()"""
+
+    def __init__(self, backend):
+        self._backend = backend
+
+    def get(self, spreadsheetId, range, **kwargs):
+        return _Request(self._backend, "get", lambda: self._backend._get(spreadsheetId, range))
+
+    def batchGet(self, spreadsheetId, ranges, **kwargs):
+        return _Request(self._backend, "batchGet", lambda: {
+            "spreadsheetId": spreadsheetId,
+            "valueRanges": [self._backend._get(spreadsheetId, r) for r in ranges],
+        })
+
+    def append(self, spreadsheetId, range, body, **kwargs):
+        return _Request(self._backend, "append",
+                        lambda: self._backend._append(spreadsheetId, range, body.get("values", [])))
+
+    def update(self, spreadsheetId, range, body, **kwargs):
+        return _Request(self._backend, "update",
+                        lambda: self._backend._update(spreadsheetId, range, body.get("values", [])))
+
+
+class FakeSpreadsheets:
+    """Thread-safe in-memory spreadsheets() resource
+
+    Sheets are stored as lists of rows (header row first) per spreadsheet ID.
+    Values are stored as strings, like the real API returns them. An optional
+    per-call latency simulates network round trips, and every call is counted
+    so callers can measure API-call amplification.
+    """
+
+    def __init__(self, data=None, latency=0.0, spreadsheet_id=None):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.latency = latency
+        self.calls = {}
+        self._books = {}
+        if data:
+            self.load(data, spreadsheet_id)
+
+    def load(self, data, spreadsheet_id=None):
+        """Load {sheet_name: [header, row, ...]} into a spreadsheet"""
+        book = self._books.setdefault(spreadsheet_id or config.GOOGLE_SHEET_ID, {})
+        with self._lock:
+            for sheet_name, rows in data.items():
+                book[sheet_name] = [[str(v) for v in row] for row in rows]
+
+    def values(self):
+        return _Values(self)
+
+    def batchUpdate(self, spreadsheetId, body, **kwargs):
+        return _Request(self, "batchUpdate", lambda: self._batch_update(spreadsheetId, body.get("requests", [])))
+
+    def thread_calls(self):
+        """Number of API calls made by the current thread"""
+        return getattr(self._local, "calls", 0)
+
+    # ===================== INTERNALS =====================
+
+    def _run(self, method, func):
+        if self.latency:
+            time.sleep(self.latency)
+        self._local.calls = getattr(self._local, "calls", 0) + 1
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+            return func()
+
+    def _sheet(self, spreadsheet_id, range_name):
+        sheet_name = range_name.split("!")[0]
+        if sheet_name.startswith("'"):
+            sheet_name = sheet_name[1:-1].replace("''", "'")
+        return sheet_name, self._books.setdefault(spreadsheet_id, {}).setdefault(sheet_name, [])
+
+    def _get(self, spreadsheet_id, range_name):
+        sheet_name, rows = self._sheet(spreadsheet_id, range_name)
+        # Return a shallow copy so callers can't mutate the store
+        result = {"range": sheet_name}
+        if rows:
+            result["values"] = list(rows)
+        return result
+
+    def _append(self, spreadsheet_id, range_name, values):
+        sheet_name, rows = self._sheet(spreadsheet_id, range_name)
+        rows.extend([str(v) for v in row] for row in values)
+        return {"updates": {"updatedRange": sheet_name, "updatedRows": len(values)}}
+
+    def _batch_update(self, spreadsheet_id, requests):
+        book = self._books.setdefault(spreadsheet_id, {})
+        for request in requests:
+            if "addSheet" in request:
+                book.setdefault(request["addSheet"]["properties"]["title"], [])
+        return {"spreadsheetId": spreadsheet_id, "replies": [{} for _ in requests]}
+
+    def _update(self, spreadsheet_id, range_name, values):
+        sheet_name, rows = self._sheet(spreadsheet_id, range_name)
+        cell = range_name.split("!")[1] if "!" in range_name else "A1"
+        match = _CELL_RE.match(cell.split(":")[0])
+        col, row_idx = _column_index(match.group(1)), int(match.group(2)) - 1
+
+        for r_offset, row_values in enumerate(values):
+            while len(rows) <= row_idx + r_offset:
+                rows.append([])
+            row = rows[row_idx + r_offset]
+            for c_offset, value in enumerate(row_values):
+                while len(row) <= col + c_offset:
+                    row.append("")
+                row[col + c_offset] = str(value)
+        return {"updatedRange": range_name, "updatedCells": sum(len(r) for r in values)}
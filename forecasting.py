@@ -0,0 +1,137 @@
+"""
+Sales velocity, days of cover and reorder points for every item at once
+
+Units sold are kept in an items x days NumPy matrix covering the trailing
+forecast window. Velocity and demand variability are row-wise reductions,
+and the reorder plan is computed for all items in one vectorised pass.
+update() only folds in rows added to the sheet since the last call (and
+rebuilds if earlier rows changed); the window rolls forward by shifting
+columns.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+import config
+from row_tracker import RowTracker
+
+
+class DemandForecast:
+    """Trailing daily demand per item and the reorder plan derived from it"""
+
+    def __init__(self, window_days=None, lead_time_days=None, safety_z=None, target_cover_days=None, today=None):
+        self.window_days = window_days or config.FORECAST_WINDOW_DAYS
+        self.lead_time_days = lead_time_days or config.REORDER_LEAD_TIME_DAYS
+        self.safety_z = config.REORDER_SAFETY_Z if safety_z is None else safety_z
+        self.target_cover_days = target_cover_days or config.REORDER_TARGET_COVER_DAYS
+        self.end = np.datetime64(today or pd.Timestamp.today().date(), "D")
+        self._lock = threading.Lock()
+        self._tracker = RowTracker()  # Sales rows folded in so far
+        self._keys = pd.Index([], dtype=object)  # lower-cased item per matrix row
+        self._units = np.zeros((0, self.window_days))
+
+    @property
+    def start(self):
+        return self.end - (self.window_days - 1)
+
+    # ===================== UPDATES =====================
+
+    def update(self, sales_df, today=None):
+        """Fold in Sales rows appended to the sheet since the last update
+
+        Rows still pending in the WAL are left for a later update. Rebuilds
+        from scratch if rows already folded in were edited or deleted.
+        """
+        with self._lock:
+            self._advance(np.datetime64(today or pd.Timestamp.today().date(), "D"))
+            rebuild, new_rows = self._tracker.split(sales_df)
+            if rebuild:
+                self._keys = pd.Index([], dtype=object)
+                self._units = np.zeros((0, self.window_days))
+            self._add(new_rows)
+            self._tracker.commit()
+        return self
+
+    @property
+    def rows(self):
+        """Sales rows folded in so far"""
+        return self._tracker.rows
+
+    def _advance(self, today):
+        """Roll the window forward so it ends on `today`"""
+        shift = int((today - self.end).astype(int))
+        if shift <= 0:
+            return
+        if shift >= self.window_days:
+            self._units[:] = 0
+        else:
+            self._units[:, :-shift] = self._units[:, shift:]
+            self._units[:, -shift:] = 0
+        self.end = today
+
+    def _add(self, sales_df):
+        if sales_df.empty or not {"Date", "Item", "Quantity"} <= set(sales_df.columns):
+            return
+        dates = pd.to_datetime(sales_df["Date"], errors="coerce").to_numpy(dtype="datetime64[D]")
+        offsets = (dates - self.start).astype(int)
+        quantity = pd.to_numeric(sales_df["Quantity"], errors="coerce").fillna(0).to_numpy(dtype=float)
+        in_window = ~np.isnat(dates) & (offsets >= 0) & (offsets < self.window_days)
+        if not in_window.any():
+            return
+
+        keys = sales_df["Item"].astype(str).str.lower().to_numpy()[in_window]
+        new = pd.Index(keys).unique().difference(self._keys)
+        if len(new):
+            self._keys = self._keys.append(new)
+            self._units = np.vstack([self._units, np.zeros((len(new), self.window_days))])
+
+        rows = self._keys.get_indexer(keys)
+        np.add.at(self._units, (rows, offsets[in_window]), quantity[in_window])
+
+    # ===================== PLAN =====================
+
+    def plan(self, inventory_df):
+        """Reorder plan for every inventory item
+
+        Reorder point = expected demand over the lead time plus safety stock
+        (z * daily demand std * sqrt(lead time)). Items at or below it are
+        flagged; the suggested order tops stock up to the target cover.
+        """
+        if inventory_df.empty or not {"Item", "Stock"} <= set(inventory_df.columns):
+            return pd.DataFrame()
+
+        with self._lock:
+            units = self._units.copy()
+            keys = self._keys
+
+        # Append a zero row for items without sales in the window
+        velocity = np.append(units.mean(axis=1), 0.0)
+        demand_std = np.append(units.std(axis=1), 0.0)
+        idx = keys.get_indexer(inventory_df["Item"].astype(str).str.lower())
+        item_velocity = velocity[idx]  # -1 picks the zero row
+        item_std = demand_std[idx]
+        stock = inventory_df["Stock"].to_numpy(dtype=float)
+
+        reorder_point = np.ceil(
+            item_velocity * self.lead_time_days + self.safety_z * item_std * np.sqrt(self.lead_time_days)
+        )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            days_of_cover = np.where(item_velocity > 0, np.maximum(stock, 0) / item_velocity, np.inf)
+        reorder_qty = np.maximum(np.ceil(item_velocity * self.target_cover_days - stock), 0)
+        status = np.select(
+            [stock <= 0, stock <= reorder_point],
+            ["🔴 Out of stock", "🟠 Reorder"],
+            default="🟢 OK"
+        )
+
+        plan = pd.DataFrame({
+            "Item": inventory_df["Item"].to_numpy(),
+            "Stock": stock,
+            "Daily Sales": item_velocity.round(2),
+            "Days of Cover": np.round(days_of_cover, 1),
+            "Reorder Point": reorder_point,
+            "Reorder Qty": np.where(stock <= reorder_point, reorder_qty, 0),
+            "Status": status,
+        })
+        return plan.sort_values("Days of Cover", kind="stable").reset_index(drop=True)
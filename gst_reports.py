@@ -0,0 +1,153 @@
+"""
+GST summaries by month, rate slab and customer
+
+Sales rows are folded into daily rollups (taxable value, tax and invoice
+count per day and GST rate) plus monthly per-customer rollups. Monthly
+GSTR-1 / GSTR-3B style summaries are then group-bys over a few hundred
+rollup rows instead of the full Sales history. update() only rolls up rows
+added to the sheet since the last call, and rebuilds if earlier rows changed.
+
+All sales are treated as intra-state supplies: the tax is split equally
+into CGST and SGST (the sheet records no place of supply for IGST).
+"""
+import threading
+
+import pandas as pd
+
+import config
+from row_tracker import RowTracker
+
+ROLLUP_COLUMNS = ["Taxable Value", "Tax", "Invoices"]
+
+
+def rate_label(rate):
+    """Slab name from config.GST_RATES for a rate ("18%"), else the rate itself"""
+    for label, value in config.GST_RATES.items():
+        if value == rate:
+            return label
+    return f"{rate:g}%"
+
+
+def _with_split(df):
+    """Add CGST/SGST halves and the invoice value to a rollup frame"""
+    df["CGST"] = (df["Tax"] / 2).round(2)
+    df["SGST"] = (df["Tax"] - df["CGST"]).round(2)
+    df["Tax"] = df["Tax"].round(2)
+    df["Taxable Value"] = df["Taxable Value"].round(2)
+    df["Invoice Value"] = df["Taxable Value"] + df["Tax"]
+    df["Invoices"] = df["Invoices"].astype(int)
+    return df
+
+
+class GstLedger:
+    """Incremental daily and per-customer GST rollups of the Sales sheet"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tracker = RowTracker()  # Sales rows folded in so far
+        self._reset()
+
+    def _reset(self):
+        self._daily = pd.DataFrame(columns=ROLLUP_COLUMNS, dtype=float)
+        self._customers = pd.DataFrame(columns=ROLLUP_COLUMNS, dtype=float)
+        self._monthly = None
+
+    # ===================== UPDATES =====================
+
+    def update(self, sales_df):
+        """Fold in Sales rows appended to the sheet since the last update
+
+        Rows still pending in the WAL are left for a later update. Rebuilds
+        from scratch if rows already folded in were edited or deleted.
+        """
+        with self._lock:
+            rebuild, new_rows = self._tracker.split(sales_df)
+            if rebuild:
+                self._reset()
+            if not new_rows.empty:
+                self._add(new_rows)
+                self._monthly = None
+            self._tracker.commit()
+        return self
+
+    @property
+    def rows(self):
+        """Sales rows folded in so far"""
+        return self._tracker.rows
+
+    def _add(self, sales_df):
+        if not {"Date", "Quantity", "Selling Price"} <= set(sales_df.columns):
+            return
+        dates = pd.to_datetime(sales_df["Date"], errors="coerce")
+        taxable = sales_df["Selling Price"] * sales_df["Quantity"]
+        rate = sales_df["GST Rate"] if "GST Rate" in sales_df.columns else pd.Series(0.0, index=sales_df.index)
+        tax = sales_df["GST Amount"] if "GST Amount" in sales_df.columns else taxable * rate / 100
+        frame = pd.DataFrame({
+            "Day": dates.dt.normalize(),
+            "Month": dates.dt.to_period("M"),
+            "Rate": rate.astype(float),
+            "Customer": sales_df["Customer"].fillna("") if "Customer" in sales_df.columns else "",
+            "Taxable Value": taxable,
+            "Tax": tax,
+            "Invoices": 1.0,
+        }).dropna(subset=["Day"])
+        if frame.empty:
+            return
+
+        daily = frame.groupby(["Day", "Rate"])[ROLLUP_COLUMNS].sum()
+        self._daily = daily if self._daily.empty else self._daily.add(daily, fill_value=0)
+        customers = frame.groupby(["Month", "Customer", "Rate"])[ROLLUP_COLUMNS].sum()
+        self._customers = customers if self._customers.empty else self._customers.add(customers, fill_value=0)
+
+    # ===================== SUMMARIES =====================
+
+    def monthly(self):
+        """Taxable value, CGST, SGST and invoices per month and rate slab (GSTR-1 style)"""
+        with self._lock:
+            if self._monthly is None:
+                if self._daily.empty:
+                    self._monthly = pd.DataFrame()
+                else:
+                    daily = self._daily.reset_index()
+                    daily["Month"] = daily["Day"].dt.to_period("M")
+                    monthly = daily.groupby(["Month", "Rate"])[ROLLUP_COLUMNS].sum().reset_index()
+                    monthly["Slab"] = monthly["Rate"].map(rate_label)
+                    self._monthly = _with_split(monthly)
+            return self._monthly
+
+    def months(self):
+        """Months with sales, newest first"""
+        monthly = self.monthly()
+        return [] if monthly.empty else sorted(monthly["Month"].unique(), reverse=True)
+
+    def summary(self, month):
+        """GSTR-3B style totals for one month (a pd.Period or "YYYY-MM")"""
+        monthly = self.monthly()
+        rows = monthly[monthly["Month"] == pd.Period(month, "M")] if not monthly.empty else monthly
+        totals = {column: float(rows[column].sum()) if not rows.empty else 0.0
+                  for column in ("Taxable Value", "CGST", "SGST", "Tax", "Invoice Value")}
+        totals["Invoices"] = int(rows["Invoices"].sum()) if not rows.empty else 0
+        return totals
+
+    def by_customer(self, month=None):
+        """Taxable value and tax per customer and rate, optionally for one month"""
+        with self._lock:
+            customers = self._customers.reset_index()
+        if customers.empty:
+            return pd.DataFrame()
+        if month is not None:
+            customers = customers[customers["Month"] == pd.Period(month, "M")]
+        customers["Slab"] = customers["Rate"].map(rate_label)
+        return _with_split(customers).sort_values("Taxable Value", ascending=False, kind="stable")
+
+    def daily(self, start=None, end=None):
+        """Daily rollups (Day, Rate) between two dates, inclusive"""
+        with self._lock:
+            daily = self._daily.reset_index()
+        if daily.empty:
+            return daily
+        if start is not None:
+            daily = daily[daily["Day"] >= pd.Timestamp(start)]
+        if end is not None:
+            daily = daily[daily["Day"] <= pd.Timestamp(end)]
+        return _with_split(daily)
@@ -0,0 +1,80 @@
+"""
+Thread-safe pool of authorized HTTP clients for the Google Sheets API
+
+httplib2.Http objects are not thread-safe, so a single googleapiclient
+service shared through @st.cache_resource can corrupt requests when several
+Streamlit sessions run at once. The pool hands each request its own
+AuthorizedHttp for the duration of the call. Clients are reused LIFO so the
+most recently used (warm, keep-alive) connection is picked first and TLS
+handshakes are amortised across calls and sessions.
+"""
+import queue
+import threading
+from contextlib import contextmanager
+
+import config
+
+logger = config.get_logger(__name__)
+
+
+class PoolExhaustedError(RuntimeError):
+    """Raised when no HTTP client becomes free within the lease timeout"""
+
+
+class HttpClientPool:
+    """Bounded pool of HTTP clients created on demand by `factory`"""
+
+    def __init__(self, factory, size=None, timeout=None):
+        self._factory = factory
+        self.size = size or config.SHEETS_HTTP_POOL_SIZE
+        self.timeout = timeout if timeout is not None else config.SHEETS_HTTP_POOL_TIMEOUT
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self.created = 0
+
+    @contextmanager
+    def lease(self):
+        """Borrow a client for one request"""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolExhaustedError(f"No HTTP client free after {self.timeout}s (pool size {self.size})")
+        try:
+            try:
+                client = self._idle.get_nowait()
+            except queue.Empty:
+                client = self._factory()
+                with self._lock:
+                    self.created += 1
+                logger.info(f"Created pooled HTTP client {self.created}/{self.size}")
+
+            healthy = True
+            try:
+                yield client
+            except (OSError, ConnectionError):
+                # Transport-level failure: the connection may be half-closed
+                healthy = False
+                raise
+            finally:
+                if healthy:
+                    self._idle.put(client)
+                else:
+                    with self._lock:
+                        self.created -= 1
+        finally:
+            self._slots.release()
+
+    def stats(self):
+        return {"size": self.size, "created": self.created, "idle": self._idle.qsize()}
+
+
+def authorized_http_factory(credentials, timeout=None):
+    """Return a factory creating keep-alive AuthorizedHttp clients"""
+    import google_auth_httplib2
+    import httplib2
+
+    timeout = timeout or config.SHEETS_HTTP_TIMEOUT
+
+    def factory():
+        return google_auth_httplib2.AuthorizedHttp(credentials, http=httplib2.Http(timeout=timeout))
+
+    return factory
@@ -0,0 +1,331 @@
+"""
+LLM backends used by AIHelper
+
+A provider turns one prompt into one reply via complete(). GroqProvider
+calls the Groq API. StubProvider answers locally and deterministically: it
+replays recorded replies from a fixtures file when one matches, and
+otherwise applies simple rules that follow the parse_message JSON schema.
+Its latency is configurable, so AI paths can be benchmarked and run
+offline with no network. Pick the backend with config.LLM_PROVIDER.
+
+LocalLlamaProvider runs a small quantized model on CPU (llama-cpp-python,
+optional) and RacingProvider pairs a main provider with such a fallback
+under a latency budget; AIHelper uses it for parse_message when
+config.LLM_PARSE_FALLBACK is set.
+"""
+import abc
+import hashlib
+import importlib.util
+import os
+import json
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import config
+
+logger = config.get_logger(__name__)
+
+
+class LLMProvider(abc.ABC):
+    """Interface for a chat model: one prompt in, reply text out"""
+
+    name = "llm"
+
+    @abc.abstractmethod
+    def complete(self, prompt, temperature=0):
+        """Reply text for a single-turn prompt"""
+
+
+# ===================== GROQ =====================
+
+class GroqProvider(LLMProvider):
+    """Groq chat completions; the client is created on first use"""
+
+    name = "groq"
+
+    def __init__(self, client=None, model=None):
+        self._client = client
+        self._client_lock = threading.Lock()
+        self.model = model or config.GROQ_MODEL
+
+    @property
+    def client(self):
+        """Groq client, created (and groq imported) on first access"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    try:
+                        from groq import Groq
+                        self._client = Groq(api_key=config.GROQ_API_KEY)
+                        logger.info("Groq AI client initialized successfully")
+                    except Exception as e:
+                        logger.error(f"Failed to initialize Groq client: {e}")
+                        raise
+        return self._client
+
+    def complete(self, prompt, temperature=0):
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature
+        )
+        return response.choices[0].message.content.strip()
+
+
+# ===================== LOCAL (llama.cpp) =====================
+
+class LocalLlamaProvider(LLMProvider):
+    """Quantized GGUF model run on CPU via llama-cpp-python
+
+    The model is loaded on first use (or by load()); calls are serialised
+    because a llama.cpp context is not thread-safe.
+    """
+
+    name = "local"
+
+    def __init__(self, model_path=None, threads=None, context=None, max_tokens=256):
+        self.model_path = model_path or config.LOCAL_LLM_MODEL_PATH
+        self.threads = threads or config.LOCAL_LLM_THREADS or os.cpu_count()
+        self.context = context or config.LOCAL_LLM_CONTEXT
+        self.max_tokens = max_tokens
+        self._model = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Load the model (and import llama_cpp) if not loaded yet"""
+        with self._lock:
+            if self._model is None:
+                from llama_cpp import Llama
+                started = time.perf_counter()
+                self._model = Llama(model_path=self.model_path, n_ctx=self.context,
+                                    n_threads=self.threads, verbose=False)
+                logger.info(f"Loaded local model {os.path.basename(self.model_path)} "
+                            f"in {time.perf_counter() - started:.1f}s")
+        return self._model
+
+    def complete(self, prompt, temperature=0):
+        model = self.load()
+        with self._lock:
+            response = model.create_chat_completion(
+                messages=[{"role": "user", "content": prompt}],
+                temperature=temperature,
+                max_tokens=self.max_tokens,
+            )
+        return response["choices"][0]["message"]["content"].strip()
+
+
+# ===================== RACING =====================
+
+class RacingProvider(LLMProvider):
+    """Main provider with a fallback raced against it after a latency budget
+
+    The main provider is asked first. If it fails, or hasn't answered within
+    `budget` seconds, the fallback is started as well and whichever answers
+    first (without an error) is returned; the slower call is left to finish
+    in the background. Each side has its own executor, and the fallback runs
+    one call at a time: while one is still running no new fallback is
+    started, so a slow local model can't queue up work or hold up main
+    calls. `wins` counts the answers taken from each provider.
+    """
+
+    def __init__(self, primary, fallback, budget=None, primary_workers=8):
+        self.primary = primary
+        self.fallback = fallback
+        self.budget = config.LLM_PARSE_BUDGET if budget is None else budget
+        self.name = f"{primary.name}+{fallback.name}"
+        self.wins = {primary.name: 0, fallback.name: 0}
+        self._lock = threading.Lock()
+        self._primary_pool = ThreadPoolExecutor(max_workers=primary_workers, thread_name_prefix="llm-primary")
+        self._fallback_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm-fallback")
+        self._fallback_call = None  # latest fallback future
+        if hasattr(fallback, "load"):
+            # Warm the local model so the first race doesn't pay for loading it
+            self._fallback_call = self._fallback_pool.submit(self._load_fallback)
+
+    def _load_fallback(self):
+        try:
+            self.fallback.load()
+        except Exception as e:
+            logger.warning(f"{self.fallback.name} fallback unavailable: {e}")
+
+    def _start_fallback(self, prompt, temperature):
+        """Submit a fallback call, or return None while the previous one is running"""
+        with self._lock:
+            if self._fallback_call is not None and not self._fallback_call.done():
+                return None
+            self._fallback_call = self._fallback_pool.submit(self.fallback.complete, prompt, temperature)
+            return self._fallback_call
+
+    def complete(self, prompt, temperature=0):
+        primary = self._primary_pool.submit(self.primary.complete, prompt, temperature)
+        done, _ = wait([primary], timeout=self.budget)
+        if done and primary.exception() is None:
+            return self._won(self.primary, primary.result())
+
+        fallback = self._start_fallback(prompt, temperature)
+        if fallback is None:
+            logger.info(f"{self.fallback.name} busy, waiting for {self.primary.name}")
+            return self._won(self.primary, primary.result())
+        if done:
+            logger.warning(f"{self.primary.name} failed ({primary.exception()}), using {self.fallback.name}")
+        else:
+            logger.info(f"{self.primary.name} over {self.budget}s budget, racing {self.fallback.name}")
+
+        pending = {primary: self.primary} if not done else {}
+        pending[fallback] = self.fallback
+        error = None
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                provider = pending.pop(future)
+                if future.exception() is None:
+                    return self._won(provider, future.result())
+                error = future.exception()
+                logger.warning(f"{provider.name} failed: {error}")
+        raise error
+
+    def _won(self, provider, reply):
+        with self._lock:
+            self.wins[provider.name] += 1
+        return reply
+
+
+# ===================== STUB =====================
+
+# parse_message puts the user's text on the line after "Message:"
+_MESSAGE = re.compile(r'Message:\s*"(.*?)"', re.S)
+_AMOUNT = re.compile(r"(?:₹|rs\.?|inr)\s*([\d,]+(?:\.\d+)?)", re.I)
+_GST = re.compile(r"(\d+(?:\.\d+)?)\s*%\s*gst|gst\s*(?:of|@)?\s*(\d+(?:\.\d+)?)\s*%", re.I)
+_QUANTITY = re.compile(r"(?<![₹\d.,])\b(\d+)\b(?!\s*%)")
+_SALE_WORDS = ("sold", "sale", "bought", "sell")
+_STOCK_WORDS = ("received", "delivery", "purchased", "restock", "stock")
+_EXPENSE_WORDS = ("paid", "expense", "spent", "bill", "pay")
+_QUESTION = re.compile(r"^\s*(how|what|which|when|who|why|show|tell|list|is|are|do|does|did|can)\b|\?\s*$", re.I)
+
+PARSE_FIELDS = ["intent", "item", "quantity", "selling_price", "cost_price", "customer", "gst_rate",
+                "category", "description", "amount", "payment_method"]
+
+
+def fixture_key(prompt):
+    """Key for a prompt in a fixtures file (SHA-256 of the prompt text)"""
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+def _number(text):
+    value = float(text.replace(",", ""))
+    return int(value) if value.is_integer() else value
+
+
+def parse_rules(text):
+    """Rule-based parse of a business message into the parse_message schema"""
+    lowered = text.lower()
+    result = dict.fromkeys(PARSE_FIELDS)
+    amount = _AMOUNT.search(text)
+    price = _number(amount.group(1)) if amount else None
+    stripped = _AMOUNT.sub(" ", text)
+    quantity = _QUANTITY.search(stripped)
+
+    if _QUESTION.search(text):
+        result["intent"] = "query"
+    elif any(word in lowered for word in _SALE_WORDS):
+        result.update(intent="sale", selling_price=price, gst_rate=config.DEFAULT_GST_RATE)
+        gst = _GST.search(text)
+        if gst:
+            result["gst_rate"] = _number(gst.group(1) or gst.group(2))
+        if quantity:
+            result["quantity"] = int(quantity.group(1))
+            # "Sold 2 red kurtis to Mrs. Sharma for ₹1500 each"
+            rest = stripped[quantity.end():]
+            match = re.match(r"\s*(.+?)(?:\s+to\s+(.+?))?(?:\s+(?:(?:for|at|with)\b|@).*)?$", rest, re.I)
+            if match:
+                result["item"] = match.group(1).strip(" ,.")
+                result["customer"] = (match.group(2) or "").strip(" ,.") or None
+    elif any(word in lowered for word in _STOCK_WORDS):
+        result.update(intent="inventory_add", cost_price=price)
+        if quantity:
+            result["quantity"] = int(quantity.group(1))
+            # "Received delivery: 20 lipsticks, ₹150 each"
+            item = re.split(r",|\s+(?:(?:at|for)\b|@)", stripped[quantity.end():], maxsplit=1)[0]
+            result["item"] = item.strip(" ,.:") or None
+    elif any(word in lowered for word in _EXPENSE_WORDS):
+        description = re.sub(r"\b(paid|spent|pay)\b", " ", stripped, flags=re.I)
+        result.update(
+            intent="expense",
+            amount=price,
+            description=re.sub(r"\s+", " ", description).strip(" ,.") or None,
+            payment_method="UPI" if "upi" in lowered else "Cash",
+        )
+    else:
+        result["intent"] = "query"
+    return result
+
+
+class StubProvider(LLMProvider):
+    """Deterministic local stand-in for an LLM
+
+    Replies come from `fixtures` ({fixture_key(prompt): reply}, or a path to
+    such a JSON file) when the prompt is listed there. Otherwise parse
+    prompts get parse_rules() as JSON and any other prompt gets a fixed
+    text. Every call sleeps `latency` seconds first.
+    """
+
+    name = "stub"
+
+    def __init__(self, latency=None, fixtures=None):
+        self.latency = config.LLM_STUB_LATENCY if latency is None else latency
+        if fixtures is None:
+            fixtures = config.LLM_FIXTURES or {}
+        if isinstance(fixtures, str):
+            with open(fixtures, encoding="utf-8") as f:
+                fixtures = json.load(f)
+        self.fixtures = dict(fixtures)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def complete(self, prompt, temperature=0):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.calls += 1
+        reply = self.fixtures.get(fixture_key(prompt))
+        if reply is not None:
+            return reply
+        message = _MESSAGE.search(prompt)
+        if message and "Extract intent" in prompt:
+            return json.dumps(parse_rules(message.group(1)))
+        if "recommendations" in prompt:
+            return ("1. Restock your best sellers before they run out.\n"
+                    "2. Review this month's largest expense category.\n"
+                    "3. Follow up with your top customers this week.")
+        return "Your sales and expenses are summarised in the dashboard; profit is on track."
+
+
+def create_fallback(name=None):
+    """Parse fallback for a config.LLM_PARSE_FALLBACK name, or None"""
+    name = (config.LLM_PARSE_FALLBACK if name is None else name).lower()
+    if name == "stub":
+        return StubProvider(latency=0, fixtures={})
+    if name == "local":
+        if importlib.util.find_spec("llama_cpp") is None:
+            logger.warning("llama-cpp-python not installed, no parse fallback")
+            return None
+        if not os.path.exists(config.LOCAL_LLM_MODEL_PATH):
+            logger.warning(f"Local model '{config.LOCAL_LLM_MODEL_PATH}' not found, no parse fallback")
+            return None
+        return LocalLlamaProvider()
+    if name:
+        logger.warning(f"Unknown LLM_PARSE_FALLBACK '{name}', no parse fallback")
+    return None
+
+
+def create_provider(name=None):
+    """Provider for a config.LLM_PROVIDER name ("groq" or "stub")"""
+    name = (name or config.LLM_PROVIDER).lower()
+    if name == "stub":
+        logger.info("Using the local stub LLM provider")
+        return StubProvider()
+    if name != "groq":
+        logger.warning(f"Unknown LLM_PROVIDER '{name}', using groq")
+    return GroqProvider()
@@ -0,0 +1,226 @@
+"""
+Load test: concurrent counters against the SheetsManager data layer
+
+N worker threads act as cashiers, replaying a mixed workload shaped like
+add_sample_data.py: sales (with stock deduction and customer upkeep), stock
+receipts, expenses, dashboard reads and natural-language messages. Sheets
+is served by the in-memory fake backend with optional per-call latency and
+the LLM by llm_providers.StubProvider with fixed latency, so the numbers show the app's own
+overhead and how many API calls each operation costs.
+
+Usage:
+    python load_test.py                                 # 8 workers, 30 s
+    python load_test.py --workers 32 --duration 60 --latency 0.05
+    python load_test.py --ops 200 --json load.json      # fixed ops per worker
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+import config
+from add_sample_data import PRODUCTS, CUSTOMERS, MONTHLY_EXPENSES, VARIABLE_EXPENSES, generate_synthetic_sales, gst_rate_for
+from ai_helper import AIHelper
+from benchmark_analytics import build_sheet_values
+from fake_sheets import FakeSpreadsheets
+from llm_providers import StubProvider
+from sheets_manager import SheetsManager
+
+# Share of each operation in the workload
+DEFAULT_MIX = {"sale": 60, "stock": 8, "expense": 7, "dashboard": 20, "message": 5}
+
+CUSTOMERS_HEADER = ["Name", "Phone", "Email", "Address"]
+QUESTIONS = ["How much profit did I make this month?", "Which item sells best?", "What should I restock?"]
+
+
+# ===================== WORKLOAD =====================
+
+class Workload:
+    """The operations a counter performs, each mirroring an app.py flow"""
+
+    def __init__(self, manager, ai_helper, seed):
+        self.manager = manager
+        self.ai_helper = ai_helper
+        self.products = {p[0]: p for p in PRODUCTS}
+        # Item/customer/quantity draws follow the sample data's frequencies
+        self._sales = generate_synthetic_sales(10_000, seed=seed)
+        self._expenses = MONTHLY_EXPENSES + VARIABLE_EXPENSES
+
+    def sale(self, rng):
+        item, customer, quantity, _ = rng.choice(self._sales)
+        _, cost, selling, _ = self.products[item]
+        self._record_sale(item, quantity, selling, cost, customer, gst_rate_for(item))
+
+    def _record_sale(self, item, quantity, selling, cost, customer, gst_rate):
+        today = datetime.date.today().strftime(config.DATE_FORMAT)
+        if self.manager.add_sale(today, item, quantity, selling, cost, customer, gst_rate):
+            self.manager.update_inventory_stock(item, quantity)
+            if customer:
+                self.manager.add_or_update_customer(customer)
+
+    def stock(self, rng):
+        item, cost, _, stock = rng.choice(PRODUCTS)
+        self.manager.add_or_update_inventory(item, rng.randint(5, max(stock, 5)), cost)
+
+    def expense(self, rng):
+        category, description, amount, payment, _ = rng.choice(self._expenses)
+        today = datetime.date.today().strftime(config.DATE_FORMAT)
+        self.manager.add_expense(today, category, description, amount, payment)
+
+    def dashboard(self, rng):
+        snapshot = self.manager.snapshot()
+        snapshot.item_rankings[None]
+        snapshot.leaders
+
+    def message(self, rng):
+        if rng.random() < 0.5:
+            item, customer, quantity, _ = rng.choice(self._sales)
+            text = f"Sold {quantity} {item} to {customer} for ₹{self.products[item][2]} each"
+        else:
+            text = rng.choice(QUESTIONS)
+        data = self.ai_helper.parse_message(text)
+        if data and data.get("intent") == "sale":
+            self._record_sale(data["item"], data["quantity"], data["selling_price"],
+                              data.get("cost_price") or 0, data.get("customer") or "", data["gst_rate"])
+        else:
+            snapshot = self.manager.snapshot()
+            self.ai_helper.get_insight(text, snapshot.sales, snapshot.inventory, snapshot.expenses, snapshot.profit)
+
+
+# ===================== RUNNER =====================
+
+def run_worker(worker_id, workload, fake, mix, deadline, max_ops, seed, results, lock):
+    """One counter: pick operations by weight until the deadline or op budget"""
+    rng = random.Random(seed + worker_id)
+    names, weights = list(mix), list(mix.values())
+    samples = []  # (operation, ms, api calls, ok)
+    done = 0
+    while time.monotonic() < deadline and (max_ops is None or done < max_ops):
+        name = rng.choices(names, weights)[0]
+        calls_before = fake.thread_calls()
+        started = time.perf_counter()
+        try:
+            getattr(workload, name)(rng)
+            ok = True
+        except Exception as e:
+            logging.getLogger(__name__).error(f"{name} failed: {e}")
+            ok = False
+        samples.append((name, (time.perf_counter() - started) * 1000, fake.thread_calls() - calls_before, ok))
+        done += 1
+    with lock:
+        results.extend(samples)
+
+
+def summarize(samples, elapsed):
+    """Per-operation throughput, latency percentiles and API calls per op"""
+    rows = []
+    for name in sorted({s[0] for s in samples}) + ["all"]:
+        selected = [s for s in samples if name == "all" or s[0] == name]
+        latencies = np.array([s[1] for s in selected])
+        rows.append({
+            "operation": name,
+            "count": len(selected),
+            "errors": sum(1 for s in selected if not s[3]),
+            "ops_per_s": len(selected) / elapsed,
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p95_ms": float(np.percentile(latencies, 95)),
+            "p99_ms": float(np.percentile(latencies, 99)),
+            "api_calls_per_op": sum(s[2] for s in selected) / len(selected),
+        })
+    return rows
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load test the Vyapar Vidya data layer with concurrent counters")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent counters")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run (ignored with --ops)")
+    parser.add_argument("--ops", type=int, help="Operations per worker instead of a fixed duration")
+    parser.add_argument("--rows", type=int, default=10_000, help="Sales rows preloaded into the fake sheet")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every fake Sheets call")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Seconds per stub LLM call")
+    parser.add_argument("--mix", help="Operation weights, e.g. sale=60,dashboard=30,message=10")
+    parser.add_argument("--no-wal", action="store_true", help="Write straight to the sheet instead of via the WAL")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    # Per-call INFO logs (and negative-stock warnings) would dominate the output
+    logging.disable(logging.WARNING)
+    mix = DEFAULT_MIX
+    if args.mix:
+        mix = {name: float(weight) for name, weight in (part.split("=") for part in args.mix.split(","))}
+        unknown = set(mix) - set(DEFAULT_MIX)
+        if unknown:
+            raise SystemExit(f"Unknown operations in --mix: {sorted(unknown)}")
+
+    data = build_sheet_values(args.rows, args.seed)
+    data[config.SHEET_CUSTOMERS] = [CUSTOMERS_HEADER] + [list(c) for c in CUSTOMERS]
+    fake = FakeSpreadsheets(data, latency=args.latency)
+    manager = SheetsManager(sheets=fake)
+    llm = StubProvider(latency=args.llm_latency, fixtures={})
+    workload = Workload(manager, AIHelper(provider=llm), args.seed)
+
+    with tempfile.TemporaryDirectory() as wal_dir:
+        if not args.no_wal:
+            manager.enable_write_ahead_log(os.path.join(wal_dir, "load_test.log"))
+        manager.enable_background_refresh()
+        manager.snapshot()  # first snapshot is built before the clock starts
+
+        results, lock = [], threading.Lock()
+        deadline = time.monotonic() + (args.duration if args.ops is None else 1e9)
+        calls_before = sum(fake.calls.values())
+        started = time.perf_counter()
+        threads = [
+            threading.Thread(target=run_worker, args=(i, workload, fake, mix, deadline, args.ops, args.seed, results, lock))
+            for i in range(args.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        manager.flush_writes(timeout=60)
+        total_calls = sum(fake.calls.values()) - calls_before
+        manager.close()
+
+    rows = summarize(results, elapsed)
+    attributed = sum(s[2] for s in results)
+    print(f"\n{args.workers} workers, {elapsed:.1f} s, {len(results):,} operations, "
+          f"Sheets latency {args.latency * 1000:.0f} ms, LLM latency {args.llm_latency * 1000:.0f} ms")
+    print(f"  {'operation':<12} {'count':>7} {'errors':>7} {'ops/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'API/op':>7}")
+    for row in rows:
+        print(f"  {row['operation']:<12} {row['count']:>7,} {row['errors']:>7} {row['ops_per_s']:>8.1f} "
+              f"{row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f} {row['api_calls_per_op']:>7.2f}")
+    # Calls made by the WAL replayer and snapshot refresher threads
+    background = total_calls - attributed
+    print(f"\nSheets API calls: {total_calls:,} total, {attributed:,} in request paths, "
+          f"{background:,} in background threads; LLM calls: {llm.calls:,}")
+    print(f"API calls by method: {dict(Counter(fake.calls))}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "workers": args.workers,
+                "elapsed_s": elapsed,
+                "latency_s": args.latency,
+                "llm_latency_s": args.llm_latency,
+                "mix": mix,
+                "results": rows,
+                "api_calls": {"total": total_calls, "request_paths": attributed, "background": background},
+            }, f, indent=2)
+        print(f"\nSaved results to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
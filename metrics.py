@@ -0,0 +1,170 @@
+"""
+Lightweight in-process instrumentation for Sheets and Groq calls
+
+Every API round trip is recorded with its latency (histogram), rows and
+approximate bytes transferred, and whether it failed. Records are keyed by
+operation and by the current page action, so the Diagnostics page can show
+which page actions cost the most round trips. Metrics can also be dumped in
+Prometheus text exposition format.
+"""
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current_action = contextvars.ContextVar("vyapar_action", default="-")
+
+
+class _Series:
+    """Counters and latency histogram for one (operation, action) pair"""
+
+    __slots__ = ("count", "errors", "rows", "bytes", "total_seconds", "max_seconds", "buckets")
+
+    def __init__(self, bucket_count):
+        self.count = 0
+        self.errors = 0
+        self.rows = 0
+        self.bytes = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.buckets = [0] * (bucket_count + 1)  # last bucket is +Inf
+
+
+class Metrics:
+    """Thread-safe registry of per-operation timers and counters"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    # ===================== RECORDING =====================
+
+    def observe(self, operation, seconds, rows=0, nbytes=0, error=False, action=None):
+        """Record one completed call"""
+        key = (operation, action or _current_action.get())
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series(len(self.buckets))
+            series.count += 1
+            series.errors += int(bool(error))
+            series.rows += int(rows)
+            series.bytes += int(nbytes)
+            series.total_seconds += seconds
+            series.max_seconds = max(series.max_seconds, seconds)
+            series.buckets[bisect.bisect_left(self.buckets, seconds)] += 1
+
+    @contextmanager
+    def timer(self, operation):
+        """Time a block; the yielded dict can be filled with 'rows' and 'bytes'
+
+        Exceptions raised inside the block are counted as errors and re-raised.
+        """
+        stats = {"rows": 0, "bytes": 0, "error": False}
+        started = time.perf_counter()
+        try:
+            yield stats
+        except Exception:
+            stats["error"] = True
+            raise
+        finally:
+            self.observe(operation, time.perf_counter() - started,
+                         stats["rows"], stats["bytes"], stats["error"])
+
+    def set_action(self, action):
+        """Attribute subsequent calls in this context to a page action"""
+        _current_action.set(action or "-")
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    # ===================== REPORTING =====================
+
+    def _quantile(self, series, q):
+        """Estimate a latency quantile (seconds) from the histogram buckets"""
+        if series.count == 0:
+            return 0.0
+        target = q * series.count
+        seen = 0
+        for bound, count in zip(self.buckets + (series.max_seconds,), series.buckets):
+            seen += count
+            if seen >= target:
+                return min(bound, series.max_seconds)
+        return series.max_seconds
+
+    def snapshot(self):
+        """Return a list of dicts, one per (operation, action), slowest first"""
+        with self._lock:
+            items = [(key, series) for key, series in self._series.items()]
+            rows = []
+            for (operation, action), s in items:
+                rows.append({
+                    "operation": operation,
+                    "action": action,
+                    "calls": s.count,
+                    "errors": s.errors,
+                    "rows": s.rows,
+                    "bytes": s.bytes,
+                    "total_ms": s.total_seconds * 1000,
+                    "avg_ms": (s.total_seconds / s.count * 1000) if s.count else 0.0,
+                    "p50_ms": self._quantile(s, 0.5) * 1000,
+                    "p95_ms": self._quantile(s, 0.95) * 1000,
+                    "max_ms": s.max_seconds * 1000,
+                })
+        return sorted(rows, key=lambda r: r["total_ms"], reverse=True)
+
+    def render_prometheus(self, prefix="vyapar"):
+        """Render all series in Prometheus text exposition format"""
+        with self._lock:
+            items = sorted(self._series.items())
+            lines = [
+                f"# HELP {prefix}_operation_duration_seconds Latency of external API calls",
+                f"# TYPE {prefix}_operation_duration_seconds histogram",
+            ]
+            for (operation, action), s in items:
+                labels = f'operation="{_escape(operation)}",action="{_escape(action)}"'
+                cumulative = 0
+                for bound, count in zip(self.buckets, s.buckets):
+                    cumulative += count
+                    lines.append(f'{prefix}_operation_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{prefix}_operation_duration_seconds_bucket{{{labels},le="+Inf"}} {s.count}')
+                lines.append(f"{prefix}_operation_duration_seconds_sum{{{labels}}} {s.total_seconds:.6f}")
+                lines.append(f"{prefix}_operation_duration_seconds_count{{{labels}}} {s.count}")
+
+            for name, attr, help_text in [
+                ("operation_errors_total", "errors", "Failed external API calls"),
+                ("operation_rows_total", "rows", "Rows read or written"),
+                ("operation_bytes_total", "bytes", "Approximate payload bytes transferred"),
+            ]:
+                lines.append(f"# HELP {prefix}_{name} {help_text}")
+                lines.append(f"# TYPE {prefix}_{name} counter")
+                for (operation, action), s in items:
+                    labels = f'operation="{_escape(operation)}",action="{_escape(action)}"'
+                    lines.append(f"{prefix}_{name}{{{labels}}} {getattr(s, attr)}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def estimate_values_bytes(values, sample=100):
+    """Approximate the payload size of a 2D values list without walking every cell"""
+    if not values:
+        return 0
+    head = values[:sample]
+    cells = sum(len(row) for row in head)
+    if cells == 0:
+        return 0
+    sampled_bytes = sum(len(str(v)) for row in head for v in row)
+    return int(sampled_bytes / len(head) * len(values))
+
+
+# Process-wide registry shared by SheetsManager, AIHelper and the app
+registry = Metrics()
@@ -0,0 +1,104 @@
+"""
+Opt-in per-rerun render profiler for the Streamlit app
+
+Enable with VYAPAR_PROFILE=1. Each rerun records wall time per named
+section (data fetch, aggregation, chart construction, LLM call, write),
+shows a breakdown in the sidebar and appends the trace as one JSON line to
+config.PROFILE_TRACE_FILE.
+"""
+import json
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+import config
+
+logger = config.get_logger(__name__)
+
+SECTION_KINDS = ("fetch", "aggregate", "chart", "llm", "write", "export")
+
+
+class RenderTrace:
+    """Timings for a single rerun of one page"""
+
+    def __init__(self, page, enabled=True):
+        self.page = page
+        self.enabled = enabled
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.sections = []
+        self.total_ms = 0.0
+
+    def section(self, name, kind):
+        """Context manager timing one section; a no-op when profiling is off"""
+        if not self.enabled:
+            return nullcontext()
+        return self._timed(name, kind)
+
+    @contextmanager
+    def _timed(self, name, kind):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.sections.append({
+                "name": name,
+                "kind": kind,
+                "ms": (time.perf_counter() - started) * 1000,
+            })
+
+    def breakdown(self):
+        """Total milliseconds per section kind, including untracked time"""
+        totals = {kind: 0.0 for kind in SECTION_KINDS}
+        for section in self.sections:
+            totals[section["kind"]] = totals.get(section["kind"], 0.0) + section["ms"]
+        totals["other"] = max(self.total_ms - sum(totals.values()), 0.0)
+        return totals
+
+    def to_dict(self):
+        return {
+            "page": self.page,
+            "started_at": self.started_at,
+            "total_ms": self.total_ms,
+            "breakdown": self.breakdown(),
+            "sections": self.sections,
+        }
+
+
+class RenderProfiler:
+    """Creates per-rerun traces and persists them to a JSON Lines file"""
+
+    def __init__(self, enabled=None, trace_file=None):
+        self.enabled = config.PROFILE_ENABLED if enabled is None else enabled
+        self.trace_file = trace_file or config.PROFILE_TRACE_FILE
+        self._lock = threading.Lock()
+
+    def start(self, page):
+        return RenderTrace(page, self.enabled)
+
+    def finish(self, trace):
+        """Close the trace and append it to the trace file"""
+        if not trace.enabled:
+            return trace
+        trace.total_ms = (time.perf_counter() - trace._started) * 1000
+        try:
+            with self._lock, open(self.trace_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(trace.to_dict(), ensure_ascii=False) + "\n")
+        except OSError as e:
+            logger.error(f"Failed to write profile trace: {e}")
+        return trace
+
+    def render_sidebar(self, st, trace):
+        """Show the rerun breakdown in the Streamlit sidebar"""
+        if not trace.enabled:
+            return
+        with st.sidebar.expander(f"⏱️ Render profile: {trace.total_ms:,.0f} ms", expanded=False):
+            for kind, ms in trace.breakdown().items():
+                if ms > 0:
+                    st.caption(f"{kind}: {ms:,.1f} ms")
+            if trace.sections:
+                st.dataframe(
+                    [{"section": s["name"], "kind": s["kind"], "ms": round(s["ms"], 1)} for s in trace.sections],
+                    use_container_width=True
+                )
+            st.caption(f"Traces saved to {self.trace_file}")
@@ -0,0 +1,110 @@
+"""
+Indexed filtering, sorting and pagination over sheet frames
+
+TableIndex maps every value of the filter columns (item, customer,
+category...) to the row positions holding it, built once per data version.
+A query intersects the position lists of the chosen filters, sorts only the
+matching rows and slices out one page, so a view only ever serializes the
+rows on screen.
+"""
+import math
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class ResultPage:
+    """One page of query results plus totals over every matching row"""
+    rows: pd.DataFrame
+    total_rows: int
+    page: int
+    pages: int
+    totals: dict
+
+
+class TableIndex:
+    """Per-value row positions for `filter_columns` of a frame
+
+    Orderings for `sort_columns` are computed up front; other columns are
+    sorted on first use.
+    """
+
+    def __init__(self, df, filter_columns=(), sum_columns=(), sort_columns=()):
+        self.df = df
+        self.filter_columns = [c for c in filter_columns if c in df.columns]
+        self.sum_columns = [c for c in sum_columns if c in df.columns]
+        self._positions = {
+            column: {key: np.asarray(pos) for key, pos in df.groupby(column, sort=False).indices.items()}
+            for column in self.filter_columns
+        }
+        self._sums = {column: df[column].to_numpy(dtype=float) for column in self.sum_columns}
+        self._orders = {}
+        for column in sort_columns:
+            if column in df.columns:
+                self._order(column)
+
+    def __len__(self):
+        return len(self.df)
+
+    def values(self, column):
+        """Distinct values of a filter column, in first-seen order"""
+        return list(self._positions.get(column, {}))
+
+    def _matching(self, filters):
+        """Row positions matching every {column: value} filter (None = all)"""
+        positions = None
+        for column, value in filters.items():
+            if value is None:
+                continue
+            matches = self._positions.get(column, {}).get(value, np.empty(0, dtype=np.intp))
+            positions = matches if positions is None else np.intersect1d(positions, matches, assume_unique=True)
+        return np.arange(len(self.df)) if positions is None else positions
+
+    def _order(self, column):
+        """Row positions sorted by a column, computed once per column"""
+        if column not in self._orders:
+            series = self.df[column]
+            if pd.api.types.is_numeric_dtype(series):
+                keys = series.to_numpy(dtype=float)
+            else:
+                keys = series.fillna("").astype(str).to_numpy()
+            self._orders[column] = np.argsort(keys, kind="stable")
+        return self._orders[column]
+
+    def query(self, filters=None, sort_by=None, descending=False, page=1, page_size=50, rows=None):
+        """Return one sorted page of rows matching `filters`
+
+        `rows` further restricts the result to these row positions (e.g.
+        search hits). Rows with equal sort keys keep sheet order (reversed
+        when descending, so the newest entries come first).
+        """
+        positions = self._matching(filters or {})
+        if rows is not None:
+            rows = np.asarray(rows, dtype=np.intp)
+            positions = np.intersect1d(positions, rows[rows < len(self.df)])
+        if sort_by in self.df.columns and len(positions):
+            # Walk the cached full ordering and keep matching rows: O(n) with no re-sort
+            order = self._order(sort_by)
+            if len(positions) < len(self.df):
+                selected = np.zeros(len(self.df), dtype=bool)
+                selected[positions] = True
+                order = order[selected[order]]
+            positions = order
+        if descending:
+            positions = positions[::-1]
+
+        pages = max(math.ceil(len(positions) / page_size), 1)
+        page = min(max(page, 1), pages)
+        start = (page - 1) * page_size
+        window = positions[start:start + page_size]
+
+        totals = {column: float(values[positions].sum()) for column, values in self._sums.items()}
+        return ResultPage(
+            rows=self.df.iloc[window],
+            total_rows=len(positions),
+            page=page,
+            pages=pages,
+            totals=totals,
+        )
@@ -0,0 +1,195 @@
+"""
+Google Sheets API quota accounting
+"""
+import random
+import threading
+import time
+from collections import deque
+
+import config
+
+logger = config.get_logger(__name__)
+
+
+class QuotaTracker:
+    """Counts read and write requests in a rolling time window"""
+
+    KINDS = ("read", "write")
+
+    def __init__(self, window=60.0):
+        self.window = window
+        self._lock = threading.Lock()
+        self._recent = {kind: deque() for kind in self.KINDS}
+        self._totals = {kind: 0 for kind in self.KINDS}
+
+    def _prune(self, kind, now):
+        recent = self._recent[kind]
+        while recent and now - recent[0] > self.window:
+            recent.popleft()
+
+    def record(self, kind, now=None):
+        """Record one request of the given kind ("read" or "write")"""
+        now = now or time.monotonic()
+        with self._lock:
+            self._recent[kind].append(now)
+            self._totals[kind] += 1
+            self._prune(kind, now)
+
+    def used(self, kind, now=None):
+        """Requests of this kind within the current window"""
+        now = now or time.monotonic()
+        with self._lock:
+            self._prune(kind, now)
+            return len(self._recent[kind])
+
+    def oldest(self, kind, now=None):
+        """Timestamp of the oldest request still inside the window"""
+        now = now or time.monotonic()
+        with self._lock:
+            self._prune(kind, now)
+            recent = self._recent[kind]
+            return recent[0] if recent else None
+
+    def usage(self):
+        now = time.monotonic()
+        return {
+            "reads_per_window": self.used("read", now),
+            "writes_per_window": self.used("write", now),
+            "reads_total": self._totals["read"],
+            "writes_total": self._totals["write"],
+        }
+
+
+class QuotaShedError(RuntimeError):
+    """Raised when a read is shed because quota is exhausted"""
+
+
+RETRYABLE_STATUSES = {
+    "read": (429, 500, 503),
+    # A 500/503 write may still have been applied, and appends are not
+    # idempotent; only a 429 guarantees the request was rejected. The WAL
+    # replayer recovers other failed writes by entry id.
+    "write": (429,),
+}
+
+
+def _http_status(error):
+    resp = getattr(error, "resp", None)
+    try:
+        return int(getattr(resp, "status", 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+class QuotaScheduler:
+    """Paces Google Sheets API calls to stay within per-minute quotas
+
+    Google enforces read and write request quotas per minute for the service
+    account. The scheduler admits calls only while the rolling window has
+    room, lets waiting writes go before reads (so captured sales are never
+    starved by dashboard refreshes), and retries rate-limited or transient
+    failures with exponential backoff and jitter, honouring Retry-After.
+    Writes are retried only when rate limited (see RETRYABLE_STATUSES).
+    A 429 pauses every caller, not just the one that hit it.
+    """
+
+    def __init__(self, reads_per_minute=None, writes_per_minute=None, max_retries=None,
+                 backoff_base=None, backoff_max=None, sleep=time.sleep):
+        self.limits = {
+            "read": reads_per_minute or config.SHEETS_READS_PER_MINUTE,
+            "write": writes_per_minute or config.SHEETS_WRITES_PER_MINUTE,
+        }
+        self.max_retries = config.SHEETS_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_base = backoff_base or config.SHEETS_BACKOFF_BASE
+        self.backoff_max = backoff_max or config.SHEETS_BACKOFF_MAX
+        self.tracker = QuotaTracker(window=60.0)
+        self._sleep = sleep
+        self._cond = threading.Condition()
+        self._waiting_writes = 0
+        self._paused_until = 0.0
+        self._rng = random.Random()
+
+    # ===================== ADMISSION =====================
+
+    def _wait_time(self, kind, now):
+        """Seconds until a call of this kind may start (0 if it can go now)"""
+        wait = max(self._paused_until - now, 0.0)
+        oldest = self.tracker.oldest(kind, now)
+        if self.tracker.used(kind, now) >= self.limits[kind] and oldest is not None:
+            wait = max(wait, oldest + self.tracker.window - now)
+        return wait
+
+    def under_pressure(self, kind):
+        """True if a call of this kind would have to wait right now"""
+        with self._cond:
+            now = time.monotonic()
+            blocked_by_writes = kind == "read" and self._waiting_writes > 0
+            return blocked_by_writes or self._wait_time(kind, now) > 0
+
+    def acquire(self, kind, timeout=None):
+        """Block until a call may start; returns False if `timeout` expires first"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            if kind == "write":
+                self._waiting_writes += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = self._wait_time(kind, now)
+                    if wait <= 0 and (kind == "write" or self._waiting_writes == 0):
+                        self.tracker.record(kind, now)
+                        return True
+                    if deadline is not None and now >= deadline:
+                        return False
+                    # Reads blocked only by pending writes re-check shortly
+                    wait = wait if wait > 0 else 0.05
+                    if deadline is not None:
+                        wait = min(wait, deadline - now)
+                    self._cond.wait(wait)
+            finally:
+                if kind == "write":
+                    self._waiting_writes -= 1
+                    self._cond.notify_all()
+
+    def _pause(self, seconds):
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    # ===================== EXECUTION =====================
+
+    def call(self, kind, func, timeout=None):
+        """Run func() under quota control, retrying failures listed in RETRYABLE_STATUSES
+
+        `timeout` bounds the initial wait for quota; when it expires the call
+        is shed with QuotaShedError (used for reads that can be served stale).
+        """
+        if not self.acquire(kind, timeout):
+            raise QuotaShedError(f"{kind} quota exhausted")
+
+        attempt = 0
+        while True:
+            try:
+                return func()
+            except Exception as e:
+                status = _http_status(e)
+                if status not in RETRYABLE_STATUSES[kind] or attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt, e)
+                if status == 429:
+                    self._pause(delay)
+                attempt += 1
+                logger.warning(f"Sheets API returned {status}; retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                self._sleep(delay)
+                self.acquire(kind)
+
+    def _backoff(self, attempt, error):
+        """Exponential backoff with jitter, or the server's Retry-After"""
+        resp = getattr(error, "resp", None)
+        retry_after = resp.get("retry-after") if hasattr(resp, "get") else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        ceiling = min(self.backoff_base * (2 ** attempt), self.backoff_max)
+        return self._rng.uniform(ceiling / 2, ceiling)
@@ -0,0 +1,58 @@
+"""
+Tracks which sheet rows an incremental aggregate has already folded in
+
+Frames read through SheetsManager end with rows still pending in the
+write-ahead log. Those are not in the sheet yet: once replayed, or once
+another writer appends first, they can land at a different position. So
+aggregates fold only the rows confirmed in the sheet. A hash per folded row
+catches edits and deletions in the part already folded, which forces a
+rebuild instead of leaving stale totals behind.
+"""
+import numpy as np
+import pandas as pd
+
+# DataFrame.attrs key set by SheetsManager: trailing rows that are WAL-pending
+PENDING_ROWS = "pending_rows"
+
+
+def confirmed_rows(df):
+    """The leading rows of `df` that are in the sheet, not just in the WAL"""
+    pending = df.attrs.get(PENDING_ROWS, 0)
+    return df.iloc[:len(df) - pending] if pending else df
+
+
+class RowTracker:
+    """Fingerprints of the rows folded so far
+
+    Call `split(df)` to get the rows to fold, then `commit()` once they have
+    been folded in.
+    """
+
+    def __init__(self):
+        self._hashes = np.empty(0, dtype=np.uint64)
+        self._next = None
+
+    @property
+    def rows(self):
+        return len(self._hashes)
+
+    def split(self, df):
+        """(rebuild, new_rows) for the confirmed rows of `df`
+
+        `rebuild` is True when rows already folded were edited or deleted; the
+        caller should then reset and fold all of `new_rows`.
+        """
+        confirmed = confirmed_rows(df)
+        if len(confirmed) and len(confirmed.columns):
+            hashes = pd.util.hash_pandas_object(confirmed, index=False).to_numpy()
+        else:
+            hashes = np.zeros(len(confirmed), dtype=np.uint64)
+        folded = len(self._hashes)
+        rebuild = len(hashes) < folded or not np.array_equal(hashes[:folded], self._hashes)
+        self._next = hashes
+        return rebuild, confirmed if rebuild else confirmed.iloc[folded:]
+
+    def commit(self):
+        """Record the rows returned by the last split() as folded"""
+        if self._next is not None:
+            self._hashes, self._next = self._next, None
@@ -0,0 +1,196 @@
+"""
+Trigram search over item, customer, category and description values
+
+Every distinct value is broken into character trigrams and listed in an
+inverted index, together with the sheet rows where it appears. A lookup
+scores only values sharing a trigram with the query (Dice coefficient), so
+spelling variants such as "kurti" / "kurtis" match in well under a
+millisecond. update() only indexes rows added since the last call; a sheet
+whose indexed rows were edited or deleted is re-indexed.
+
+Similar is not the same: "iPhone 13" and "iPhone 14" score highly, so
+writes only reuse an existing spelling when name_key() says both are the
+same name, and near matches are offered as suggestions instead.
+"""
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+
+import config
+from row_tracker import RowTracker
+
+# Columns indexed per sheet, and the field each one is searchable as
+SEARCH_FIELDS = {
+    config.SHEET_SALES: {"Item": "Item", "Customer": "Customer"},
+    config.SHEET_INVENTORY: {"Item": "Item"},
+    config.SHEET_CUSTOMERS: {"Name": "Customer"},
+    config.SHEET_EXPENSES: {"Category": "Category", "Description": "Description"},
+}
+
+_SPACES = re.compile(r"\s+")
+_TOKENS = re.compile(r"[a-z0-9]+")
+SIZE_TOKENS = {"xxs", "xs", "s", "m", "l", "xl", "xxl", "xxxl", "2xl", "3xl", "4xl", "free"}
+
+
+def normalize(text):
+    return _SPACES.sub(" ", str(text).strip().lower())
+
+
+def _singular(token):
+    """Singular form of a plural word; short words, sizes and numbers are kept"""
+    if len(token) <= 3 or token in SIZE_TOKENS or any(c.isdigit() for c in token):
+        return token
+    if token.endswith("ies"):
+        return token[:-3] + "y"
+    if token.endswith(("ches", "shes", "sses", "xes", "zes")):
+        return token[:-2]
+    if token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def name_key(text):
+    """Key under which two spellings count as the same name
+
+    Ignores case, spacing, punctuation and plural endings ("Red Kurtis" =
+    "red kurti"). Numbers and size codes must match exactly, so "Kurti M" /
+    "Kurti XL" and "iPhone 13" / "iPhone 14" stay distinct.
+    """
+    return " ".join(_singular(token) for token in _TOKENS.findall(str(text).lower()))
+
+
+def trigrams(text):
+    """Character trigrams of a normalised string, padded to weight word starts"""
+    padded = f"  {normalize(text)} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+@dataclass(frozen=True)
+class SearchMatch:
+    field: str
+    text: str
+    score: float
+    rows: dict  # sheet name -> row positions
+
+
+class SearchIndex:
+    """Incrementally updated trigram index over sheet values"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._indexed = {}   # sheet name -> RowTracker of rows indexed so far
+        self._reset()
+
+    def _reset(self):
+        self._ids = {}       # (field, normalized text) -> term id
+        self._terms = []     # term id -> (field, text as first seen, trigram count)
+        self._rows = []      # term id -> {sheet name: [row positions]}
+        self._postings = {}  # trigram -> set of term ids
+
+    # ===================== UPDATES =====================
+
+    def update(self, sheet_name, df):
+        """Index rows of a sheet appended to it since the last update
+
+        Rows still pending in the WAL are left for a later update. If rows
+        already indexed were edited or deleted, the sheet is re-indexed so
+        old spellings drop out.
+        """
+        columns = {c: f for c, f in SEARCH_FIELDS.get(sheet_name, {}).items() if c in df.columns}
+        with self._lock:
+            tracker = self._indexed.setdefault(sheet_name, RowTracker())
+            # Only the indexed columns: callers pass raw or derived frames
+            rebuild, new_rows = tracker.split(df[list(columns)])
+            if rebuild:
+                self._drop_sheet(sheet_name)
+            start = 0 if rebuild else tracker.rows
+            for column, field in columns.items():
+                values = new_rows[column].fillna("").astype(str).str.strip()
+                # One index update per distinct value in the new rows
+                for value, positions in values.groupby(values, sort=False).indices.items():
+                    if value:
+                        self._add(field, value, sheet_name, (positions + start).tolist())
+            tracker.commit()
+        return self
+
+    def _drop_sheet(self, sheet_name):
+        """Forget a sheet's rows; values that only appeared there are removed"""
+        terms = list(zip(self._terms, self._rows))
+        self._reset()
+        for (field, text, _), rows in terms:
+            for name, positions in rows.items():
+                if name != sheet_name:
+                    self._add(field, text, name, positions)
+
+    def _add(self, field, text, sheet_name, positions):
+        key = (field, normalize(text))
+        term_id = self._ids.get(key)
+        if term_id is None:
+            grams = trigrams(text)
+            term_id = len(self._terms)
+            self._ids[key] = term_id
+            self._terms.append((field, str(text).strip(), len(grams)))
+            self._rows.append({})
+            for gram in grams:
+                self._postings.setdefault(gram, set()).add(term_id)
+        self._rows[term_id].setdefault(sheet_name, []).extend(positions)
+
+    # ===================== QUERIES =====================
+
+    def search(self, query, fields=None, sheet_name=None, limit=10, min_score=0.3, substring=True):
+        """Values similar to `query`, best first
+
+        With substring=True a value containing the whole query scores at
+        least 0.9, so partial searches ("kur") still find longer names.
+        """
+        needle = normalize(query)
+        if not needle:
+            return []
+        grams = trigrams(needle)
+        with self._lock:
+            shared = Counter()
+            for gram in grams:
+                shared.update(self._postings.get(gram, ()))
+
+            matches = []
+            for term_id, common in shared.items():
+                field, text, size = self._terms[term_id]
+                rows = self._rows[term_id]
+                if (fields and field not in fields) or (sheet_name and sheet_name not in rows):
+                    continue
+                score = 2 * common / (len(grams) + size)
+                if needle == normalize(text):
+                    score = 1.0
+                elif substring and needle in normalize(text):
+                    score = max(score, 0.9)
+                if score >= min_score:
+                    matches.append(SearchMatch(field, text, round(score, 3),
+                                               {name: list(pos) for name, pos in rows.items()}))
+        matches.sort(key=lambda m: m.score, reverse=True)
+        return matches[:limit]
+
+    def same_name(self, field, text, sheet_name=None):
+        """Existing value for `field` with the same name_key() as `text`, or None"""
+        key = name_key(text)
+        for match in self.search(text, fields=(field,), sheet_name=sheet_name, limit=20,
+                                 min_score=config.SEARCH_MIN_SCORE, substring=False):
+            if name_key(match.text) == key:
+                return match
+        return None
+
+    def similar(self, field, text, sheet_name=None, limit=3, threshold=None):
+        """Existing values close to `text` that are not the same name, best first"""
+        threshold = config.SEARCH_MATCH_THRESHOLD if threshold is None else threshold
+        key = name_key(text)
+        matches = self.search(text, fields=(field,), sheet_name=sheet_name, limit=limit + 1,
+                              min_score=threshold, substring=False)
+        return [m for m in matches if name_key(m.text) != key][:limit]
+
+    def rows(self, query, sheet_name, fields=None, min_score=None):
+        """Row positions in a sheet whose indexed values match `query`"""
+        min_score = config.SEARCH_MIN_SCORE if min_score is None else min_score
+        positions = set()
+        for match in self.search(query, fields, sheet_name, limit=len(self._terms) or 1, min_score=min_score):
+            positions.update(match.rows.get(sheet_name, ()))
+        return sorted(positions)
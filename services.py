@@ -0,0 +1,118 @@
+"""
+Backend services shared by the Streamlit entry points
+
+app.py (the full app) and vidya_vypar.py (the quick-entry mode) both get
+their SheetsManager and AIHelper from here: one sheet cache, snapshot
+refresher and lazily built Groq client per server process. Each entry point
+keeps its write-ahead logs under its own directory (see init_services).
+"""
+import math
+import os
+
+import streamlit as st
+
+import config
+from sheets_manager import SheetsManager
+from ai_helper import AIHelper
+from tenants import TenantRegistry
+from profiler import RenderProfiler
+
+# ===================== INITIALIZE SERVICES =====================
+
+def _release_services(services):
+    """Close the registry of a discarded cache entry (e.g. "Clear cache") so its WAL locks are freed"""
+    tenants = services[0]
+    if tenants is not None:
+        tenants.close()
+
+@st.cache_resource(on_release=_release_services)
+def init_services(entry_point):
+    """Initialize backend services (cached)
+
+    `entry_point` ("app" or "quick") names the WAL subdirectory, so the full
+    app and quick-entry mode can run as separate processes.
+    """
+    # Validate configuration
+    warnings = config.validate_config()
+    for warning in warnings:
+        st.sidebar.warning(f"⚠️ {warning}")
+
+    try:
+        # Clients are built lazily on first use so the first paint doesn't
+        # wait for Google auth or the Groq SDK
+        tenants = TenantRegistry(SheetsManager(lazy=True), wal_dir=os.path.join(config.WAL_DIR, entry_point))
+        ai_helper = AIHelper()
+        return tenants, ai_helper, None
+    except Exception as e:
+        return None, None, str(e)
+
+@st.cache_resource
+def init_profiler():
+    """Render profiler shared by all sessions, so trace writes share one lock"""
+    return RenderProfiler()
+
+# ===================== VALIDATION HELPERS =====================
+
+def _finite_number(value):
+    """float(value) for a finite number or numeric string, else None"""
+    if isinstance(value, bool):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+def is_positive_number(value):
+    """True for a finite number above zero, or a string holding one (e.g. "2" from JSON)"""
+    number = _finite_number(value)
+    return number is not None and number > 0
+
+def _invalid_optional_number(data, fields):
+    """Message for the first optional field that is given but not a number >= 0"""
+    for field, label in fields:
+        value = data.get(field)
+        if value is None or value == "":
+            continue
+        number = _finite_number(value)
+        if number is None or number < 0:
+            return f"{label} must be a non-negative number"
+    return None
+
+def as_number(value, default=0.0):
+    """Validated numeric field as a float; missing (None or "") gives `default`"""
+    if value is None or value == "":
+        return default
+    return float(value)
+
+def validate_sale_data(data):
+    """Validate sale data"""
+    if not data.get("item"):
+        return False, "Item name is required"
+    if not is_positive_number(data.get("quantity")):
+        return False, "Valid quantity is required"
+    if not is_positive_number(data.get("selling_price")):
+        return False, "Valid selling price is required"
+    message = _invalid_optional_number(data, [("cost_price", "Cost price"), ("gst_rate", "GST rate")])
+    if message:
+        return False, message
+    return True, "Valid"
+
+def validate_inventory_data(data):
+    """Validate inventory data"""
+    if not data.get("item"):
+        return False, "Item name is required"
+    if not is_positive_number(data.get("quantity")):
+        return False, "Valid quantity is required"
+    message = _invalid_optional_number(data, [("cost_price", "Cost price")])
+    if message:
+        return False, message
+    return True, "Valid"
+
+def validate_expense_data(data):
+    """Validate expense data"""
+    if not is_positive_number(data.get("amount")):
+        return False, "Valid amount is required"
+    if not data.get("description"):
+        return False, "Description is required"
+    return True, "Valid"
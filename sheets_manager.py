@@ -1,30 +1,242 @@
 """
 Google Sheets integration and data management
 """
+import datetime
+import json
+import os
+import threading
+import time
 import pandas as pd
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 import config
+from http_pool import HttpClientPool, authorized_http_factory
+from metrics import registry as metrics, estimate_values_bytes
+from quota import QuotaScheduler, QuotaShedError, QuotaTracker
+from row_tracker import PENDING_ROWS
+from snapshot import SnapshotRefresher, build_snapshot
+from stock_ledger import StockLedger
+from chart_data import ChartCache
+from forecasting import DemandForecast
+from gst_reports import GstLedger
+from search import SEARCH_FIELDS, SearchIndex, normalize
+from topk import CUSTOMER_REVENUE, ITEM_COUNT, SalesLeaderboard
+from wal import WalReplayer, WriteAheadLog
 
 logger = config.get_logger(__name__)
 
+def a1_range(sheet_name, cell_range=None):
+    """A1 notation for a sheet (quoted if the name has spaces) and optional cells"""
+    if not sheet_name.replace("_", "").isalnum():
+        sheet_name = "'" + sheet_name.replace("'", "''") + "'"
+    return f"{sheet_name}!{cell_range}" if cell_range else sheet_name
+
+
+_discovery_lock = threading.Lock()
+_discovery_document = None
+
+
+def _load_discovery_document():
+    """Return the Sheets v4 discovery document, cached locally and in memory
+
+    Uses config.SHEETS_DISCOVERY_FILE if present, otherwise the document
+    bundled with google-api-python-client (written to the cache file for next
+    time), so building the service never fetches it over the network.
+    """
+    global _discovery_document
+    with _discovery_lock:
+        if _discovery_document is not None:
+            return _discovery_document
+
+        path = config.SHEETS_DISCOVERY_FILE
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                _discovery_document = f.read()
+            return _discovery_document
+
+        from googleapiclient import discovery_cache
+        document = discovery_cache.get_static_doc("sheets", "v4")
+        if document is None:
+            # Very old client libraries don't bundle documents; fetch once
+            import httplib2
+            from googleapiclient.discovery import DISCOVERY_URI
+            _, content = httplib2.Http().request(DISCOVERY_URI.format(api="sheets", apiVersion="v4"))
+            document = content.decode("utf-8")
+            json.loads(document)  # don't cache an error page
+
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(document)
+        except OSError as e:
+            logger.warning(f"Could not write discovery cache {path}: {e}")
+
+        _discovery_document = document
+        return _discovery_document
+
+
 class SheetsManager:
     """Manages all Google Sheets operations"""
 
-    def __init__(self):
-        """Initialize Google Sheets connection"""
-        self.sheets = None
-        self._initialize_sheets()
+    def __init__(self, sheets=None, lazy=False, spreadsheet_id=None, scheduler=None):
+        """Initialize Google Sheets connection
+
+        An existing spreadsheets() resource (e.g. fake_sheets.FakeSpreadsheets)
+        can be passed in to skip authentication; such managers are not
+        quota-limited unless a QuotaScheduler is passed too. With lazy=True the
+        API client is only built on the first request, keeping app cold start
+        fast. spreadsheet_id defaults to config.GOOGLE_SHEET_ID.
+        """
+        self.spreadsheet_id = spreadsheet_id or config.GOOGLE_SHEET_ID
+        self._sheets = sheets
+        self._http_pool = None
+        self._scheduler = scheduler
+        self._parent = None
+        self._init_lock = threading.Lock()
+
+        # Per-spreadsheet read cache and quota accounting
+        self.quota = QuotaTracker()
+        self._cache_lock = threading.Lock()
+        self._read_cache = {}
+        self._stale = {}
+        self._generations = {}
+        self._data_version = 0
+
+        # Optional background refresher publishing dashboard snapshots
+        self._refresher = None
+        # Built chart figures, keyed by snapshot version
+        self.charts = ChartCache()
+
+        # Set once the Stock Movements tab is known to exist
+        self._movements_ready = False
+        self._ledger = None
+        self._forecast = None
+        self._leaderboard = None
+        self._gst = None
+        self._search = SearchIndex()
+
+        # Optional write-ahead log for sales and expenses
+        self.wal = None
+        self._wal_replayer = None
+
+        if self._sheets is None and not lazy:
+            self._initialize_sheets()
+
+    def for_spreadsheet(self, spreadsheet_id):
+        """Return a manager for another spreadsheet sharing this API client and HTTP pool
+
+        The new manager has its own read cache and quota accounting.
+        """
+        manager = SheetsManager(sheets=self._sheets, lazy=True, spreadsheet_id=spreadsheet_id,
+                                scheduler=self._scheduler)
+        manager._parent = self._parent or self
+        return manager
+
+    def enable_write_ahead_log(self, path=None, directory=None):
+        """Capture sales and expenses in a local WAL and replay them in the background
+
+        The log defaults to <directory>/<spreadsheet id>.log, with directory
+        defaulting to config.WAL_DIR.
+        """
+        if self.wal is not None:
+            return
+        path = path or os.path.join(directory or config.WAL_DIR, f"{self.spreadsheet_id}.log")
+        self.wal = WriteAheadLog(path)
+        self._wal_replayer = WalReplayer(self, self.wal)
+        self._wal_replayer.start()
+        if self.wal.pending():
+            self._wal_replayer.notify()
+
+    def has_pending_writes(self):
+        return self.wal is not None and bool(self.wal.pending())
+
+    def flush_writes(self, timeout=None):
+        """Wait until all WAL entries have been replayed to Google Sheets"""
+        if self._wal_replayer is None:
+            return True
+        return self._wal_replayer.wait_idle(timeout)
+
+    def enable_background_refresh(self, interval=None):
+        """Keep a precomputed DashboardSnapshot warm in a background thread"""
+        if self._refresher is not None:
+            return
+        self._refresher = SnapshotRefresher(self, interval)
+        self._refresher.start()
+
+    def snapshot(self):
+        """Latest dashboard snapshot, built synchronously only if none exists yet"""
+        if self._refresher is None:
+            return build_snapshot(self, self.data_version)
+        return self._refresher.latest() or self._refresher.refresh()
+
+    @property
+    def data_version(self):
+        """Counter bumped whenever data read or written through this manager changes"""
+        with self._cache_lock:
+            return self._data_version
+
+    def _mark_changed(self):
+        with self._cache_lock:
+            self._data_version += 1
+        if self._refresher is not None:
+            self._refresher.notify()
+
+    @property
+    def refreshing(self):
+        """Whether a background snapshot refresher is running"""
+        return self._refresher is not None
+
+    def disable_background_refresh(self):
+        if self._refresher is not None:
+            self._refresher.stop()
+            self._refresher = None
+
+    def close(self):
+        """Stop background workers, flushing pending writes first"""
+        self.disable_background_refresh()
+        if self._wal_replayer is not None:
+            self._wal_replayer.stop(flush=True)
+            self._wal_replayer = None
+            self.wal.close()
+            self.wal = None
+
+    @property
+    def sheets(self):
+        """spreadsheets() resource, built on first use"""
+        if self._sheets is None:
+            if self._parent is not None:
+                return self._parent.sheets
+            with self._init_lock:
+                if self._sheets is None:
+                    self._initialize_sheets()
+        return self._sheets
+
+    @property
+    def http_pool(self):
+        return self._parent.http_pool if self._parent is not None else self._http_pool
+
+    @property
+    def scheduler(self):
+        """QuotaScheduler shared by every spreadsheet using this API client"""
+        return self._parent.scheduler if self._parent is not None else self._scheduler
 
     def _initialize_sheets(self):
         """Initialize Google Sheets API connection"""
         try:
+            # Deferred imports: google-auth and the discovery module add
+            # noticeably to import time and are only needed once
+            from google.oauth2 import service_account
+            from googleapiclient.discovery import build_from_document
+
             creds = service_account.Credentials.from_service_account_file(
                 config.CREDENTIALS_FILE,
                 scopes=["https://www.googleapis.com/auth/spreadsheets"]
             )
-            self.sheets = build("sheets", "v4", credentials=creds).spreadsheets()
+            # The service object only builds requests; each request is
+            # executed on an HTTP client leased from the pool
+            self._http_pool = HttpClientPool(authorized_http_factory(creds))
+            if self._scheduler is None:
+                self._scheduler = QuotaScheduler()
+            self._sheets = build_from_document(_load_discovery_document(), credentials=creds).spreadsheets()
             logger.info("Google Sheets API initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize Google Sheets: {e}")
@@ -32,15 +244,102 @@ class SheetsManager:
 
     # ===================== GENERIC OPERATIONS =====================
 
+    def _execute(self, operation, request, rows=0, nbytes=0, timeout=None):
+        """Execute an API request under quota control
+
+        Rate-limited calls are queued and retried by the scheduler. `timeout`
+        bounds the wait for read quota (QuotaShedError when it expires).
+        """
+        kind = "read" if operation.startswith("read") else "write"
+        self.quota.record(kind)
+        scheduler = self.scheduler
+        if scheduler is None:
+            return self._send(operation, request, rows, nbytes)
+        return scheduler.call(kind, lambda: self._send(operation, request, rows, nbytes), timeout=timeout)
+
+    def _send(self, operation, request, rows=0, nbytes=0):
+        """Execute one API round trip, recording latency, size and errors"""
+        http_pool = self.http_pool
+        with metrics.timer(f"sheets.{operation}") as stats:
+            if http_pool is not None:
+                with http_pool.lease() as http:
+                    result = request.execute(http=http)
+            else:
+                result = request.execute()
+            values = result.get("values") if isinstance(result, dict) else None
+            if isinstance(result, dict) and "valueRanges" in result:
+                ranges = [r.get("values", []) for r in result["valueRanges"]]
+                stats["rows"] = sum(len(v) for v in ranges)
+                stats["bytes"] = sum(estimate_values_bytes(v) for v in ranges)
+            elif values is not None:
+                stats["rows"] = len(values)
+                stats["bytes"] = estimate_values_bytes(values)
+            else:
+                stats["rows"] = rows
+                stats["bytes"] = nbytes
+            return result
+
+    # ===================== READ CACHE =====================
+
+    def _cached_values(self, sheet_name):
+        """Return cached raw values for a sheet if still fresh"""
+        ttl = config.SHEETS_READ_CACHE_TTL
+        if ttl <= 0:
+            return None
+        with self._cache_lock:
+            entry = self._read_cache.get(sheet_name)
+        if entry and time.monotonic() - entry[0] < ttl:
+            return entry[1]
+        return None
+
+    def _cache_generation(self, sheet_name):
+        with self._cache_lock:
+            return self._generations.get(sheet_name, 0)
+
+    def _store_values(self, sheet_name, values, fetched_at, generation):
+        """Cache values unless the sheet was written to while they were being fetched"""
+        with self._cache_lock:
+            previous = self._read_cache.get(sheet_name) or self._stale.get(sheet_name)
+            if previous is None or previous[1] != values:
+                self._data_version += 1
+            if self._generations.get(sheet_name, 0) == generation:
+                self._read_cache[sheet_name] = (fetched_at, values)
+
+    def _stale_values(self, sheet_name):
+        """Last values read for a sheet regardless of age or later writes"""
+        with self._cache_lock:
+            entry = self._read_cache.get(sheet_name) or self._stale.get(sheet_name)
+        return entry[1] if entry else None
+
+    def invalidate(self, sheet_name=None, keep_stale=True):
+        """Drop cached reads for one sheet, or for all sheets
+
+        The dropped values are kept as a stale fallback for reads shed under
+        quota pressure unless keep_stale is False.
+        """
+        with self._cache_lock:
+            names = list(self._read_cache) + list(self._generations) if sheet_name is None else [sheet_name]
+            for name in set(names):
+                entry = self._read_cache.pop(name, None)
+                if not keep_stale:
+                    self._stale.pop(name, None)
+                elif entry:
+                    self._stale[name] = entry
+                self._generations[name] = self._generations.get(name, 0) + 1
+        if self._refresher is not None:
+            # Re-read soon; the version moves once the new values differ
+            self._refresher.notify()
+
     def append_row(self, sheet_name, values):
         """Append a row to the specified sheet"""
+        self.invalidate(sheet_name)
         try:
-            self.sheets.values().append(
-                spreadsheetId=config.GOOGLE_SHEET_ID,
-                range=sheet_name,
+            self._execute("append_row", self.sheets.values().append(
+                spreadsheetId=self.spreadsheet_id,
+                range=a1_range(sheet_name),
                 valueInputOption="USER_ENTERED",
                 body={"values": [values]}
-            ).execute()
+            ), rows=1, nbytes=estimate_values_bytes([values]))
             logger.info(f"Appended row to {sheet_name}: {values}")
             return True
         except HttpError as e:
@@ -50,21 +349,95 @@ class SheetsManager:
             logger.error(f"Unexpected error in append_row: {e}")
             return False
 
+    def append_rows(self, sheet_name, rows, batch_size=None):
+        """Append many rows to the specified sheet using chunked batch requests"""
+        batch_size = batch_size or config.SHEETS_APPEND_BATCH_SIZE
+        rows = [list(row) for row in rows]
+        self.invalidate(sheet_name)
+        appended = 0
+
+        for start in range(0, len(rows), batch_size):
+            chunk = rows[start:start + batch_size]
+            try:
+                self._execute("append_rows", self.sheets.values().append(
+                    spreadsheetId=self.spreadsheet_id,
+                    range=a1_range(sheet_name),
+                    valueInputOption="USER_ENTERED",
+                    insertDataOption="INSERT_ROWS",
+                    body={"values": chunk}
+                ), rows=len(chunk), nbytes=estimate_values_bytes(chunk))
+                appended += len(chunk)
+                logger.info(f"Appended {len(chunk)} rows to {sheet_name} ({appended}/{len(rows)})")
+            except HttpError as e:
+                logger.error(f"Failed to bulk append to {sheet_name} after {appended} rows: {e}")
+                break
+            except Exception as e:
+                logger.error(f"Unexpected error in append_rows: {e}")
+                break
+
+        return appended
+
+    def _append_durable(self, sheet_name, values):
+        """Append through the write-ahead log when enabled, else directly"""
+        if self.wal is None:
+            return self.append_row(sheet_name, values)
+        try:
+            self.wal.append(sheet_name, values)
+        except OSError as e:
+            logger.error(f"WAL write failed, appending directly: {e}")
+            return self.append_row(sheet_name, values)
+        self._wal_replayer.notify()
+        # Pending WAL rows are merged into reads, so the data changed already
+        self._mark_changed()
+        return True
+
+    def _append_many_durable(self, sheet_name, rows):
+        """Append several rows through the write-ahead log, else as one batch
+
+        Returns the number of rows accepted.
+        """
+        if not rows:
+            return 0
+        if self.wal is None:
+            return self.append_rows(sheet_name, rows)
+        logged = 0
+        try:
+            for values in rows:
+                self.wal.append(sheet_name, values)
+                logged += 1
+        except OSError as e:
+            logger.error(f"WAL write failed, appending directly: {e}")
+            return logged + self.append_rows(sheet_name, rows[logged:])
+        finally:
+            if logged:
+                self._wal_replayer.notify()
+                self._mark_changed()
+        return logged
+
     def read_sheet(self, sheet_name):
         """Read data from the specified sheet"""
         try:
-            result = self.sheets.values().get(
-                spreadsheetId=config.GOOGLE_SHEET_ID,
-                range=sheet_name
-            ).execute()
+            values = self._cached_values(sheet_name)
+            if values is None:
+                # With a stale copy to fall back on, don't queue behind
+                # exhausted read quota for long
+                stale = self._stale_values(sheet_name)
+                timeout = config.SHEETS_READ_MAX_WAIT if stale is not None else None
+                generation = self._cache_generation(sheet_name)
+                fetched_at = time.monotonic()
+                try:
+                    result = self._execute("read_sheet", self.sheets.values().get(
+                        spreadsheetId=self.spreadsheet_id,
+                        range=a1_range(sheet_name)
+                    ), timeout=timeout)
+                    values = result.get("values", [])
+                    self._store_values(sheet_name, values, fetched_at, generation)
+                except QuotaShedError:
+                    logger.warning(f"Read quota exhausted; serving stale {sheet_name}")
+                    metrics.observe("sheets.read_sheet_stale", 0.0)
+                    values = stale
 
-            values = result.get("values", [])
-            if len(values) < 2:
-                return pd.DataFrame()
-
-            df = pd.DataFrame(values[1:], columns=values[0])
-            logger.info(f"Read {len(df)} rows from {sheet_name}")
-            return df
+            return self._values_to_frame(sheet_name, values)
         except HttpError as e:
             logger.error(f"Failed to read {sheet_name}: {e}")
             return pd.DataFrame()
@@ -72,15 +445,76 @@ class SheetsManager:
             logger.error(f"Unexpected error in read_sheet: {e}")
             return pd.DataFrame()
 
+    def read_sheets(self, sheet_names):
+        """Read several sheets with a single batchGet request
+
+        Returns {sheet_name: DataFrame}. Fresh cached sheets are not refetched.
+        Falls back to one read per sheet if the batch request fails (for
+        example when one of the tabs doesn't exist).
+        """
+        values_by_sheet = {}
+        missing = []
+        for name in sheet_names:
+            values = self._cached_values(name)
+            if values is None:
+                missing.append(name)
+            else:
+                values_by_sheet[name] = values
+
+        if missing:
+            generations = {name: self._cache_generation(name) for name in missing}
+            fetched_at = time.monotonic()
+            try:
+                result = self._execute("read_sheets", self.sheets.values().batchGet(
+                    spreadsheetId=self.spreadsheet_id,
+                    ranges=[a1_range(name) for name in missing]
+                ))
+                for name, value_range in zip(missing, result.get("valueRanges", [])):
+                    values = value_range.get("values", [])
+                    self._store_values(name, values, fetched_at, generations[name])
+                    values_by_sheet[name] = values
+            except Exception as e:
+                logger.warning(f"Batch read of {missing} failed, reading sheets one by one: {e}")
+                frames = {name: self.read_sheet(name) for name in missing}
+                frames.update({name: self._values_to_frame(name, v) for name, v in values_by_sheet.items()})
+                return {name: frames[name] for name in sheet_names}
+
+        return {name: self._values_to_frame(name, values_by_sheet.get(name, [])) for name in sheet_names}
+
+    def _values_to_frame(self, sheet_name, values):
+        """Build a DataFrame from raw values, including rows pending in the WAL"""
+        pending = []
+        if self.wal is not None and values:
+            # Include captured rows not yet replayed to the sheet
+            pending = self.wal.pending_rows(sheet_name)
+            if pending:
+                values = values + [[str(v) for v in row] for row in pending]
+
+        if len(values) < 2:
+            return pd.DataFrame()
+
+        # The API drops trailing empty cells, so rows can be shorter than the
+        # header (e.g. rows written before the WAL id column was added)
+        width = len(values[0])
+        rows = [row[:width] + [None] * (width - len(row)) for row in values[1:]]
+        df = pd.DataFrame(rows, columns=values[0])
+        # WAL idempotency keys are bookkeeping, not data
+        df = df.drop(columns=[config.WAL_ID_COLUMN], errors="ignore")
+        # Incremental aggregates fold only the rows already in the sheet
+        df.attrs[PENDING_ROWS] = len(pending)
+        logger.info(f"Read {len(df)} rows from {sheet_name}")
+        return df
+
     def update_cell(self, sheet_name, cell_range, value):
         """Update a specific cell"""
+        self.invalidate(sheet_name)
         try:
-            self.sheets.values().update(
-                spreadsheetId=config.GOOGLE_SHEET_ID,
-                range=f"{sheet_name}!{cell_range}",
+            self._execute("update_cell", self.sheets.values().update(
+                spreadsheetId=self.spreadsheet_id,
+                range=a1_range(sheet_name, cell_range),
                 valueInputOption="USER_ENTERED",
                 body={"values": [[value]]}
-            ).execute()
+            ), rows=1, nbytes=len(str(value)))
             logger.info(f"Updated {sheet_name}!{cell_range} to {value}")
             return True
         except Exception as e:
@@ -90,8 +524,63 @@ class SheetsManager:
     # ===================== SALES OPERATIONS =====================
 
     def add_sale(self, date, item, quantity, selling_price, cost_price, customer, gst_rate=0):
-        """Add a sale record - optimized structure"""
-        values = [
+        """Add a sale record - optimized structure
+
+        Item and customer names that differ from an already indexed one only
+        in case, spacing or plural (e.g. "kurtis" for "Kurti") are stored
+        under the existing spelling.
+        """
+        item = self._canonical_name(item, "Item", config.SHEET_INVENTORY)
+        if customer:
+            customer = self._canonical_name(customer, "Customer", config.SHEET_CUSTOMERS)
+        values = self.sale_row(date, item, quantity, selling_price, cost_price, customer, gst_rate)
+        return self._append_durable(config.SHEET_SALES, values)
+
+    def add_sales(self, sales):
+        """Record many sales with one append per sheet
+
+        `sales` is a list of dicts with add_sale's arguments as keys. Stock
+        is deducted for items found in Inventory and customers not yet in
+        Customers are added. Returns the number of sales recorded.
+        """
+        if not sales:
+            return 0
+        inventory_df = self.get_inventory()
+        customers_df = self.read_sheet(config.SHEET_CUSTOMERS)
+        stocked = set(inventory_df["Item"].str.lower()) if "Item" in inventory_df.columns else set()
+        known = set(customers_df["Name"].str.lower()) if "Name" in customers_df.columns else set()
+
+        sale_rows, movements, new_customers = [], [], {}
+        now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        for position, sale in enumerate(sales):
+            item = self._canonical_name(sale["item"], "Item", config.SHEET_INVENTORY, inventory_df)
+            customer = sale.get("customer") or ""
+            if customer:
+                customer = self._canonical_name(customer, "Customer", config.SHEET_CUSTOMERS, customers_df)
+                if customer.lower() not in known:
+                    new_customers.setdefault(customer.lower(), [customer, "", "", ""])
+            sale_rows.append(self.sale_row(
+                sale["date"], item, sale["quantity"], sale["selling_price"],
+                sale.get("cost_price"), customer, sale.get("gst_rate", 0)
+            ))
+            if item.lower() in stocked:
+                movements.append((position, [now, item, -float(sale["quantity"]), "sale"]))
+
+        recorded = self._append_many_durable(config.SHEET_SALES, sale_rows)
+        # Only deduct stock for the sales that made it in
+        movements = [row for position, row in movements if position < recorded]
+        if movements:
+            self.ensure_stock_movements_sheet()
+            self._append_many_durable(config.SHEET_STOCK_MOVEMENTS, movements)
+        if recorded and new_customers:
+            self.append_rows(config.SHEET_CUSTOMERS, list(new_customers.values()))
+        logger.info(f"Recorded {recorded}/{len(sales)} sales in one batch")
+        return recorded
+
+    @staticmethod
+    def sale_row(date, item, quantity, selling_price, cost_price, customer, gst_rate=0):
+        """Build a Sales sheet row in column order"""
+        return [
             date,
             str(item),
             float(quantity),
@@ -101,11 +590,13 @@ class SheetsManager:
             float(gst_rate)
         ]
 
-        return self.append_row(config.SHEET_SALES, values)
+    def get_sales(self, df=None):
+        """Get all sales records with calculated fields
 
-    def get_sales(self):
-        """Get all sales records with calculated fields"""
-        df = self.read_sheet(config.SHEET_SALES)
+        `df` may be a raw Sales frame already read (e.g. via read_sheets).
+        """
+        if df is None:
+            df = self.read_sheet(config.SHEET_SALES)
         if not df.empty and "Selling Price" in df.columns:
             # Convert numeric columns
             numeric_cols = ["Quantity", "Selling Price", "Cost Price", "GST Rate"]
@@ -116,101 +607,206 @@ class SheetsManager:
             # Calculate derived columns dynamically
             df["GST Amount"] = (df["Selling Price"] * df["Quantity"] * df["GST Rate"]) / 100
             df["Total Amount"] = (df["Selling Price"] * df["Quantity"]) + df["GST Amount"]
+            if "Cost Price" in df.columns:
+                df["COGS"] = df["Cost Price"] * df["Quantity"]
         return df
 
     # ===================== INVENTORY OPERATIONS =====================
 
     def add_or_update_inventory(self, item, quantity, cost_price):
-        """Add new item or update existing inventory"""
-        inventory_df = self.read_sheet(config.SHEET_INVENTORY)
+        """Add new item or restock an existing one"""
+        inventory_df = self.get_inventory()
 
         # Check if item exists
         if not inventory_df.empty and "Item" in inventory_df.columns:
-            item_exists = any(inventory_df["Item"].str.lower() == item.lower())
-
-            if item_exists:
-                # Update existing item
-                result = self.sheets.values().get(
-                    spreadsheetId=config.GOOGLE_SHEET_ID,
-                    range=config.SHEET_INVENTORY
-                ).execute()
-                values = result.get("values", [])
+            item = self._canonical_name(item, "Item", config.SHEET_INVENTORY, inventory_df)
+            matches = inventory_df[inventory_df["Item"].str.lower() == item.lower()]
 
-                for idx, row in enumerate(values[1:], start=2):
-                    if len(row) > 0 and row[0].lower() == item.lower():
-                        current_stock = float(row[1]) if len(row) > 1 else 0
-                        new_stock = current_stock + float(quantity)
+            if not matches.empty:
+                current_stock = float(matches["Stock"].iloc[0]) if "Stock" in matches.columns else 0
+                new_stock = current_stock + float(quantity)
 
-                        # Update stock
-                        self.update_cell(config.SHEET_INVENTORY, f"B{idx}", new_stock)
+                # Restocks go to the movement log, never overwriting the Stock cell
+                if not self.record_stock_movement(item, float(quantity), "restock"):
+                    return False, current_stock, current_stock
 
-                        # Update cost price if provided
-                        if cost_price:
+                # Update cost price if provided
+                if cost_price:
+                    result = self._execute("read_rows", self.sheets.values().get(
+                        spreadsheetId=self.spreadsheet_id,
+                        range=config.SHEET_INVENTORY
+                    ))
+                    for idx, row in enumerate(result.get("values", [])[1:], start=2):
+                        if len(row) > 0 and row[0].lower() == item.lower():
                             self.update_cell(config.SHEET_INVENTORY, f"C{idx}", float(cost_price))
+                            break
 
-                        logger.info(f"Updated inventory: {item} {current_stock} → {new_stock}")
-                        return True, new_stock, current_stock
+                logger.info(f"Updated inventory: {item} {current_stock} → {new_stock}")
+                return True, new_stock, current_stock
 
-        # Add new item
-        return self.append_row(
+        # Add new item with an opening Stock of 0; the first delivery is a
+        # dated movement, so stock history before today shows none
+        if not self.append_row(
             config.SHEET_INVENTORY,
-            [str(item), float(quantity), float(cost_price) if cost_price else ""]
-        ), quantity, 0
+            [str(item), 0.0, float(cost_price) if cost_price else ""]
+        ):
+            return False, 0, 0
+        return self.record_stock_movement(item, float(quantity), "restock"), quantity, 0
 
     def update_inventory_stock(self, item, quantity_sold):
-        """Deduct sold quantity from inventory"""
+        """Deduct sold quantity from inventory
+
+        The deduction is appended to the Stock Movements sheet instead of
+        rewriting the Stock cell, so concurrent sales of the same item can't
+        lose each other's updates.
+        """
         try:
-            result = self.sheets.values().get(
-                spreadsheetId=config.GOOGLE_SHEET_ID,
-                range=config.SHEET_INVENTORY
-            ).execute()
-            values = result.get("values", [])
-
-            for idx, row in enumerate(values[1:], start=2):
-                if len(row) > 0 and row[0].lower() == item.lower():
-                    current_stock = float(row[1]) if len(row) > 1 else 0
-                    new_stock = current_stock - float(quantity_sold)
-
-                    # Warn if stock goes negative
-                    if new_stock < 0:
-                        logger.warning(f"⚠️ Stock going negative for {item}: {current_stock} → {new_stock}")
-
-                    self.update_cell(config.SHEET_INVENTORY, f"B{idx}", new_stock)
-                    logger.info(f"Deducted inventory: {item} {current_stock} → {new_stock}")
-                    return True, new_stock
-
-            logger.warning(f"Item '{item}' not found in inventory - cannot deduct stock")
-            return False, 0
+            inventory_df = self.get_inventory()
+            matches = pd.DataFrame()
+            if not inventory_df.empty and "Item" in inventory_df.columns:
+                item = self._canonical_name(item, "Item", config.SHEET_INVENTORY, inventory_df)
+                matches = inventory_df[inventory_df["Item"].str.lower() == item.lower()]
+
+            if matches.empty:
+                logger.warning(f"Item '{item}' not found in inventory - cannot deduct stock")
+                return False, 0
+
+            current_stock = float(matches["Stock"].iloc[0]) if "Stock" in matches.columns else 0
+            new_stock = current_stock - float(quantity_sold)
+
+            # Warn if stock goes negative
+            if new_stock < 0:
+                logger.warning(f"⚠️ Stock going negative for {item}: {current_stock} → {new_stock}")
+
+            if not self.record_stock_movement(item, -float(quantity_sold), "sale"):
+                return False, current_stock
+            logger.info(f"Deducted inventory: {item} {current_stock} → {new_stock}")
+            return True, new_stock
         except Exception as e:
             logger.error(f"Failed to update inventory: {e}")
             return False, 0
 
-    def get_inventory(self):
-        """Get all inventory records"""
-        df = self.read_sheet(config.SHEET_INVENTORY)
+    def get_inventory(self, df=None, movements_df=None):
+        """Get all inventory records with current stock
+
+        Current stock is the opening balance in Inventory plus the net of all
+        Stock Movements for the item. Raw frames already read (e.g. via
+        read_sheets) may be passed in.
+        """
+        if df is None:
+            df = self.read_sheet(config.SHEET_INVENTORY)
         if not df.empty:
             if "Stock" in df.columns:
                 df["Stock"] = pd.to_numeric(df["Stock"], errors="coerce").fillna(0)
+                movements = self.get_stock_movements(movements_df)
+                if not movements.empty and "Item" in df.columns:
+                    net = movements.groupby(movements["Item"].str.lower())["Change"].sum()
+                    df["Stock"] = df["Stock"] + df["Item"].str.lower().map(net).fillna(0)
             if "Cost Price" in df.columns:
                 df["Cost Price"] = pd.to_numeric(df["Cost Price"], errors="coerce").fillna(0)
         return df
 
+    # ===================== STOCK MOVEMENTS =====================
+
+    STOCK_MOVEMENTS_HEADER = ["Timestamp", "Item", "Change", "Reason"]
+
+    def record_stock_movement(self, item, change, reason):
+        """Append a signed stock change (e.g. -2 for a sale, +20 for a restock)"""
+        self.ensure_stock_movements_sheet()
+        values = [
+            datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            str(item),
+            float(change),
+            str(reason)
+        ]
+        return self._append_durable(config.SHEET_STOCK_MOVEMENTS, values)
+
+    def record_stock_adjustment(self, item, change, reason="adjustment"):
+        """Correct stock after a count, damage or return without editing history"""
+        return self.record_stock_movement(item, change, reason)
+
+    def get_stock_ledger(self):
+        """StockLedger for point-in-time stock and turnover queries, updated with new rows"""
+        sheet_names = [config.SHEET_INVENTORY]
+        if self.ensure_stock_movements_sheet():
+            sheet_names.append(config.SHEET_STOCK_MOVEMENTS)
+        frames = self.read_sheets(sheet_names)
+        if self._ledger is None:
+            self._ledger = StockLedger()
+        return self._ledger.update(frames[config.SHEET_INVENTORY],
+                                   frames.get(config.SHEET_STOCK_MOVEMENTS, pd.DataFrame()))
+
+    def get_stock_movements(self, df=None):
+        """Get all stock movements"""
+        if df is None:
+            self.ensure_stock_movements_sheet()
+            df = self.read_sheet(config.SHEET_STOCK_MOVEMENTS)
+        if not df.empty and "Change" in df.columns and "Item" in df.columns:
+            df["Change"] = pd.to_numeric(df["Change"], errors="coerce").fillna(0)
+            return df
+        return pd.DataFrame()
+
+    def ensure_stock_movements_sheet(self):
+        """Create the Stock Movements tab and its header on first use
+
+        Returns True once the tab is known to exist.
+        """
+        if self._movements_ready:
+            return True
+        sheet_name = config.SHEET_STOCK_MOVEMENTS
+        try:
+            try:
+                result = self._execute("read_rows", self.sheets.values().get(
+                    spreadsheetId=self.spreadsheet_id,
+                    range=a1_range(sheet_name, "A1:D1")
+                ))
+                has_header = bool(result.get("values"))
+            except HttpError:
+                # Missing tab: the range can't be parsed
+                self._execute("add_sheet", self.sheets.batchUpdate(
+                    spreadsheetId=self.spreadsheet_id,
+                    body={"requests": [{"addSheet": {"properties": {"title": sheet_name}}}]}
+                ))
+                has_header = False
+            if not has_header:
+                self.append_row(sheet_name, self.STOCK_MOVEMENTS_HEADER)
+            self._movements_ready = True
+        except Exception as e:
+            # Movements still go to the WAL; replay retries once the tab exists
+            logger.error(f"Failed to prepare {sheet_name} sheet: {e}")
+        return self._movements_ready
+
     # ===================== EXPENSE OPERATIONS =====================
 
     def add_expense(self, date, category, description, amount, payment_method="Cash"):
         """Add an expense record"""
-        values = [
+        values = self.expense_row(date, category, description, amount, payment_method)
+        return self._append_durable(config.SHEET_EXPENSES, values)
+
+    def add_expenses(self, expenses):
+        """Record many expenses (dicts of add_expense's arguments) in one append"""
+        rows = [
+            self.expense_row(e["date"], e["category"], e["description"], e["amount"],
+                             e.get("payment_method", "Cash"))
+            for e in expenses
+        ]
+        return self._append_many_durable(config.SHEET_EXPENSES, rows)
+
+    @staticmethod
+    def expense_row(date, category, description, amount, payment_method="Cash"):
+        """Build an Expenses sheet row in column order"""
+        return [
             date,
             str(category),
             str(description),
             float(amount),
             str(payment_method)
         ]
-        return self.append_row(config.SHEET_EXPENSES, values)
 
-    def get_expenses(self):
+    def get_expenses(self, df=None):
         """Get all expense records"""
-        df = self.read_sheet(config.SHEET_EXPENSES)
+        if df is None:
+            df = self.read_sheet(config.SHEET_EXPENSES)
         if not df.empty and "Amount" in df.columns:
             df["Amount"] = pd.to_numeric(df["Amount"], errors="coerce").fillna(0)
         return df
@@ -223,14 +819,15 @@ class SheetsManager:
 
         # Check if customer exists
         if not customers_df.empty and "Name" in customers_df.columns:
+            name = self._canonical_name(name, "Customer", config.SHEET_CUSTOMERS, customers_df)
             customer_exists = any(customers_df["Name"].str.lower() == name.lower())
 
             if customer_exists:
                 # Update existing customer
-                result = self.sheets.values().get(
-                    spreadsheetId=config.GOOGLE_SHEET_ID,
+                result = self._execute("read_rows", self.sheets.values().get(
+                    spreadsheetId=self.spreadsheet_id,
                     range=config.SHEET_CUSTOMERS
-                ).execute()
+                ))
                 values = result.get("values", [])
 
                 for idx, row in enumerate(values[1:], start=2):
@@ -254,25 +851,78 @@ class SheetsManager:
         """Get all customer records"""
         return self.read_sheet(config.SHEET_CUSTOMERS)
 
+    # ===================== SEARCH =====================
+
+    def get_search_index(self, frames=None):
+        """Trigram index over items, customers and expenses, updated with new rows
+
+        `frames` maps sheet names to frames already read (e.g. by the snapshot).
+        """
+        if frames is None:
+            frames = self.read_sheets(tuple(SEARCH_FIELDS))
+        for sheet_name in SEARCH_FIELDS:
+            if sheet_name in frames:
+                self._search.update(sheet_name, frames[sheet_name])
+        return self._search
+
+    def _canonical_name(self, name, field, sheet_name, df=None):
+        """Existing spelling of `name` if the sheet already has the same name
+
+        Only case, spacing, punctuation and plural differences are merged
+        (search.name_key); anything else, however similar, is kept as typed
+        (see name_suggestions). `df` refreshes the index from that sheet
+        first; without it only values indexed so far are considered.
+        """
+        try:
+            if df is not None:
+                self._search.update(sheet_name, df)
+            match = self._search.same_name(field, name, sheet_name)
+        except Exception as e:
+            logger.warning(f"Name matching failed for '{name}': {e}")
+            return name
+        if match is None:
+            return name
+        if normalize(match.text) != normalize(name):
+            logger.info(f"Matched {field.lower()} '{name}' to existing '{match.text}'")
+        return match.text
+
+    def name_suggestions(self, name, field, sheet_name, limit=3):
+        """Existing names similar to a new `name`, for "did you mean" hints
+
+        Empty when the sheet already has the same name (see _canonical_name).
+        """
+        try:
+            if self._search.same_name(field, name, sheet_name) is not None:
+                return []
+            return [match.text for match in self._search.similar(field, name, sheet_name, limit)]
+        except Exception as e:
+            logger.warning(f"Name suggestions failed for '{name}': {e}")
+            return []
+
     # ===================== ANALYTICS =====================
+    # Each method accepts already-loaded frames so callers computing several
+    # metrics (e.g. the snapshot refresher) read every sheet only once.
 
-    def get_total_revenue(self):
+    def get_total_revenue(self, sales_df=None):
         """Calculate total revenue from sales"""
-        sales_df = self.get_sales()
+        if sales_df is None:
+            sales_df = self.get_sales()
         if not sales_df.empty and "Total Amount" in sales_df.columns:
             return sales_df["Total Amount"].sum()
         return 0
 
-    def get_total_expenses(self):
+    def get_total_expenses(self, expenses_df=None):
         """Calculate total expenses"""
-        expenses_df = self.get_expenses()
+        if expenses_df is None:
+            expenses_df = self.get_expenses()
         if not expenses_df.empty and "Amount" in expenses_df.columns:
             return expenses_df["Amount"].sum()
         return 0
 
-    def get_profit(self):
+    def get_profit(self, sales_df=None, expenses_df=None):
         """Calculate profit (Revenue - Cost of Goods Sold - Expenses)"""
-        sales_df = self.get_sales()
+        if sales_df is None:
+            sales_df = self.get_sales()
         total_cost_of_goods_sold = 0
         total_revenue = 0
 
@@ -282,13 +932,12 @@ class SheetsManager:
                 total_revenue = sales_df["Total Amount"].sum()
 
             # Cost of Goods Sold = Sum of (Cost Price × Quantity) for each sale
-            if "Cost Price" in sales_df.columns and "Quantity" in sales_df.columns:
-                # Only calculate for rows where Cost Price is not empty/zero
-                sales_df_copy = sales_df.copy()
-                sales_df_copy["COGS"] = sales_df_copy["Cost Price"] * sales_df_copy["Quantity"]
-                total_cost_of_goods_sold = sales_df_copy["COGS"].sum()
+            if "COGS" in sales_df.columns:
+                total_cost_of_goods_sold = sales_df["COGS"].sum()
+            elif "Cost Price" in sales_df.columns and "Quantity" in sales_df.columns:
+                total_cost_of_goods_sold = (sales_df["Cost Price"] * sales_df["Quantity"]).sum()
 
-        total_expenses = self.get_total_expenses()
+        total_expenses = self.get_total_expenses(expenses_df)
 
         # Profit = Revenue - COGS - Operating Expenses
         profit = total_revenue - total_cost_of_goods_sold - total_expenses
@@ -300,26 +949,94 @@ class SheetsManager:
             "profit": profit
         }
 
-    def get_low_stock_items(self, threshold=5):
-        """Get items with stock below threshold"""
-        inventory_df = self.get_inventory()
+    def get_low_stock_items(self, threshold=None, inventory_df=None, sales_df=None):
+        """Get items that need restocking
+
+        By default these are items at or below their sales-velocity based
+        reorder point; with a threshold, items with stock below it.
+        """
+        if threshold is None:
+            plan = self.get_reorder_plan(sales_df, inventory_df)
+            if plan.empty:
+                return plan
+            return plan[plan["Stock"] <= plan["Reorder Point"]].reset_index(drop=True)
+
+        if inventory_df is None:
+            inventory_df = self.get_inventory()
         if not inventory_df.empty and "Stock" in inventory_df.columns:
             low_stock = inventory_df[inventory_df["Stock"] < threshold]
             return low_stock
         return pd.DataFrame()
 
-    def get_top_selling_items(self, limit=5):
-        """Get top selling items"""
-        sales_df = self.get_sales()
-        if not sales_df.empty and "Item" in sales_df.columns:
-            top_items = sales_df["Item"].value_counts().head(limit)
-            return top_items
-        return pd.Series()
+    def get_reorder_plan(self, sales_df=None, inventory_df=None):
+        """Velocity, days of cover and reorder point for every item
+
+        The demand forecast is kept between calls and only folds in new sales.
+        """
+        if sales_df is None:
+            sales_df = self.get_sales()
+        if inventory_df is None:
+            inventory_df = self.get_inventory()
+        if self._forecast is None:
+            self._forecast = DemandForecast()
+        return self._forecast.update(sales_df).plan(inventory_df)
+
+    def get_top_selling_items(self, limit=5, sales_df=None, days=None, by=ITEM_COUNT):
+        """Get top selling items by number of sales (or by="item_revenue")
+
+        `days` limits the ranking to the last 7 or 30 days.
+        """
+        return self.get_leaderboard(sales_df).top(by, limit, days)
 
-    def get_top_customers(self, limit=5):
+    def get_top_customers(self, limit=5, sales_df=None, days=None):
         """Get top customers by total purchase amount"""
-        sales_df = self.get_sales()
-        if not sales_df.empty and "Customer" in sales_df.columns and "Total Amount" in sales_df.columns:
-            customer_totals = sales_df.groupby("Customer")["Total Amount"].sum().sort_values(ascending=False).head(limit)
-            return customer_totals
-        return pd.Series()
+        return self.get_leaderboard(sales_df).top(CUSTOMER_REVENUE, limit, days)
+
+    def get_item_rankings(self, sales_df=None, days=None):
+        """Units, sales, revenue, GST, COGS and margin per item in one groupby
+
+        Revenue includes GST (as in get_profit); Margin is revenue net of GST
+        minus COGS. Sorted by units sold, with a rank column per measure.
+        `days` limits it to sales in the last N days.
+        """
+        if sales_df is None:
+            sales_df = self.get_sales()
+        required = {"Item", "Quantity", "Total Amount", "GST Amount"}
+        if sales_df.empty or not required <= set(sales_df.columns):
+            return pd.DataFrame()
+
+        if days is not None and "Date" in sales_df.columns:
+            dates = pd.to_datetime(sales_df["Date"], errors="coerce")
+            since = pd.Timestamp.today().normalize() - pd.Timedelta(days=days - 1)
+            sales_df = sales_df[dates >= since]
+
+        cogs = sales_df["COGS"] if "COGS" in sales_df.columns else pd.Series(0.0, index=sales_df.index)
+        rankings = sales_df.assign(COGS=cogs).groupby("Item").agg(
+            Units=("Quantity", "sum"),
+            Sales=("Quantity", "size"),
+            Revenue=("Total Amount", "sum"),
+            GST=("GST Amount", "sum"),
+            COGS=("COGS", "sum"),
+        )
+        net_revenue = rankings["Revenue"] - rankings["GST"]
+        rankings["Margin"] = net_revenue - rankings["COGS"]
+        rankings["Margin %"] = (rankings["Margin"] / net_revenue.where(net_revenue != 0) * 100).fillna(0).round(1)
+        for measure in ("Units", "Revenue", "Margin"):
+            rankings[f"{measure} Rank"] = rankings[measure].rank(ascending=False, method="min").astype(int)
+        return rankings.sort_values("Units", ascending=False)
+
+    def get_leaderboard(self, sales_df=None):
+        """Streaming top-K leaderboard, updated with sales appended since last call"""
+        if sales_df is None:
+            sales_df = self.get_sales()
+        if self._leaderboard is None:
+            self._leaderboard = SalesLeaderboard()
+        return self._leaderboard.update(sales_df)
+
+    def get_gst_ledger(self, sales_df=None):
+        """GST rollups by month, rate slab and customer, updated with new sales"""
+        if sales_df is None:
+            sales_df = self.get_sales()
+        if self._gst is None:
+            self._gst = GstLedger()
+        return self._gst.update(sales_df)
@@ -0,0 +1,181 @@
+"""
+Precomputed dashboard data, refreshed in the background
+
+A SnapshotRefresher thread per shop reads Sales, Inventory, Stock Movements,
+Expenses and Customers with one batched request, recomputes the dashboard aggregates
+and publishes them as an immutable DashboardSnapshot. Page renders read the
+latest snapshot instead of fetching sheets during the user's rerun.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+
+import pandas as pd
+
+import config
+from chart_data import trend_series
+from query import TableIndex
+from search import SearchIndex
+from topk import CUSTOMER_REVENUE, ITEM_COUNT, ITEM_REVENUE, ITEM_UNITS
+
+logger = config.get_logger(__name__)
+
+SNAPSHOT_SHEETS = (
+    config.SHEET_SALES, config.SHEET_INVENTORY, config.SHEET_STOCK_MOVEMENTS,
+    config.SHEET_EXPENSES, config.SHEET_CUSTOMERS,
+)
+
+
+def snapshot_sheets(manager):
+    """SNAPSHOT_SHEETS, leaving out Stock Movements while that tab can't be created
+
+    A missing tab fails the whole batchGet, which then falls back to one
+    read per sheet on every refresh.
+    """
+    if manager.ensure_stock_movements_sheet():
+        return SNAPSHOT_SHEETS
+    return tuple(name for name in SNAPSHOT_SHEETS if name != config.SHEET_STOCK_MOVEMENTS)
+
+
+TOP_ITEMS = 5
+TOP_CUSTOMERS = 10
+
+
+@dataclass(frozen=True)
+class DashboardSnapshot:
+    """Sheet data and dashboard aggregates at one data version
+
+    Snapshots are shared between sessions: treat the frames as read-only and
+    copy before modifying them.
+    """
+    version: int
+    built_at: float
+    sales: pd.DataFrame
+    inventory: pd.DataFrame
+    expenses: pd.DataFrame
+    customers: pd.DataFrame
+    profit: MappingProxyType
+    sales_trend: MappingProxyType  # Daily/Weekly/Monthly -> downsampled revenue series
+    top_items: pd.Series
+    top_customers: pd.Series
+    leaders: MappingProxyType  # (metric, days or None) -> top-K Series
+    item_rankings: MappingProxyType  # days or None -> per-item units/revenue/margin
+    gst_monthly: pd.DataFrame  # per month and rate slab, with CGST/SGST split
+    gst_customers: pd.DataFrame  # per month, customer and rate slab
+    sales_index: TableIndex
+    expenses_index: TableIndex
+    search: SearchIndex  # shared and growing: row positions may run past these frames
+    expense_by_category: pd.DataFrame
+    low_stock: pd.DataFrame
+    reorder_plan: pd.DataFrame
+
+    @property
+    def age(self):
+        """Seconds since the snapshot was built"""
+        return time.time() - self.built_at
+
+
+def build_snapshot(manager, version):
+    """Read all sheets in one request and compute the dashboard aggregates"""
+    frames = manager.read_sheets(snapshot_sheets(manager))
+    frames.setdefault(config.SHEET_STOCK_MOVEMENTS, pd.DataFrame())
+    sales = manager.get_sales(frames[config.SHEET_SALES])
+    inventory = manager.get_inventory(frames[config.SHEET_INVENTORY], frames[config.SHEET_STOCK_MOVEMENTS])
+    expenses = manager.get_expenses(frames[config.SHEET_EXPENSES])
+    customers = frames[config.SHEET_CUSTOMERS]
+
+    if not expenses.empty and "Category" in expenses.columns and "Amount" in expenses.columns:
+        expense_by_category = expenses.groupby("Category")["Amount"].sum().reset_index()
+    else:
+        expense_by_category = pd.DataFrame()
+
+    item_rankings = {days: manager.get_item_rankings(sales, days) for days in (None,) + config.TOPK_WINDOWS}
+    gst = manager.get_gst_ledger(sales)
+    leaders = {
+        (metric, days): manager.get_leaderboard(sales).top(metric, TOP_CUSTOMERS, days)
+        for metric in (ITEM_COUNT, ITEM_UNITS, ITEM_REVENUE, CUSTOMER_REVENUE)
+        for days in (None,) + config.TOPK_WINDOWS
+    }
+
+    return DashboardSnapshot(
+        version=version,
+        built_at=time.time(),
+        sales=sales,
+        inventory=inventory,
+        expenses=expenses,
+        customers=customers,
+        profit=MappingProxyType(manager.get_profit(sales, expenses)),
+        sales_trend=MappingProxyType(trend_series(sales, "Total Amount")),
+        top_items=item_rankings[None]["Units"].head(TOP_ITEMS) if not item_rankings[None].empty else pd.Series(dtype=float),
+        top_customers=leaders[(CUSTOMER_REVENUE, None)],
+        leaders=MappingProxyType(leaders),
+        item_rankings=MappingProxyType(item_rankings),
+        gst_monthly=gst.monthly(),
+        gst_customers=gst.by_customer(),
+        sales_index=TableIndex(sales, ("Item", "Customer"), ("Total Amount", "Quantity"), ("Date",)),
+        expenses_index=TableIndex(expenses, ("Category",), ("Amount",), ("Date",)),
+        search=manager.get_search_index(frames),
+        expense_by_category=expense_by_category,
+        low_stock=manager.get_low_stock_items(inventory_df=inventory, sales_df=sales),
+        reorder_plan=manager.get_reorder_plan(sales, inventory),
+    )
+
+
+class SnapshotRefresher(threading.Thread):
+    """Background thread keeping a manager's DashboardSnapshot up to date
+
+    Every `interval` seconds (or sooner after a write) it re-reads the sheets;
+    aggregates are only recomputed when the manager's data version moved.
+    The latest snapshot is swapped in as a single reference, so readers never
+    see a half-built one.
+    """
+
+    def __init__(self, manager, interval=None):
+        super().__init__(name=f"snapshot-{manager.spreadsheet_id[:8]}", daemon=True)
+        self.manager = manager
+        self.interval = interval or config.SNAPSHOT_REFRESH_INTERVAL
+        self._snapshot = None
+        self._build_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+
+    def latest(self):
+        """The most recently published snapshot, or None before the first build"""
+        return self._snapshot
+
+    def notify(self):
+        """Ask for a refresh soon, e.g. after a write"""
+        self._wake.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Snapshot refresh failed: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def refresh(self):
+        """Rebuild the snapshot if the data changed; returns the latest one"""
+        with self._build_lock:
+            # Read the version first: a change landing mid-build triggers another rebuild
+            version = self.manager.data_version
+            current = self._snapshot
+            if current is not None and current.version == version:
+                # Re-read to pick up remote edits; a change bumps the version
+                self.manager.read_sheets(snapshot_sheets(self.manager))
+                if self.manager.data_version == version:
+                    return current
+                version = self.manager.data_version
+
+            started = time.perf_counter()
+            snapshot = build_snapshot(self.manager, version)
+            self._snapshot = snapshot
+            logger.info(f"Built dashboard snapshot v{version} in {(time.perf_counter() - started) * 1000:.0f} ms")
+            return snapshot
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake.set()
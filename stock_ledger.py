@@ -0,0 +1,216 @@
+"""
+Point-in-time stock queries over the Stock Movements log
+
+For each item the ledger keeps movement timestamps in sorted order with
+running totals of net change and of units sold. Stock on a date, or units
+sold in a period, is then one binary search per boundary (O(log n)) instead
+of replaying the item's history. Rows appended to either sheet are folded
+into the index by update(); it is only rebuilt if earlier rows changed.
+"""
+import threading
+from bisect import bisect_right
+
+import pandas as pd
+
+from row_tracker import RowTracker, confirmed_rows
+
+SALE_REASON = "sale"
+
+
+class _ItemIndex:
+    """Sorted movement times with prefix sums for one item"""
+
+    __slots__ = ("times", "net", "sold")
+
+    def __init__(self):
+        self.times = []  # int nanoseconds, ascending
+        self.net = []    # net change up to and including each movement
+        self.sold = []   # units sold up to and including each movement
+
+    def add(self, ts, change, sold):
+        """Insert a movement; appending in time order is O(1)"""
+        pos = bisect_right(self.times, ts)
+        self.times.insert(pos, ts)
+        self.net.insert(pos, (self.net[pos - 1] if pos else 0.0) + change)
+        self.sold.insert(pos, (self.sold[pos - 1] if pos else 0.0) + sold)
+        # A back-dated movement shifts the running totals after it
+        for i in range(pos + 1, len(self.times)):
+            self.net[i] += change
+            self.sold[i] += sold
+
+    def totals_at(self, ts):
+        """(net change, units sold) over all movements at or before ts"""
+        pos = bisect_right(self.times, ts)
+        if pos == 0:
+            return 0.0, 0.0
+        return self.net[pos - 1], self.sold[pos - 1]
+
+
+def _end_of_day(date):
+    """Last nanosecond of a date (or the timestamp itself if it has a time)"""
+    ts = pd.Timestamp(date)
+    if ts == ts.normalize():
+        ts = ts + pd.Timedelta(days=1) - pd.Timedelta(1, unit="ns")
+    return ts.value
+
+
+def _start_of_day(date):
+    return pd.Timestamp(date).normalize().value
+
+
+class StockLedger:
+    """Opening balances plus an indexed movement history per item
+
+    Item names are matched case-insensitively, like the rest of the app.
+    """
+
+    def __init__(self, opening=None):
+        self._lock = threading.RLock()
+        self._inventory = RowTracker()  # Inventory rows folded in so far
+        self._movements = RowTracker()  # Stock Movements rows folded in so far
+        self._reset()
+        for item, stock in (opening or {}).items():
+            self._set_opening(item, stock)
+
+    def _reset(self):
+        self.opening = {}
+        self._names = {}
+        self._items = {}
+
+    def _set_opening(self, item, stock):
+        self.opening[str(item).lower()] = float(stock)
+        self._names.setdefault(str(item).lower(), str(item))
+
+    @classmethod
+    def from_frames(cls, inventory_df, movements_df):
+        """Build from the raw Inventory sheet (opening Stock) and Stock Movements"""
+        return cls().update(inventory_df, movements_df)
+
+    def update(self, inventory_df, movements_df):
+        """Fold in Inventory and Stock Movements rows appended to the sheets since the last update
+
+        Rows still pending in the WAL are left for a later update. Rebuilds
+        from scratch if rows already folded in were edited or deleted (e.g.
+        an opening Stock corrected in Inventory).
+        """
+        with self._lock:
+            inventory_rebuild, new_items = self._inventory.split(inventory_df)
+            movements_rebuild, new_movements = self._movements.split(movements_df)
+            if inventory_rebuild or movements_rebuild:
+                self._reset()
+                new_items, new_movements = confirmed_rows(inventory_df), confirmed_rows(movements_df)
+            if not new_items.empty and {"Item", "Stock"} <= set(new_items.columns):
+                stock = pd.to_numeric(new_items["Stock"], errors="coerce").fillna(0)
+                for item, value in zip(new_items["Item"].astype(str), stock):
+                    self._set_opening(item, value)
+            if not new_movements.empty and {"Timestamp", "Item", "Change"} <= set(new_movements.columns):
+                if self._items:
+                    for row in self._movement_frame(new_movements).itertuples(index=False):
+                        self.record(row.name, row.ts, row.change, row.reason)
+                else:
+                    self._load(new_movements)
+            self._inventory.commit()
+            self._movements.commit()
+        return self
+
+    @property
+    def inventory_rows(self):
+        """Inventory rows folded in so far"""
+        return self._inventory.rows
+
+    @property
+    def movement_rows(self):
+        """Stock Movements rows folded in so far"""
+        return self._movements.rows
+
+    @staticmethod
+    def _movement_frame(movements_df):
+        """Parsed movements in time order; rows without a valid timestamp are dropped"""
+        reasons = movements_df["Reason"] if "Reason" in movements_df.columns else pd.Series("", index=movements_df.index)
+        frame = pd.DataFrame({
+            "name": movements_df["Item"].astype(str),
+            "ts": pd.to_datetime(movements_df["Timestamp"], errors="coerce"),
+            "change": pd.to_numeric(movements_df["Change"], errors="coerce").fillna(0).astype(float),
+            "reason": reasons.astype(str).str.lower(),
+        })
+        return frame.dropna(subset=["ts"]).sort_values("ts", kind="stable")
+
+    def _load(self, movements_df):
+        """Index a full movement history at once"""
+        frame = self._movement_frame(movements_df)
+        frame["item"] = frame["name"].str.lower()
+        frame["sold"] = (-frame["change"]).where(frame["reason"] == SALE_REASON, 0.0)
+
+        # Vectorised prefix sums per item; the lists are then used for bisecting
+        frame["net"] = frame.groupby("item")["change"].cumsum()
+        frame["sold_total"] = frame.groupby("item")["sold"].cumsum()
+        for name in movements_df["Item"].astype(str).drop_duplicates():
+            self._names.setdefault(name.lower(), name)
+        for item, group in frame.groupby("item", sort=False):
+            index = _ItemIndex()
+            index.times = group["ts"].to_numpy(dtype="datetime64[ns]").astype("int64").tolist()
+            index.net = group["net"].tolist()
+            index.sold = group["sold_total"].tolist()
+            self._items[item] = index
+
+    def record(self, item, timestamp, change, reason=""):
+        """Add one movement to the index"""
+        change = float(change)
+        sold = -change if str(reason).lower() == SALE_REASON else 0.0
+        key = str(item).lower()
+        with self._lock:
+            self._names.setdefault(key, str(item))
+            self._items.setdefault(key, _ItemIndex()).add(pd.Timestamp(timestamp).value, change, sold)
+
+    def items(self):
+        """Item names (as first seen) with an opening balance or movements"""
+        with self._lock:
+            return sorted(self._names.values(), key=str.lower)
+
+    def stock_on(self, item, date=None):
+        """Stock of an item at the end of `date` (today's stock if None)"""
+        key = str(item).lower()
+        with self._lock:
+            opening = self.opening.get(key, 0.0)
+            index = self._items.get(key)
+            if index is None:
+                return opening
+            if date is None:
+                return opening + (index.net[-1] if index.net else 0.0)
+            return opening + index.totals_at(_end_of_day(date))[0]
+
+    def units_sold(self, item, start, end):
+        """Units sold from the start of `start` to the end of `end`"""
+        with self._lock:
+            index = self._items.get(str(item).lower())
+            if index is None:
+                return 0.0
+            before = index.totals_at(_start_of_day(start) - 1)[1]
+            return index.totals_at(_end_of_day(end))[1] - before
+
+    def turnover(self, item, start, end):
+        """Inventory turnover: units sold / average of opening and closing stock"""
+        sold = self.units_sold(item, start, end)
+        average = (self._stock_before(item, start) + self.stock_on(item, end)) / 2
+        return sold / average if average > 0 else 0.0
+
+    def _stock_before(self, item, date):
+        """Stock at the very start of `date`"""
+        key = str(item).lower()
+        with self._lock:
+            index = self._items.get(key)
+            net = index.totals_at(_start_of_day(date) - 1)[0] if index is not None else 0.0
+            return self.opening.get(key, 0.0) + net
+
+    def turnover_report(self, start, end):
+        """Per-item stock, units sold and turnover for a period"""
+        rows = []
+        for item in self.items():
+            rows.append({
+                "Item": item,
+                "Opening": self._stock_before(item, start),
+                "Closing": self.stock_on(item, end),
+                "Units Sold": self.units_sold(item, start, end),
+                "Turnover": round(self.turnover(item, start, end), 2),
+            })
+        return pd.DataFrame(rows)
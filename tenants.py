@@ -0,0 +1,146 @@
+"""
+Multi-shop support: one SheetsManager per shop, sharing a single API client
+"""
+import threading
+import time
+from collections import OrderedDict
+
+import config
+
+logger = config.get_logger(__name__)
+
+
+class UnknownShopError(KeyError):
+    """Raised when a shop is not listed in config.SHOPS"""
+
+
+class TenantRegistry:
+    """LRU registry of per-shop SheetsManager instances
+
+    All shops share the root manager's API client and HTTP pool; each shop
+    gets its own read cache and quota tracker. Managers idle for longer than
+    `idle_seconds`, or beyond `max_active` shops, are evicted (least recently
+    used first) so memory stays bounded; they are recreated on next use.
+
+    Background snapshot refresh costs every shop a read per refresh
+    interval from the shared read quota, so it only runs for the
+    `max_refreshing` most recently used shops, and not for shops idle longer
+    than `refresh_idle_seconds`. A sweeper thread applies both limits even
+    when no requests arrive.
+
+    Write-ahead logs go to `wal_dir` (config.WAL_DIR by default), one per shop.
+    """
+
+    def __init__(self, root_manager, shops=None, max_active=None, idle_seconds=None,
+                 max_refreshing=None, refresh_idle_seconds=None, sweep_interval=None, wal_dir=None):
+        self.root = root_manager
+        self.shops = dict(shops if shops is not None else config.SHOPS)
+        self.wal_dir = wal_dir or config.WAL_DIR
+        self.max_active = max_active or config.MAX_ACTIVE_SHOPS
+        self.idle_seconds = idle_seconds if idle_seconds is not None else config.SHOP_IDLE_SECONDS
+        self.max_refreshing = max_refreshing or max(1, int(
+            config.SHEETS_READS_PER_MINUTE * config.SNAPSHOT_QUOTA_SHARE * config.SNAPSHOT_REFRESH_INTERVAL / 60
+        ))
+        self.refresh_idle_seconds = (refresh_idle_seconds if refresh_idle_seconds is not None
+                                     else config.SNAPSHOT_IDLE_SECONDS)
+        self._lock = threading.Lock()
+        self._active = OrderedDict()  # shop_id -> (last_used, manager)
+
+        self._stop_event = threading.Event()
+        self._sweeper = threading.Thread(target=self._sweep_loop, name="shop-sweeper", daemon=True,
+                                         args=(sweep_interval or config.SHOP_SWEEP_INTERVAL,))
+        self._sweeper.start()
+
+    def get(self, shop_id):
+        """Return the SheetsManager for a shop, creating it if needed"""
+        if shop_id not in self.shops:
+            raise UnknownShopError(shop_id)
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._active.pop(shop_id, None)
+            if entry is None:
+                spreadsheet_id = self.shops[shop_id]
+                if spreadsheet_id == self.root.spreadsheet_id:
+                    manager = self.root
+                else:
+                    manager = self.root.for_spreadsheet(spreadsheet_id)
+                if config.WAL_ENABLED:
+                    try:
+                        manager.enable_write_ahead_log(directory=self.wal_dir)
+                    except Exception:
+                        # e.g. WalLockedError; the shop is retried on next use
+                        if manager is not self.root:
+                            manager.close()
+                        raise
+                logger.info(f"Activated shop {shop_id}")
+            else:
+                manager = entry[1]
+            if config.SNAPSHOT_REFRESH_ENABLED:
+                manager.enable_background_refresh()
+            self._active[shop_id] = (now, manager)
+            self._evict(now)
+            self._limit_refresh(now)
+        return manager
+
+    def sweep(self):
+        """Evict idle shops and pause refresh for shops nobody is using"""
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            self._limit_refresh(now)
+
+    def _sweep_loop(self, interval):
+        while not self._stop_event.wait(interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"Shop sweep failed: {e}")
+
+    def _limit_refresh(self, now):
+        """Keep snapshot refresh only for recent shops within the quota budget"""
+        refreshing = 0
+        for shop_id, (last_used, manager) in reversed(self._active.items()):
+            if refreshing < self.max_refreshing and now - last_used <= self.refresh_idle_seconds:
+                refreshing += manager.refreshing
+            elif manager.refreshing:
+                manager.disable_background_refresh()
+                logger.info(f"Paused snapshot refresh for shop {shop_id}")
+
+    def _evict(self, now):
+        """Drop idle managers and the least recently used beyond max_active
+
+        Shops with writes still waiting in their WAL are kept until replayed.
+        """
+        for shop_id, (last_used, manager) in list(self._active.items()):
+            if len(self._active) <= self.max_active and now - last_used <= self.idle_seconds:
+                break
+            if manager.has_pending_writes():
+                continue
+            del self._active[shop_id]
+            if manager is not self.root:
+                manager.close()
+            else:
+                manager.disable_background_refresh()
+            manager.invalidate(keep_stale=False)
+            logger.info(f"Evicted idle shop {shop_id}")
+
+    def close(self):
+        """Stop the sweeper and close every active manager, flushing their WALs"""
+        self._stop_event.set()
+        with self._lock:
+            managers = [manager for _, manager in self._active.values()]
+            self._active.clear()
+        if self.root not in managers:
+            managers.append(self.root)
+        for manager in managers:
+            manager.close()
+
+    def active_shops(self):
+        """Per-shop quota usage for currently active shops"""
+        with self._lock:
+            return {
+                shop_id: dict(manager.quota.usage(),
+                              pending_writes=len(manager.wal.pending()) if manager.wal else 0)
+                for shop_id, (_, manager) in self._active.items()
+            }
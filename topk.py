@@ -0,0 +1,178 @@
+"""
+Streaming top-K leaderboards for items and customers
+
+Running totals are updated as sales are appended instead of re-counting the
+whole Sales history. Each all-time leaderboard keeps its top entries sorted,
+so reading the top K is a slice. Time-windowed leaderboards (last 7/30 days)
+are merged from per-day buckets and cached until the next update.
+"""
+import datetime
+import heapq
+import threading
+
+import pandas as pd
+
+import config
+from row_tracker import RowTracker
+
+# Leaderboards kept by SalesLeaderboard
+ITEM_COUNT = "item_count"  # sale rows, not units
+ITEM_UNITS = "item_units"
+ITEM_REVENUE = "item_revenue"
+CUSTOMER_REVENUE = "customer_revenue"
+METRICS = (ITEM_COUNT, ITEM_UNITS, ITEM_REVENUE, CUSTOMER_REVENUE)
+
+
+class TopK:
+    """Running totals per key with the largest `capacity` kept in order
+
+    Adding a positive amount costs O(capacity). A negative amount (e.g. a
+    return) may push a key out of the top, so the top list is rebuilt.
+    """
+
+    def __init__(self, capacity=None):
+        self.capacity = capacity or config.TOPK_CAPACITY
+        self.totals = {}
+        self._top = []  # [key, total] sorted by total, descending
+        self._dirty = False
+
+    def add(self, key, amount):
+        total = self.totals.get(key, 0) + amount
+        self.totals[key] = total
+        if amount < 0:
+            self._dirty = True
+            return
+        if self._dirty:
+            return
+
+        for entry in self._top:
+            if entry[0] == key:
+                entry[1] = total
+                break
+        else:
+            if len(self._top) >= self.capacity and total <= self._top[-1][1]:
+                return
+            self._top.append([key, total])
+        # Stable sort keeps first-seen order for ties, like value_counts
+        self._top.sort(key=lambda e: e[1], reverse=True)
+        del self._top[self.capacity:]
+
+    def top(self, k):
+        """[(key, total)] for the k largest totals"""
+        if k > self.capacity:
+            return heapq.nlargest(k, self.totals.items(), key=lambda kv: kv[1])
+        if self._dirty:
+            self._top = [list(kv) for kv in heapq.nlargest(self.capacity, self.totals.items(), key=lambda kv: kv[1])]
+            self._dirty = False
+        return [tuple(entry) for entry in self._top[:k]]
+
+
+class SalesLeaderboard:
+    """All-time and windowed top items (by sales, units and revenue) and customers"""
+
+    def __init__(self, windows=None, capacity=None):
+        self.windows = tuple(windows or config.TOPK_WINDOWS)
+        self._capacity = capacity
+        self._lock = threading.Lock()
+        self._tracker = RowTracker()  # Sales rows folded in so far
+        self._reset()
+
+    def _reset(self):
+        self._all_time = {metric: TopK(self._capacity) for metric in METRICS}
+        self._daily = {}  # date -> {metric: {key: total}}
+        self._window_cache = {}
+
+    # ===================== UPDATES =====================
+
+    def update(self, sales_df):
+        """Fold in Sales rows appended to the sheet since the last update
+
+        Rows still pending in the WAL are left for a later update. Rebuilds
+        from scratch if rows already folded in were edited or deleted.
+        """
+        with self._lock:
+            rebuild, new_rows = self._tracker.split(sales_df)
+            if rebuild:
+                self._reset()
+            if not new_rows.empty:
+                self._add(new_rows)
+                self._window_cache = {}
+            self._tracker.commit()
+        return self
+
+    @property
+    def rows(self):
+        """Sales rows folded in so far"""
+        return self._tracker.rows
+
+    def _add(self, sales_df):
+        if "Item" not in sales_df.columns:
+            return
+        frame = pd.DataFrame({"Item": sales_df["Item"]})
+        frame["count"] = 1
+        frame["units"] = sales_df["Quantity"] if "Quantity" in sales_df.columns else 0.0
+        frame["revenue"] = sales_df["Total Amount"] if "Total Amount" in sales_df.columns else 0.0
+        frame["Customer"] = sales_df["Customer"] if "Customer" in sales_df.columns else None
+        dates = pd.to_datetime(sales_df["Date"], errors="coerce") if "Date" in sales_df.columns else pd.Series(pd.NaT, index=sales_df.index)
+        frame["day"] = dates.dt.date
+
+        # Aggregate the batch first so each key is touched once
+        items = frame.groupby("Item", sort=False)[["count", "units", "revenue"]].sum()
+        for item, count, units, revenue in zip(items.index, items["count"], items["units"], items["revenue"]):
+            self._all_time[ITEM_COUNT].add(item, count)
+            self._all_time[ITEM_UNITS].add(item, units)
+            self._all_time[ITEM_REVENUE].add(item, revenue)
+        customers = frame.dropna(subset=["Customer"]).groupby("Customer", sort=False)["revenue"].sum()
+        for customer, revenue in customers.items():
+            self._all_time[CUSTOMER_REVENUE].add(customer, revenue)
+
+        if not self.windows:
+            return
+        oldest = datetime.date.today() - datetime.timedelta(days=max(self.windows) - 1)
+        recent = frame[frame["day"].notna()]
+        recent = recent[recent["day"] >= oldest]
+        by_day = recent.groupby(["day", "Item"], sort=False)[["count", "units", "revenue"]].sum()
+        for (day, item), count, units, revenue in zip(by_day.index, by_day["count"], by_day["units"], by_day["revenue"]):
+            bucket = self._bucket(day)
+            bucket[ITEM_COUNT][item] = bucket[ITEM_COUNT].get(item, 0) + count
+            bucket[ITEM_UNITS][item] = bucket[ITEM_UNITS].get(item, 0) + units
+            bucket[ITEM_REVENUE][item] = bucket[ITEM_REVENUE].get(item, 0) + revenue
+        recent = recent.dropna(subset=["Customer"])
+        for (day, customer), revenue in recent.groupby(["day", "Customer"], sort=False)["revenue"].sum().items():
+            bucket = self._bucket(day)
+            bucket[CUSTOMER_REVENUE][customer] = bucket[CUSTOMER_REVENUE].get(customer, 0) + revenue
+
+    def _bucket(self, day):
+        return self._daily.setdefault(day, {metric: {} for metric in METRICS})
+
+    # ===================== QUERIES =====================
+
+    def top(self, metric, limit=5, days=None):
+        """pd.Series of the top `limit` keys for a metric
+
+        `days` restricts it to the last N days (up to the longest window).
+        """
+        with self._lock:
+            if days is None:
+                pairs = self._all_time[metric].top(limit)
+            else:
+                pairs = self._window_top(metric, days, limit)
+        return pd.Series(dict(pairs), dtype=float)
+
+    def _window_top(self, metric, days, limit):
+        today = datetime.date.today()
+        key = (metric, days, today)
+        ranked = self._window_cache.get(key)
+        if ranked is None or len(ranked) < limit:
+            first_day = today - datetime.timedelta(days=days - 1)
+            # Drop buckets older than the longest window
+            for day in [d for d in self._daily if d < today - datetime.timedelta(days=max(self.windows) - 1)]:
+                del self._daily[day]
+            totals = {}
+            for day, bucket in self._daily.items():
+                if first_day <= day <= today:
+                    for name, amount in bucket[metric].items():
+                        totals[name] = totals.get(name, 0) + amount
+            ranked = heapq.nlargest(max(limit, config.TOPK_CAPACITY), totals.items(), key=lambda kv: kv[1])
+            self._window_cache[key] = ranked
+        return ranked[:limit]
@@ -1,81 +1,37 @@
+"""
+Vyapar Vidya - quick-entry mode
+
+A single-screen version of the app: type a sale, a stock delivery or a
+question and see the headline numbers. It shares SheetsManager and AIHelper
+with app.py (see services.py), so writes go through the same cache and
+write path and the dashboard is read from the same background snapshot.
+"""
 import streamlit as st
 import datetime
-import pandas as pd
-import json
-from groq import Groq
-
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
-
-# ===================== CONFIG =====================
-
-groq_client = Groq(
-    api_key="gsk_YOUR_GROQ_API_KEY_HERE"
-)
-
-SHEET_ID = "YOUR_GOOGLE_SHEET_ID"
-
-creds = service_account.Credentials.from_service_account_file(
-    "credentials.json",
-    scopes=["https://www.googleapis.com/auth/spreadsheets"]
-)
-
-sheets = build("sheets", "v4", credentials=creds).spreadsheets()
-
-# ===================== GOOGLE SHEETS HELPERS =====================
-
-def append_row(sheet_name, values):
-    sheets.values().append(
-        spreadsheetId=SHEET_ID,
-        range=sheet_name,
-        valueInputOption="USER_ENTERED",
-        body={"values": [values]}
-    ).execute()
 
-def read_sheet(sheet_name):
-    result = sheets.values().get(
-        spreadsheetId=SHEET_ID,
-        range=sheet_name
-    ).execute()
+import config
+from services import as_number, init_services, validate_sale_data, validate_inventory_data
+from tenants import UnknownShopError
+from wal import WalLockedError
 
-    values = result.get("values", [])
-    if len(values) < 2:
-        return pd.DataFrame()
+# ===================== INITIALIZE SERVICES =====================
 
-    return pd.DataFrame(values[1:], columns=values[0])
+tenants, ai_helper, error = init_services("quick")
 
-# ===================== GROQ NLP =====================
+if error:
+    st.error(f"❌ Failed to initialize services: {error}")
+    st.stop()
 
-def parse_message(text):
-    prompt = f"""
-You are a finance assistant for small shop owners.
-
-Extract intent and information from the message below.
-Return ONLY valid JSON.
-
-Message:
-"{text}"
-
-Possible intents:
-- sale
-- inventory_add
-- query
-
-JSON fields:
-intent, item, quantity, selling_price, cost_price, customer
-"""
-
-    response = groq_client.chat.completions.create(
-        model="llama-3.1-8b-instant",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0
-    )
-
-    try:
-        return json.loads(response.choices[0].message.content)
-    except json.JSONDecodeError:
-        st.error("❌ AI response not valid JSON")
-        return None
+# Shop from ?shop=<id> in the URL, as in app.py
+shop_id = st.query_params.get("shop", list(tenants.shops)[0])
+try:
+    sheets_manager = tenants.get(shop_id)
+except UnknownShopError:
+    st.error(f"❌ Unknown shop: {shop_id}")
+    st.stop()
+except WalLockedError as e:
+    st.error(f"❌ {e}")
+    st.stop()
 
 # ===================== STREAMLIT UI =====================
 
@@ -84,76 +40,85 @@ st.title("💼 Vyapar Vidya – Smart Finance Assistant")
 user_input = st.text_input("💬 Speak or type your business update")
 
 if st.button("Submit") and user_input:
-    data = parse_message(user_input)
+    data = ai_helper.parse_message(user_input)
     if not data:
+        st.error("❌ AI response not valid JSON")
         st.stop()
 
-    today = str(datetime.date.today())
-
-    if data["intent"] == "sale":
-        append_row(
-            "Sales",
-            [
-                today,
-                data.get("item"),
-                data.get("quantity"),
-                data.get("selling_price"),
-                data.get("cost_price"),
-                data.get("customer")
-            ]
+    today = datetime.date.today().strftime(config.DATE_FORMAT)
+    intent = data.get("intent")
+
+    if intent == "sale":
+        is_valid, message = validate_sale_data(data)
+        if not is_valid:
+            st.error(f"❌ {message}")
+            st.stop()
+        # Near-match names are recorded as given; point out the existing ones
+        hints = []
+        for field, sheet_name in (("Item", config.SHEET_INVENTORY), ("Customer", config.SHEET_CUSTOMERS)):
+            name = data.get(field.lower())
+            suggestions = sheets_manager.name_suggestions(name, field, sheet_name) if name else []
+            if suggestions:
+                hints.append(f"New {field.lower()} '{name}'. Similar existing: {', '.join(suggestions)}")
+        quantity = as_number(data.get("quantity"))
+        if sheets_manager.add_sale(
+            today,
+            data.get("item"),
+            quantity,
+            as_number(data.get("selling_price")),
+            as_number(data.get("cost_price")),
+            data.get("customer", ""),
+            as_number(data.get("gst_rate"), config.DEFAULT_GST_RATE)
+        ):
+            sheets_manager.update_inventory_stock(data.get("item"), quantity)
+            if data.get("customer"):
+                sheets_manager.add_or_update_customer(data.get("customer"))
+            st.success("✅ Sale recorded")
+            for hint in hints:
+                st.info(f"ℹ️ {hint}")
+
+    elif intent == "inventory_add":
+        is_valid, message = validate_inventory_data(data)
+        if not is_valid:
+            st.error(f"❌ {message}")
+            st.stop()
+        success, _, _ = sheets_manager.add_or_update_inventory(
+            data.get("item"),
+            as_number(data.get("quantity")),
+            as_number(data.get("cost_price"))
         )
-        st.success("✅ Sale recorded")
-
-    elif data["intent"] == "inventory_add":
-        append_row(
-            "Inventory",
-            [
-                data.get("item"),
-                data.get("quantity"),
-                data.get("cost_price")
-            ]
-        )
-        st.success("📦 Inventory updated")
+        if success:
+            st.success("📦 Inventory updated")
 
     else:
-        sales_df = read_sheet("Sales")
-        inventory_df = read_sheet("Inventory")
-
-        if not sales_df.empty:
-            sales_df["Selling Price"] = pd.to_numeric(
-                sales_df["Selling Price"], errors="coerce"
-            ).fillna(0)
+        # Answered from the precomputed snapshot; no sheet reads here
+        snapshot = sheets_manager.snapshot()
+        question = user_input.lower()
 
-        if not inventory_df.empty:
-            inventory_df["Stock"] = pd.to_numeric(
-                inventory_df["Stock"], errors="coerce"
-            ).fillna(0)
+        if "week" in question and 7 in snapshot.item_rankings:
+            weekly = snapshot.item_rankings[7]
+            earnings = weekly["Revenue"].sum() if not weekly.empty else 0
+            st.info(f"💰 Weekly earnings: {config.CURRENCY}{earnings:,.2f}")
 
-        if "week" in user_input.lower() and not sales_df.empty:
-            st.info(f"💰 Weekly earnings: ₹{sales_df['Selling Price'].sum()}")
+        elif "best" in question and not snapshot.top_items.empty:
+            st.info(f"🏆 Best-selling item: {snapshot.top_items.index[0]}")
 
-        elif "best" in user_input.lower() and not sales_df.empty:
-            st.info(f"🏆 Best-selling item: {sales_df['Item'].value_counts().idxmax()}")
+        elif "inventory" in question and "Stock" in snapshot.inventory.columns:
+            st.info(f"📦 Inventory units available: {snapshot.inventory['Stock'].sum():g}")
 
-        elif "inventory" in user_input.lower() and not inventory_df.empty:
-            st.info(f"📦 Inventory units available: {inventory_df['Stock'].sum()}")
+        else:
+            st.info(ai_helper.get_insight(user_input, snapshot.sales, snapshot.inventory,
+                                          snapshot.expenses, snapshot.profit))
 
 # ===================== DASHBOARD =====================
 
 st.divider()
 st.subheader("📊 Quick Dashboard")
 
-sales_df = read_sheet("Sales")
-inventory_df = read_sheet("Inventory")
+snapshot = sheets_manager.snapshot()
 
-if not sales_df.empty:
-    sales_df["Selling Price"] = pd.to_numeric(
-        sales_df["Selling Price"], errors="coerce"
-    ).fillna(0)
-    st.metric("Total Sales", f"₹{sales_df['Selling Price'].sum()}")
+if not snapshot.sales.empty:
+    st.metric("Total Sales", f"{config.CURRENCY}{snapshot.profit['revenue']:,.2f}")
 
-if not inventory_df.empty:
-    inventory_df["Stock"] = pd.to_numeric(
-        inventory_df["Stock"], errors="coerce"
-    ).fillna(0)
-    st.metric("Inventory Units", inventory_df["Stock"].sum())
+if not snapshot.inventory.empty and "Stock" in snapshot.inventory.columns:
+    st.metric("Inventory Units", f"{snapshot.inventory['Stock'].sum():g}")
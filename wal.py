@@ -0,0 +1,297 @@
+"""
+Durable local write-ahead log for sheet appends
+
+add_sale/add_expense write the row to an append-only, fsync'd JSON Lines
+file and return immediately; a background replayer sends pending rows to
+Google Sheets in batches. Each entry carries an idempotency key (its id),
+written to the sheet in a trailing config.WAL_ID_COLUMN. The log records
+when a batch is sent and when it is acknowledged; entries whose send may
+have reached the sheet are re-sent only if their id isn't there, so
+identical rows (two walk-in sales of the same item) are never mistaken for
+each other.
+
+A log belongs to one process: it is locked with flock() on a sidecar
+".lock" file (the log itself is replaced on compaction), and opening a log
+held by another process raises WalLockedError.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, rely on separate WAL_DIRs
+    fcntl = None
+
+import config
+
+logger = config.get_logger(__name__)
+
+
+def _pad(values, width):
+    """Row values padded with blanks up to `width` columns"""
+    values = list(values)
+    return values + [""] * (width - len(values))
+
+
+def _column_letter(index):
+    """Zero-based column index to A1 letters (0 -> A, 26 -> AA)"""
+    letters = ""
+    index += 1
+    while index:
+        index, rest = divmod(index - 1, 26)
+        letters = chr(ord("A") + rest) + letters
+    return letters
+
+
+class WalLockedError(RuntimeError):
+    """Raised when another process already has the write-ahead log open"""
+
+
+class WriteAheadLog:
+    """Append-only log of rows waiting to be written to a spreadsheet"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._pending = {}       # id -> entry, in insertion order
+        self._ambiguous = set()  # ids sent before a crash but never acknowledged
+        self._acked_records = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock_file = self._acquire_lock()
+        self._load()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _acquire_lock(self):
+        """Hold an exclusive lock so two processes never replay or compact one log"""
+        lock_file = open(self.path + ".lock", "a")
+        if fcntl is None:
+            return lock_file
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            raise WalLockedError(
+                f"Write-ahead log {self.path} is in use by another process; "
+                f"give each process its own WAL_DIR"
+            )
+        return lock_file
+
+    # ===================== PERSISTENCE =====================
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        in_flight = set()
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn final line from a crash mid-write: it was never acknowledged
+                    logger.warning(f"Skipping corrupt WAL record in {self.path}")
+                    continue
+                op = record.get("op")
+                if op == "append":
+                    self._pending[record["id"]] = record
+                elif op == "send":
+                    in_flight.update(record["ids"])
+                elif op == "ack":
+                    for entry_id in record["ids"]:
+                        self._pending.pop(entry_id, None)
+                        in_flight.discard(entry_id)
+                    self._acked_records += 1
+        self._ambiguous = in_flight & set(self._pending)
+        if self._pending:
+            logger.info(f"Recovered {len(self._pending)} pending writes from {self.path}")
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    # ===================== API =====================
+
+    def append(self, sheet_name, values):
+        """Durably record a row to append; returns its idempotency key"""
+        entry = {
+            "op": "append",
+            "id": uuid.uuid4().hex,
+            "sheet": sheet_name,
+            "values": list(values),
+            "ts": time.time(),
+        }
+        with self._lock:
+            self._write(entry)
+            self._pending[entry["id"]] = entry
+        return entry["id"]
+
+    def pending(self):
+        """Pending entries in the order they were written"""
+        with self._lock:
+            return list(self._pending.values())
+
+    def pending_rows(self, sheet_name):
+        with self._lock:
+            return [e["values"] for e in self._pending.values() if e["sheet"] == sheet_name]
+
+    def is_ambiguous(self, entry_id):
+        with self._lock:
+            return entry_id in self._ambiguous
+
+    def mark_ambiguous(self, ids):
+        """Flag entries whose send failed in a way that may have reached the sheet"""
+        with self._lock:
+            self._ambiguous.update(entry_id for entry_id in ids if entry_id in self._pending)
+
+    def mark_sent(self, ids):
+        with self._lock:
+            self._write({"op": "send", "ids": list(ids), "ts": time.time()})
+
+    def mark_done(self, ids):
+        """Acknowledge entries that are now in the spreadsheet"""
+        ids = list(ids)
+        if not ids:
+            return
+        with self._lock:
+            self._write({"op": "ack", "ids": ids, "ts": time.time()})
+            for entry_id in ids:
+                self._pending.pop(entry_id, None)
+                self._ambiguous.discard(entry_id)
+            self._acked_records += 1
+            if not self._pending or self._acked_records >= config.WAL_COMPACT_EVERY:
+                self._compact()
+
+    def _compact(self):
+        """Rewrite the log with only pending entries (caller holds the lock)"""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for entry in self._pending.values():
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            if self._ambiguous:
+                f.write(json.dumps({"op": "send", "ids": sorted(self._ambiguous)}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._file.close()
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._acked_records = 0
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+            # Closing the lock file releases the flock
+            self._lock_file.close()
+
+
+class WalReplayer(threading.Thread):
+    """Background thread replaying pending WAL entries to Google Sheets"""
+
+    def __init__(self, manager, wal, interval=None, delay=None):
+        super().__init__(name=f"wal-replayer-{manager.spreadsheet_id[:8]}", daemon=True)
+        self.manager = manager
+        self.wal = wal
+        self.interval = interval or config.WAL_REPLAY_INTERVAL
+        self.delay = config.WAL_FLUSH_DELAY if delay is None else delay
+        self._wake = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._id_columns = {}  # sheet name -> zero-based index of the id column
+
+    def notify(self):
+        """Ask for a flush soon (writes arriving meanwhile join the same batch)"""
+        self._idle.clear()
+        self._wake.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self.delay:
+                time.sleep(self.delay)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"WAL replay failed: {e}")
+            if not self.wal.pending():
+                self._idle.set()
+
+    def flush(self):
+        """Send all pending entries, one batched append per sheet"""
+        with self._flush_lock:
+            self._flush()
+
+    def _flush(self):
+        by_sheet = {}
+        for entry in self.wal.pending():
+            by_sheet.setdefault(entry["sheet"], []).append(entry)
+
+        for sheet_name, entries in by_sheet.items():
+            entries = self._skip_already_applied(sheet_name, entries)
+            if not entries:
+                continue
+            ids = [e["id"] for e in entries]
+            column = self._id_column(sheet_name)
+            rows = [_pad(e["values"], column) + [e["id"]] for e in entries]
+            self.wal.mark_sent(ids)
+            appended = self.manager.append_rows(sheet_name, rows)
+            self.wal.mark_done(ids[:appended])
+            if appended < len(entries):
+                # A failed request may still have been applied server-side
+                self.wal.mark_ambiguous(ids[appended:])
+                logger.warning(f"WAL replay to {sheet_name} stopped after {appended}/{len(entries)} rows")
+
+    def _read_values(self, sheet_name, cell_range=None):
+        from sheets_manager import a1_range  # sheets_manager imports this module
+
+        result = self.manager._execute("read_rows", self.manager.sheets.values().get(
+            spreadsheetId=self.manager.spreadsheet_id,
+            range=a1_range(sheet_name, cell_range)
+        ))
+        return result.get("values", [])
+
+    def _id_column(self, sheet_name):
+        """Index of the id column, adding its header after the last one if missing"""
+        column = self._id_columns.get(sheet_name)
+        if column is None:
+            header = (self._read_values(sheet_name, "1:1") or [[]])[0]
+            if config.WAL_ID_COLUMN in header:
+                column = header.index(config.WAL_ID_COLUMN)
+            else:
+                column = len(header)
+                self.manager.update_cell(sheet_name, f"{_column_letter(column)}1", config.WAL_ID_COLUMN)
+            self._id_columns[sheet_name] = column
+        return column
+
+    def _skip_already_applied(self, sheet_name, entries):
+        """Acknowledge entries from an interrupted send whose id is already in the sheet"""
+        ambiguous = [e for e in entries if self.wal.is_ambiguous(e["id"])]
+        if not ambiguous:
+            return entries
+
+        column = self._id_column(sheet_name)
+        in_sheet = {row[column] for row in self._read_values(sheet_name)[1:] if len(row) > column}
+        applied = [e["id"] for e in ambiguous if e["id"] in in_sheet]
+        if applied:
+            logger.info(f"{len(applied)} interrupted WAL writes already in {sheet_name}; not re-sending")
+            self.wal.mark_done(applied)
+        applied = set(applied)
+        return [e for e in entries if e["id"] not in applied]
+
+    def wait_idle(self, timeout=None):
+        """Block until everything pending has been replayed"""
+        self.notify()
+        return self._idle.wait(timeout)
+
+    def stop(self, flush=True):
+        if flush:
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Final WAL flush failed: {e}")
+        self._stop_event.set()
+        self._wake.set()